@@ -27,8 +27,19 @@ config.set_main_option('sqlalchemy.url', settings.DATABASE_URL)
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
 from app.db.base import Base
+from app.db.search import SEARCH_VECTOR_COLUMN, UNMAPPED_INDEXES
 target_metadata = Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Search columns/indexes (app.db.search) exist only in the database.
+    if reflected and compare_to is None:
+        if type_ == "column" and name == SEARCH_VECTOR_COLUMN:
+            return False
+        if type_ == "index" and name in UNMAPPED_INDEXES:
+            return False
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -51,6 +62,7 @@ def run_migrations_offline():
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -74,7 +86,9 @@ def run_migrations_online():
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,53 @@
+"""add_tenant_indexes
+
+Revision ID: a3b5c7d9e1f2
+Revises: f1c2a7d9b3e4
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3b5c7d9e1f2'
+down_revision = 'f1c2a7d9b3e4'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    # Tenant-leading composites matching the CRUD list queries
+    # (WHERE organization_id = ? ORDER BY id, plus keyset predicates on id).
+    ('ix_risks_organization_id_id', 'risks', ['organization_id', 'id']),
+    ('ix_controls_organization_id_id', 'controls', ['organization_id', 'id']),
+    ('ix_areas_organization_id_id', 'areas', ['organization_id', 'id']),
+    ('ix_forms_organization_id_id', 'forms', ['organization_id', 'id']),
+    ('ix_users_organization_id_id', 'users', ['organization_id', 'id']),
+    ('ix_activity_log_organization_id_created_at', 'activity_log', ['organization_id', 'created_at']),
+    # Foreign keys that are looked up from the parent side
+    ('ix_risk_controls_control_id', 'risk_controls', ['control_id']),
+    ('ix_questions_form_id', 'questions', ['form_id']),
+    ('ix_options_question_id', 'options', ['question_id']),
+    ('ix_answers_submission_id', 'answers', ['submission_id']),
+    ('ix_answers_question_id', 'answers', ['question_id']),
+    (
+        'ix_form_submissions_form_id_respondent_identifier',
+        'form_submissions',
+        ['form_id', 'respondent_identifier'],
+    ),
+]
+
+
+def upgrade():
+    # Built CONCURRENTLY on PostgreSQL so existing tenants keep writing.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False, postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,49 @@
+"""add_risk_heatmap_cells
+
+Revision ID: b6d8e0f2a4c6
+Revises: a3b5c7d9e1f2
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d8e0f2a4c6'
+down_revision = 'a3b5c7d9e1f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'risk_heatmap_cells',
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('area_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=16), nullable=False),
+        sa.Column('probability', sa.Integer(), nullable=False),
+        sa.Column('impact', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['area_id'], ['areas.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('organization_id', 'area_id', 'kind', 'probability', 'impact'),
+    )
+    # Backfill from the existing register
+    op.execute(
+        "INSERT INTO risk_heatmap_cells "
+        "(organization_id, area_id, kind, probability, impact, count) "
+        "SELECT organization_id, area_id, 'inherent', inherent_probability, inherent_impact, count(*) "
+        "FROM risks "
+        "WHERE inherent_probability IS NOT NULL AND inherent_impact IS NOT NULL "
+        "GROUP BY organization_id, area_id, inherent_probability, inherent_impact "
+        "UNION ALL "
+        "SELECT organization_id, area_id, 'residual', residual_probability, residual_impact, count(*) "
+        "FROM risks "
+        "WHERE residual_probability IS NOT NULL AND residual_impact IS NOT NULL "
+        "GROUP BY organization_id, area_id, residual_probability, residual_impact"
+    )
+
+
+def downgrade():
+    op.drop_table('risk_heatmap_cells')
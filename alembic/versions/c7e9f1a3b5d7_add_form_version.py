@@ -0,0 +1,26 @@
+"""add_form_version
+
+Revision ID: c7e9f1a3b5d7
+Revises: b6d8e0f2a4c6
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e9f1a3b5d7'
+down_revision = 'b6d8e0f2a4c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'forms', sa.Column('version', sa.Integer(), server_default='1', nullable=False)
+    )
+
+
+def downgrade():
+    op.drop_column('forms', 'version')
@@ -0,0 +1,27 @@
+"""add_submission_grading_status
+
+Revision ID: d8f0a2b4c6e8
+Revises: c7e9f1a3b5d7
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f0a2b4c6e8'
+down_revision = 'c7e9f1a3b5d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'form_submissions',
+        sa.Column('grading_status', sa.String(length=16), server_default='graded', nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_column('form_submissions', 'grading_status')
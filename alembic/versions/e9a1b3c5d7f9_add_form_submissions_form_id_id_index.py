@@ -0,0 +1,32 @@
+"""add_form_submissions_form_id_id_index
+
+Revision ID: e9a1b3c5d7f9
+Revises: d8f0a2b4c6e8
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9a1b3c5d7f9'
+down_revision = 'd8f0a2b4c6e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Built CONCURRENTLY on PostgreSQL so submissions keep flowing in.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_form_submissions_form_id_id',
+            'form_submissions',
+            ['form_id', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    op.drop_index('ix_form_submissions_form_id_id', table_name='form_submissions')
@@ -0,0 +1,121 @@
+"""add_search_indexes
+
+Revision ID: f1c2a7d9b3e4
+Revises: e4d8f9c12a3b
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c2a7d9b3e4'
+down_revision = 'e4d8f9c12a3b'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_VECTORS = {
+    'risks': (
+        "setweight(to_tsvector('simple', coalesce(process_name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(risk_description, '')), 'B')"
+    ),
+    'controls': (
+        "setweight(to_tsvector('simple', coalesce(control_code, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+    ),
+}
+TRIGRAM_COLUMNS = {
+    'risks': ('process_name', 'risk_description'),
+    'controls': ('control_code', 'description'),
+}
+
+
+def _sqlite_fts_statements(table, columns):
+    # Same FTS5 table and triggers as app.db.search creates for `create_all`
+    fts = f'{table}_fts'
+    cols = ', '.join(columns)
+    new_values = ', '.join(f'new.{c}' for c in columns)
+    old_values = ', '.join(f'old.{c}' for c in columns)
+    delete_old = (
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});"
+    )
+    insert_new = f'INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});'
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{table}', content_rowid='id', tokenize='trigram')",
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert_new} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete_old} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN '
+        f'{delete_old} {insert_new} END',
+        # Index the rows that already exist
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def upgrade():
+    dialect = op.get_context().dialect.name
+    if dialect == 'sqlite':
+        for table, columns in TRIGRAM_COLUMNS.items():
+            for statement in _sqlite_fts_statements(table, columns):
+                op.execute(statement)
+        return
+    if dialect != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, expression in SEARCH_VECTORS.items():
+        op.add_column(
+            table,
+            sa.Column(
+                'search_vector',
+                postgresql.TSVECTOR(),
+                sa.Computed(expression, persisted=True),
+                nullable=True,
+            ),
+        )
+
+    # Build the GIN indexes without blocking writes on large registers.
+    with op.get_context().autocommit_block():
+        for table, columns in TRIGRAM_COLUMNS.items():
+            for column in columns:
+                op.create_index(
+                    f'ix_{table}_{column}_trgm',
+                    table,
+                    [column],
+                    unique=False,
+                    postgresql_using='gin',
+                    postgresql_ops={column: 'gin_trgm_ops'},
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                )
+        for table in SEARCH_VECTORS:
+            op.create_index(
+                f'ix_{table}_search_vector',
+                table,
+                ['search_vector'],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    dialect = op.get_context().dialect.name
+    if dialect == 'sqlite':
+        for table in TRIGRAM_COLUMNS:
+            for trigger in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_fts_{trigger}')
+            op.execute(f'DROP TABLE IF EXISTS {table}_fts')
+        return
+    if dialect != 'postgresql':
+        return
+
+    for table, columns in TRIGRAM_COLUMNS.items():
+        op.drop_index(f'ix_{table}_search_vector', table_name=table)
+        for column in columns:
+            op.drop_index(f'ix_{table}_{column}_trgm', table_name=table)
+        op.drop_column(table, 'search_vector')
@@ -1,13 +1,15 @@
-from typing import Generator, Any
+from typing import AsyncGenerator, Generator, Any
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+from jose import JWTError
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.auth import Principal, principal_cache
 from app.core.config import settings
-from app.db.session import SessionLocal
-from app.db.models.user import User
+from app.core.tokens import REFRESH_TOKEN_TYPE, decode_token
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine
 from app.schemas.token import TokenData
 from app.crud import crud_user
 
@@ -22,28 +24,56 @@ def get_db() -> Generator:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async counterpart of `get_db` for `async def` endpoints.
+
+    Requires ASYNC_DATABASE_URL to be configured.
+    """
+    if async_engine is None:
+        raise RuntimeError("ASYNC_DATABASE_URL is not configured")
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> User:
+) -> Principal:
+    """
+    Resolve the token to a `Principal`, touching the database only when
+    neither trusted claims nor the principal cache can answer.
+    """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_token(token)
         token_data = TokenData(sub=payload.get("sub"))
     except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = crud_user.user.get(db, id=token_data.sub)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+    if token_data.sub is None or payload.get("typ") == REFRESH_TOKEN_TYPE:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+
+    if principal_cache.claims_valid(token_data.sub, payload.get("iat")):
+        principal = Principal.from_claims(token_data.sub, payload)
+        if principal is not None:
+            return principal
+
+    principal = principal_cache.get(token_data.sub)
+    if principal is None:
+        user = crud_user.user.get(db, id=token_data.sub)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        principal = Principal.from_user(user)
+        principal_cache.set(principal)
+    return principal
 
 
 def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
@@ -53,7 +83,9 @@ class RoleChecker:
     def __init__(self, allowed_roles: list[str]):
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_active_user)) -> User:
+    def __call__(
+        self, current_user: Principal = Depends(get_current_active_user)
+    ) -> Principal:
         if current_user.role not in self.allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,137 @@
+"""
+`GET /metrics` in the Prometheus text format.
+
+Everything is read from in-process collectors, so each worker process
+reports its own series; scrape every worker (or run a single one locally).
+"""
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Response
+
+from app.core.metrics import request_metrics
+from app.core.password_hashing import password_hasher
+from app.core.prometheus import CONTENT_TYPE, Exposition
+from app.db import session
+from app.services.grading import grading_queue
+
+router = APIRouter()
+
+POOL_GAUGES = {
+    "size": "Configured pool size",
+    "checked_out": "Connections currently checked out",
+    "checked_in": "Idle connections in the pool",
+    "overflow": "Connections open beyond the pool size",
+}
+POOL_COUNTERS = {
+    "connects": "New DBAPI connections opened",
+    "invalidations": "Connections invalidated",
+    "idle_pings": "Liveness pings of idle connections",
+    "checkout_timeouts": "Checkouts that timed out waiting for a connection",
+}
+
+
+def _pool_snapshots() -> List[Dict[str, Any]]:
+    snapshots = [session.pool_metrics.snapshot()]
+    if session.async_engine is not None:
+        snapshots.append(session.async_pool_metrics.snapshot())
+    return snapshots
+
+
+def _add_http(exposition: Exposition) -> None:
+    exposition.gauge(
+        "http_requests_in_progress",
+        "HTTP requests being served",
+        [({}, request_metrics.in_progress.value)],
+    )
+    exposition.counter(
+        "http_requests_total",
+        "HTTP requests by method, route template and status",
+        (
+            ({"method": method, "route": route, "status": status}, value)
+            for (method, route, status), value in sorted(request_metrics.requests().items())
+        ),
+    )
+    exposition.histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by method and route template",
+        (
+            ({"method": method, "route": route}, snapshot)
+            for (method, route), snapshot in sorted(request_metrics.latency().items())
+        ),
+    )
+
+
+def _add_pools(exposition: Exposition) -> None:
+    pools = _pool_snapshots()
+    for key, help_text in POOL_GAUGES.items():
+        exposition.gauge(
+            f"db_pool_{key}",
+            help_text,
+            (({"pool": pool["name"]}, pool[key]) for pool in pools if key in pool),
+        )
+    for key, help_text in POOL_COUNTERS.items():
+        exposition.counter(
+            f"db_pool_{key}_total",
+            help_text,
+            (({"pool": pool["name"]}, pool[key]) for pool in pools),
+        )
+    exposition.histogram(
+        "db_pool_checkout_duration_seconds",
+        "Time spent waiting for a pooled connection",
+        (({"pool": pool["name"]}, pool["checkout_latency"]) for pool in pools),
+    )
+
+
+def _add_password_hashing(exposition: Exposition) -> None:
+    hasher = password_hasher.snapshot()
+    exposition.gauge("password_hash_workers", "bcrypt worker processes", [({}, hasher["workers"])])
+    exposition.gauge(
+        "password_hash_pending", "bcrypt calls running or queued", [({}, hasher["pending"])]
+    )
+    exposition.gauge(
+        "password_hash_max_pending",
+        "bcrypt calls allowed running or queued",
+        [({}, hasher["max_pending"])],
+    )
+    exposition.counter(
+        "password_hash_rejected_total",
+        "bcrypt calls rejected with 429 for lack of a slot",
+        [({}, hasher["rejected"])],
+    )
+    exposition.counter(
+        "password_hash_rehashed_total",
+        "Password hashes upgraded to the current cost on login",
+        [({}, hasher["rehashed"])],
+    )
+    exposition.histogram(
+        "password_hash_duration_seconds",
+        "bcrypt call latency including queueing",
+        [({}, hasher["latency"])],
+    )
+
+
+def _add_grading(exposition: Exposition) -> None:
+    grading = grading_queue.snapshot()
+    exposition.gauge(
+        "grading_queue_pending", "Submissions queued for grading", [({}, grading["pending"])]
+    )
+    exposition.counter(
+        "grading_graded_total", "Submissions graded in background", [({}, grading["graded"])]
+    )
+    exposition.counter(
+        "grading_failed_total", "Submissions whose grading failed", [({}, grading["failed"])]
+    )
+
+
+def render_metrics() -> str:
+    exposition = Exposition()
+    _add_http(exposition)
+    _add_pools(exposition)
+    _add_password_hashing(exposition)
+    _add_grading(exposition)
+    return exposition.render()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
@@ -2,8 +2,8 @@ from fastapi import APIRouter, Depends, status
 from sqlalchemy.orm import Session
 from app import schemas
 from app.crud import crud_area
+from app.core.auth import Principal
 from app.api import deps
-from app.db.models.user import User
 
 router = APIRouter()
 
@@ -16,7 +16,7 @@ def create_area(
     *,
     db: Session = Depends(deps.get_db),
     area_in: schemas.area.AreaCreate,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ):
     """
     Create new area.
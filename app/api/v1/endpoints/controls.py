@@ -1,14 +1,17 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app import schemas
 from app.crud import crud_control, crud_risk
+from app.core.auth import Principal
 from app.api import deps
-from app.db.models.user import User
+from app.crud.pagination import CountMode
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.control.Control])
+@router.get("/", response_model=Union[List[schemas.control.Control], schemas.Page[schemas.control.Control]])
 def read_controls(
     db: Session = Depends(deps.get_db),
     skip: int = 0,
@@ -16,27 +19,41 @@ def read_controls(
     sort: Optional[str] = None,
     search: Optional[str] = None,
     fields: Optional[str] = None,
-    current_user: User = Depends(deps.get_current_active_user),
+    cursor: Optional[str] = None,
+    envelope: bool = False,
+    count: Optional[CountMode] = None,
+    current_user: Principal = Depends(deps.get_current_active_user),
 ):
     """
     Retrieve controls.
+
+    Passing `cursor` (or `envelope=true` for the first page) returns a `Page`
+    envelope whose `next_cursor` continues with keyset pagination. `count`
+    (exact, estimated or auto) also fills in `total`. `fields` (e.g.
+    `id,description,risks.id`) selects only those columns; unknown fields
+    are rejected with 400.
     """
-    controls = crud_control.control.get_multi(
-        db, skip=skip, limit=limit, sort=sort, search=search
+    fieldset = crud_control.CONTROL_FIELDS.parse(fields) if fields else None
+    page = crud_control.control.get_page(
+        db,
+        skip=skip,
+        limit=limit,
+        sort=sort,
+        search=search,
+        cursor=cursor,
+        count=count,
+        fields=fieldset,
+        loaders=crud_control.CONTROL_LIST_LOADERS,
     )
-    
-    if fields:
-        selected_fields = fields.split(',')
-        output = []
-        for control in controls:
-            data = {}
-            for field in selected_fields:
-                if hasattr(control, field):
-                    data[field] = getattr(control, field)
-            output.append(data)
-        return output
-        
-    return controls
+    as_page = cursor is not None or envelope or count is not None
+
+    if fieldset is not None:
+        # Partial rows don't fit the response model; serialize them directly.
+        controls = [fieldset.dump(control) for control in page.items]
+        return JSONResponse(jsonable_encoder(page.envelope(controls) if as_page else controls))
+    if as_page:
+        return page.envelope()
+    return page.items
 
 @router.post(
     "/",
@@ -47,7 +64,7 @@ def create_control(
     *,
     db: Session = Depends(deps.get_db),
     control_in: schemas.control.ControlCreate,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ):
     """
     Create new control.
@@ -67,7 +84,7 @@ def update_control(
     db: Session = Depends(deps.get_db),
     control_id: int,
     control_in: schemas.control.ControlUpdate,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ):
     """
     Update a control.
@@ -90,7 +107,7 @@ def add_risk_to_control(
     db: Session = Depends(deps.get_db),
     control_id: int,
     risk_id: int,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ):
     """
     Associate an existing risk with a control.
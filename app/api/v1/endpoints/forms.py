@@ -1,12 +1,15 @@
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Union
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 from app import schemas
 from app.api.deps import get_db, get_current_active_user
 from app.crud import crud_form
-from app.db.models.user import User
+from app.crud.pagination import CountMode
+from app.core.auth import Principal
+from app.core.config import settings
+from app.services import form_stats, public_forms
 from app.schemas.submission import Submission, SubmissionCreate, AccessRequest
 
 router = APIRouter()
@@ -18,7 +21,7 @@ def create_form(
     *,
     db: Session = Depends(get_db),
     form_in: schemas.FormCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Create new form.
@@ -31,68 +34,110 @@ def create_form(
     )
     return form
 
-@router.get("/", response_model=List[schemas.Form])
+@router.get("/", response_model=Union[List[schemas.Form], schemas.Page[schemas.Form]])
 def read_forms(
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user),
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    envelope: bool = False,
+    count: Optional[CountMode] = None,
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve forms.
+
+    Passing `cursor` (or `envelope=true` for the first page) returns a `Page`
+    envelope whose `next_cursor` continues with keyset pagination. `count`
+    (exact, estimated or auto) also fills in `total`.
     """
+    as_page = cursor is not None or envelope or count is not None
     if not current_user.organization_id:
         # Superadmin logic or empty
-        return []
+        return {"items": [], "total": 0 if count else None} if as_page else []
     
-    forms = crud_form.form.get_multi_by_organization(
-        db=db, organization_id=current_user.organization_id, skip=skip, limit=limit
+    page = crud_form.form.get_page_by_organization(
+        db,
+        organization_id=current_user.organization_id,
+        skip=skip,
+        limit=limit,
+        sort=sort,
+        cursor=cursor,
+        count=count,
+        loaders=crud_form.FORM_LIST_LOADERS,
     )
-    return forms
+    if as_page:
+        return page.envelope()
+    return page.items
+
+def _get_own_form(db: Session, form_id: int, current_user: Principal):
+    form = crud_form.form.get(db=db, id=form_id)
+    if not form:
+        raise HTTPException(status_code=404, detail="Form not found")
+    if form.organization_id != current_user.organization_id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return form
 
 @router.get("/{form_id}", response_model=schemas.Form)
 def read_form(
     form_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Get specific form by id (Admin).
     """
-    form = crud_form.form.get(db=db, id=form_id)
-    if not form:
-        raise HTTPException(status_code=404, detail="Form not found")
-    if form.organization_id != current_user.organization_id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    return form
+    return _get_own_form(db, form_id, current_user)
 
-@router.get("/{form_id}/stats", response_model=schemas.FormStats) # Define specific schema if needed
+@router.get("/{form_id}/stats", response_model=schemas.FormStats)
 def get_form_stats(
     form_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
-    Get form statistics and submissions.
+    Get form statistics: submission count, average score, pass rate, score
+    histogram and per-question correctness, all computed in SQL.
+
+    Submissions themselves are listed by `GET /forms/{form_id}/submissions`.
     """
-    form = crud_form.form.get(db=db, id=form_id)
-    if not form:
-        raise HTTPException(status_code=404, detail="Form not found")
-    if form.organization_id != current_user.organization_id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    
-    # Simple stats
-    total_submissions = len(form.submissions)
-    avg_score = 0.0
-    if total_submissions > 0 and form.is_graded:
-        total_score = sum(s.score for s in form.submissions)
-        avg_score = total_score / total_submissions
-    
-    return {
-        "total_submissions": total_submissions,
-        "average_score": avg_score,
-        "submissions": form.submissions # returns list of FormSubmission
-    }
+    form = _get_own_form(db, form_id, current_user)
+    return form_stats.form_stats(db, form)
+
+@router.get(
+    "/{form_id}/submissions",
+    response_model=Union[List[schemas.Submission], schemas.Page[schemas.Submission]],
+)
+def read_form_submissions(
+    form_id: int,
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = 100,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    envelope: bool = False,
+    count: Optional[CountMode] = None,
+    current_user: Principal = Depends(get_current_active_user),
+) -> Any:
+    """
+    Retrieve a form's submissions with their answers, paginated like the
+    other list endpoints.
+    """
+    _get_own_form(db, form_id, current_user)
+    page = crud_form.submission.get_page_by_form(
+        db,
+        form_id=form_id,
+        skip=skip,
+        limit=limit,
+        sort=sort,
+        cursor=cursor,
+        count=count,
+        loaders=crud_form.SUBMISSION_LIST_LOADERS,
+    )
+    if cursor is not None or envelope or count is not None:
+        return page.envelope()
+    return page.items
 
 # --- Public / Respondent Endpoints ---
 
@@ -136,16 +181,23 @@ def validate_access(
 def get_form_structure(
     form_id: int,
     db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
 ) -> Any:
     """
     Get form structure (questions/options) without correct answers.
+
+    Served from a per-process cache with a strong ETag; clients revalidating
+    with If-None-Match get 304 Not Modified.
     """
-    form = crud_form.form.get(db=db, id=form_id)
+    form = public_forms.get_public_form(db, form_id)
     if not form:
          raise HTTPException(status_code=404, detail="Form not found")
-    
-    # We rely on Pydantic FormPublic to filter out sensitive data like 'is_correct'
-    return form
+
+    headers = {"ETag": form.etag, "Cache-Control": "no-cache"}
+    if public_forms.etag_matches(if_none_match, form.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    # FormPublic leaves out sensitive data like 'is_correct'
+    return Response(content=form.body, media_type="application/json", headers=headers)
 
 @router.post("/public/{form_id}/submit", response_model=schemas.Submission)
 def submit_form(
@@ -164,7 +216,35 @@ def submit_form(
     if not form.is_active:
          raise HTTPException(status_code=400, detail="Form is not active")
 
-    # Create submission
-    submission = crud_form.submission.create_submission(db=db, obj_in=submission_in, form=form)
+    # Create submission; graded inline unless background grading is enabled
+    submission = crud_form.submission.create_submission(
+        db=db,
+        obj_in=submission_in,
+        form=form,
+        background=settings.SUBMISSION_GRADING_BACKGROUND,
+    )
+    return submission
+
+@router.get(
+    "/public/{form_id}/submissions/{submission_id}/status",
+    response_model=schemas.SubmissionStatus,
+)
+def get_submission_status(
+    form_id: int,
+    submission_id: int,
+    respondent_identifier: str,
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Grading status of a submission, for respondents polling after a
+    background-graded submit.
+    """
+    submission = crud_form.submission.get(db=db, id=submission_id)
+    if (
+        not submission
+        or submission.form_id != form_id
+        or submission.respondent_identifier != respondent_identifier
+    ):
+        raise HTTPException(status_code=404, detail="Submission not found")
     return submission
 
@@ -1,11 +1,16 @@
+import time
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.api import deps
-from app.core import security
+from app.core import security, tokens
+from app.core.auth import Principal
 from app.core.config import settings
 from app.db.models.user import User
 
@@ -16,7 +21,9 @@ def login_access_token(
     db: Session = Depends(deps.get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ):
     """
-    OAuth2 compatible token login, get an access token for future requests
+    OAuth2 compatible token login, get an access token for future requests.
+
+    Also returns a single-use `refresh_token` for `/login/refresh-token`.
     """
     user = crud.crud_user.user.authenticate(
         db, email=form_data.username, password=form_data.password
@@ -25,10 +32,71 @@ def login_access_token(
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    return _issue_tokens(user)
+
+
+@router.post("/login/refresh-token", response_model=schemas.Token)
+def refresh_access_token(
+    body: schemas.RefreshTokenRequest, db: Session = Depends(deps.get_db)
+):
+    """
+    Exchange a refresh token for a new access token and a new refresh token.
+
+    Each refresh token works once; presenting a used one again revokes every
+    token of that login session.
+    """
+    payload = _decode_refresh_token(body.refresh_token)
+    if not tokens.revocation_store.claim(tokens.jti_key(payload["jti"]), payload["exp"]):
+        tokens.revocation_store.revoke(tokens.family_key(payload["fam"]), _family_expiry())
+        raise _invalid_refresh_token("Refresh token already used")
+
+    user = crud.crud_user.user.get(db, id=int(payload["sub"]))
+    if not user or not user.is_active:
+        raise _invalid_refresh_token()
+    return _issue_tokens(user, family=payload["fam"])
+
+
+@router.post("/login/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(body: schemas.RefreshTokenRequest):
+    """
+    Revoke the login session the refresh token belongs to. Access tokens
+    already issued stay valid until they expire.
+    """
+    payload = _decode_refresh_token(body.refresh_token)
+    tokens.revocation_store.revoke(tokens.family_key(payload["fam"]), _family_expiry())
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+def _issue_tokens(user: User, family: Optional[str] = None) -> dict:
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    claims = Principal.from_user(user).claims() if settings.AUTH_TOKEN_CLAIMS else None
     return {
         "access_token": security.create_access_token(
-            user.id, expires_delta=access_token_expires
+            user.id, expires_delta=access_token_expires, claims=claims
         ),
         "token_type": "bearer",
+        "refresh_token": security.create_refresh_token(user.id, family=family),
     }
+
+
+def _invalid_refresh_token(detail: str = "Invalid refresh token") -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+
+def _decode_refresh_token(token: str) -> dict:
+    try:
+        payload = tokens.decode_token(token, cache=False)
+    except JWTError:
+        raise _invalid_refresh_token()
+    if payload.get("typ") != tokens.REFRESH_TOKEN_TYPE or not all(
+        payload.get(claim) for claim in ("jti", "fam", "sub", "exp")
+    ):
+        raise _invalid_refresh_token()
+    if tokens.revocation_store.is_revoked(tokens.family_key(payload["fam"])):
+        raise _invalid_refresh_token("Refresh token revoked")
+    return payload
+
+
+def _family_expiry() -> float:
+    # No token of the family can outlive this
+    return time.time() + settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60
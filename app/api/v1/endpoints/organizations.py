@@ -1,12 +1,13 @@
-from typing import Any, List
+from typing import Any, List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app import schemas
 from app.crud import crud_organization
+from app.crud.pagination import CountMode
+from app.core.auth import Principal
 from app.api.deps import get_db, RoleChecker, get_current_user
-from app.db.models.user import User
 
 router = APIRouter()
 
@@ -31,21 +32,34 @@ def create_organization(
 
 @router.get(
     "/",
-    response_model=List[schemas.organization.OrganizationResponse],
+    response_model=Union[
+        List[schemas.organization.OrganizationResponse],
+        schemas.Page[schemas.organization.OrganizationResponse],
+    ],
     dependencies=[Depends(RoleChecker(["superadmin"]))],
 )
 def read_organizations(
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    envelope: bool = False,
+    count: Optional[CountMode] = None,
 ):
     """
     Recuperar todas las organizaciones.
     
-    Solo accesible para superadmin.
+    Solo accesible para superadmin. Con `cursor` (o `envelope=true` para la
+    primera página) devuelve un sobre `Page` con `next_cursor`; `count`
+    (exact, estimated o auto) añade `total`.
     """
-    organizations = crud_organization.organization.get_multi(db, skip=skip, limit=limit)
-    return organizations
+    page = crud_organization.organization.get_page(
+        db, skip=skip, limit=limit, sort=sort, cursor=cursor, count=count
+    )
+    if cursor is not None or envelope or count is not None:
+        return page.envelope()
+    return page.items
 
 @router.get(
     "/{organization_id}",
@@ -54,7 +68,7 @@ def read_organizations(
 def read_organization(
     organization_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     Obtener una organización por ID.
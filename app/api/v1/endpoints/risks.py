@@ -1,14 +1,19 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, status, Query, HTTPException
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, File, status, Query, HTTPException, UploadFile
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from app import schemas
 from app.crud import crud_risk, crud_control
+from app.core.auth import Principal
 from app.api import deps
-from app.db.models.user import User
+from app.crud.pagination import CountMode
+from app.core.config import settings
+from app.services import risk_export, risk_heatmap, risk_import, risk_links, risk_scoring
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.risk.Risk])
+@router.get("/", response_model=Union[List[schemas.risk.Risk], schemas.Page[schemas.risk.Risk]])
 def read_risks(
     db: Session = Depends(deps.get_db),
     skip: int = 0,
@@ -16,35 +21,48 @@ def read_risks(
     sort: Optional[str] = None,
     search: Optional[str] = None,
     fields: Optional[str] = None,
-    current_user: User = Depends(deps.get_current_active_user),
+    cursor: Optional[str] = None,
+    envelope: bool = False,
+    count: Optional[CountMode] = None,
+    current_user: Principal = Depends(deps.get_current_active_user),
     # Filtering parameters could be added here, e.g. area_id: Optional[int] = None
 ):
     """
     Retrieve risks with pagination, sorting, searching, and field selection.
+
+    Passing `cursor` (or `envelope=true` for the first page) returns a `Page`
+    envelope whose `next_cursor` continues with keyset pagination. `count`
+    (exact, estimated or auto) also fills in `total`. `fields` (e.g.
+    `id,process_name,controls.id`) selects only those columns; unknown
+    fields are rejected with 400.
     """
     # A simple filter example, more can be added
     filters = {}
     # if area_id:
     #     filters["area_id"] = area_id
-        
-    risks = crud_risk.risk.get_multi(
-        db, skip=skip, limit=limit, sort=sort, search=search, filters=filters
+
+    fieldset = crud_risk.RISK_FIELDS.parse(fields) if fields else None
+    page = crud_risk.risk.get_page(
+        db,
+        skip=skip,
+        limit=limit,
+        sort=sort,
+        search=search,
+        filters=filters,
+        cursor=cursor,
+        count=count,
+        fields=fieldset,
+        loaders=crud_risk.RISK_LIST_LOADERS,
     )
-    
-    if fields:
-        # This is a simplified implementation of sparse fieldsets.
-        # For a more robust solution, consider using a library or a more complex parser.
-        selected_fields = fields.split(',')
-        output = []
-        for risk in risks:
-            data = {}
-            for field in selected_fields:
-                if hasattr(risk, field):
-                    data[field] = getattr(risk, field)
-            output.append(data)
-        return output
-        
-    return risks
+    as_page = cursor is not None or envelope or count is not None
+
+    if fieldset is not None:
+        # Partial rows don't fit the response model; serialize them directly.
+        risks = [fieldset.dump(risk) for risk in page.items]
+        return JSONResponse(jsonable_encoder(page.envelope(risks) if as_page else risks))
+    if as_page:
+        return page.envelope()
+    return page.items
 
 @router.post(
     "/",
@@ -55,7 +73,7 @@ def create_risk(
     *,
     db: Session = Depends(deps.get_db),
     risk_in: schemas.risk.RiskCreate,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ):
     """
     Create new risk.
@@ -69,13 +87,145 @@ def create_risk(
     return risk
 
 
+@router.get("/heatmap", response_model=schemas.risk.RiskHeatmap)
+def read_risk_heatmap(
+    db: Session = Depends(deps.get_db),
+    area_id: Optional[int] = None,
+    current_user: Principal = Depends(deps.get_current_active_user),
+):
+    """
+    Risk counts per probability/impact cell, inherent and residual, for the
+    current user's organization, per area and in total.
+    """
+    return risk_heatmap.get_heatmap(
+        db, organization_id=current_user.organization_id, area_id=area_id
+    )
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_risks(
+    db: Session = Depends(deps.get_db),
+    format: risk_export.ExportFormat = "csv",
+    area_id: Optional[int] = None,
+    current_user: Principal = Depends(deps.get_current_active_user),
+):
+    """
+    Export the organization's risk register with linked control codes.
+
+    Rows are streamed as they are read from the database.
+    """
+    content = risk_export.export_risks(
+        db,
+        export_format=format,
+        organization_id=current_user.organization_id,
+        area_id=area_id,
+        batch_size=settings.RISK_EXPORT_BATCH_SIZE,
+    )
+    return StreamingResponse(
+        content,
+        media_type=risk_export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="risks.{format}"'},
+    )
+
+
+@router.post("/score:batch", response_model=schemas.risk.RiskScoreBatchResult)
+def score_risks_batch(
+    *,
+    db: Session = Depends(deps.get_db),
+    batch_in: schemas.risk.RiskScoreBatch,
+    current_user: Principal = Depends(deps.get_current_active_user),
+):
+    """
+    Score many risk questionnaires at once without persisting anything.
+
+    Linked controls are resolved against the current user's organization in a
+    single query; unknown control ids are ignored.
+    """
+    control_ids = {cid for item in batch_in.items for cid in (item.control_ids or [])}
+    effectiveness = crud_control.control.get_effectiveness_by_id(
+        db, ids=control_ids, organization_id=current_user.organization_id
+    )
+    return {"items": risk_scoring.score_questionnaires(batch_in.items, effectiveness)}
+
+
+@router.post("/import", response_model=schemas.risk.RiskImportReport)
+def import_risks(
+    *,
+    db: Session = Depends(deps.get_db),
+    file: UploadFile = File(...),
+    current_user: Principal = Depends(deps.get_current_active_user),
+):
+    """
+    Bulk import risks from a CSV or XLSX file.
+
+    The first row holds the `RiskCreate` field names; `control_ids` is a
+    `;`-separated list. Valid rows are inserted in chunks, invalid rows are
+    listed in the returned per-row error report.
+    """
+    filename = (file.filename or "").lower()
+    if filename.endswith(".xlsx"):
+        rows = risk_import.iter_xlsx_rows(file.file)
+    elif filename.endswith(".csv") or file.content_type == "text/csv":
+        rows = risk_import.iter_csv_rows(file.file)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Only .csv and .xlsx files are supported.",
+        )
+    return risk_import.import_risks(
+        db,
+        rows,
+        organization_id=current_user.organization_id,
+        owner_id=current_user.id,
+        chunk_size=settings.RISK_IMPORT_CHUNK_SIZE,
+        max_reported_errors=settings.RISK_IMPORT_MAX_REPORTED_ERRORS,
+    )
+
+
+@router.post("/controls:link", response_model=schemas.risk.RiskControlLinkResult)
+def link_controls(
+    *,
+    db: Session = Depends(deps.get_db),
+    links_in: schemas.risk.RiskControlLinkBatch,
+    current_user: Principal = Depends(deps.get_current_active_user),
+):
+    """
+    Link many controls to risks in one transaction.
+
+    Pairs that are already linked are ignored; pairs naming a risk or control
+    outside the current user's organization are returned in `skipped`.
+    """
+    return risk_links.link_controls(
+        db,
+        [(item.risk_id, item.control_id) for item in links_in.items],
+        organization_id=current_user.organization_id,
+    )
+
+
+@router.post("/controls:unlink", response_model=schemas.risk.RiskControlLinkResult)
+def unlink_controls(
+    *,
+    db: Session = Depends(deps.get_db),
+    links_in: schemas.risk.RiskControlLinkBatch,
+    current_user: Principal = Depends(deps.get_current_active_user),
+):
+    """
+    Remove many control-risk links in one transaction.
+    """
+    return risk_links.unlink_controls(
+        db,
+        [(item.risk_id, item.control_id) for item in links_in.items],
+        organization_id=current_user.organization_id,
+    )
+
+
 @router.put("/{risk_id}", response_model=schemas.risk.Risk)
 def update_risk(
     *,
     db: Session = Depends(deps.get_db),
     risk_id: int,
     risk_in: schemas.risk.RiskUpdate,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ):
     """
     Update a risk.
@@ -100,7 +250,7 @@ def add_control_to_risk(
     db: Session = Depends(deps.get_db),
     risk_id: int,
     control_id: int,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ):
     """
     Associate an existing control with a risk.
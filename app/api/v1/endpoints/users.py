@@ -1,4 +1,4 @@
-from typing import Any, List
+from typing import Any, List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
@@ -6,7 +6,8 @@ from sqlalchemy.orm import Session
 from app import schemas
 from app.api.deps import RoleChecker, get_current_active_user, get_db
 from app.crud.crud_user import user as crud_user
-from app.db.models.user import User
+from app.crud.pagination import CountMode
+from app.core.auth import Principal
 
 router = APIRouter()
 
@@ -16,35 +17,68 @@ admin_access = RoleChecker(["admin", "superadmin"])
 
 @router.get("/me", response_model=schemas.user.User)
 def read_user_me(
-    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Get current user.
     """
-    return current_user
+    user = crud_user.get(db, id=current_user.id)
+    # Deleted by another process while its principal is cached or its
+    # token claims are still valid
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    return user
 
 
-@router.get("/", response_model=List[schemas.user.User], dependencies=[Depends(admin_access)])
+@router.get(
+    "/",
+    response_model=Union[List[schemas.user.User], schemas.Page[schemas.user.User]],
+    dependencies=[Depends(admin_access)],
+)
 def read_users(
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user),
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    envelope: bool = False,
+    count: Optional[CountMode] = None,
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve users.
+
+    Passing `cursor` (or `envelope=true` for the first page) returns a `Page`
+    envelope whose `next_cursor` continues with keyset pagination. `count`
+    (exact, estimated or auto) also fills in `total`.
     """
+    as_page = cursor is not None or envelope or count is not None
     if current_user.role == "superadmin":
-        users = crud_user.get_multi(db, skip=skip, limit=limit)
+        page = crud_user.get_page(
+            db, skip=skip, limit=limit, sort=sort, cursor=cursor, count=count
+        )
     else:
         # Admin can only see users from their organization
         if not current_user.organization_id:
-             return [] # Or raise error depending on requirements. 
-                       # If admin has no org, they technically shouldn't see any users.
-        users = crud_user.get_multi_by_organization(
-            db, organization_id=current_user.organization_id, skip=skip, limit=limit
+             # Or raise error depending on requirements.
+             # If admin has no org, they technically shouldn't see any users.
+             return {"items": [], "total": 0 if count else None} if as_page else []
+        page = crud_user.get_page_by_organization(
+            db,
+            organization_id=current_user.organization_id,
+            skip=skip,
+            limit=limit,
+            sort=sort,
+            cursor=cursor,
+            count=count,
         )
-    return users
+    if as_page:
+        return page.envelope()
+    return page.items
 
 
 @router.post(
@@ -57,7 +91,7 @@ def create_user(
     *,
     db: Session = Depends(get_db),
     user_in: schemas.user.UserCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Create new user.
@@ -86,7 +120,7 @@ def create_user(
 @router.get("/{user_id}", response_model=schemas.user.User, dependencies=[Depends(admin_access)])
 def read_user_by_id(
     user_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ) -> Any:
     """
@@ -115,7 +149,7 @@ def update_user(
     db: Session = Depends(get_db),
     user_id: int,
     user_in: schemas.user.UserUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Update a user.
@@ -143,7 +177,7 @@ def delete_user(
     *,
     db: Session = Depends(get_db),
     user_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Delete a user.
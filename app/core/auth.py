@@ -0,0 +1,129 @@
+"""
+Resolved request principals and the per-process principal cache.
+
+`get_current_user` used to load the `User` row on every request. It now
+resolves a small immutable `Principal`:
+
+1. from claims embedded in the token (`AUTH_TOKEN_CLAIMS`), unless the
+   subject was invalidated after the token was issued;
+2. from a TTL/LRU cache keyed by user id;
+3. from the database, filling the cache.
+
+`CRUDUser.update`/`remove` call `principal_cache.invalidate`. Invalidation is
+per process: other workers pick up the change when their cache entry expires
+(`AUTH_CACHE_TTL_SECONDS`), and claim tokens stay trusted there until they
+expire, so keep `ACCESS_TOKEN_EXPIRE_MINUTES` short when enabling claims.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+CLAIM_ROLE = "role"
+CLAIM_ORGANIZATION = "org"
+CLAIM_ACTIVE = "active"
+CLAIM_SUPERUSER = "su"
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    organization_id: Optional[int]
+    role: str
+    is_active: bool
+    is_superuser: bool = False
+
+    @classmethod
+    def from_user(cls, user: Any) -> "Principal":
+        return cls(
+            id=user.id,
+            organization_id=user.organization_id,
+            role=user.role,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+        )
+
+    @classmethod
+    def from_claims(cls, subject: int, payload: Dict[str, Any]) -> Optional["Principal"]:
+        if CLAIM_ROLE not in payload or CLAIM_ACTIVE not in payload:
+            return None
+        return cls(
+            id=subject,
+            organization_id=payload.get(CLAIM_ORGANIZATION),
+            role=payload[CLAIM_ROLE],
+            is_active=bool(payload[CLAIM_ACTIVE]),
+            is_superuser=bool(payload.get(CLAIM_SUPERUSER, False)),
+        )
+
+    def claims(self) -> Dict[str, Any]:
+        return {
+            CLAIM_ROLE: self.role,
+            CLAIM_ORGANIZATION: self.organization_id,
+            CLAIM_ACTIVE: self.is_active,
+            CLAIM_SUPERUSER: self.is_superuser,
+        }
+
+
+class PrincipalCache:
+    def __init__(self, ttl_seconds: float, max_entries: int, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        # user id -> wall-clock time of the last invalidation, to reject
+        # claims from tokens issued before it
+        self._invalidated_at: Dict[int, float] = {}
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at <= self._clock():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def set(self, principal: Principal) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[principal.id] = (self._clock() + self.ttl_seconds, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        now = time.time()
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._invalidated_at[user_id] = now
+            # Tokens older than their lifetime are rejected anyway
+            horizon = now - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+            for stale in [k for k, at in self._invalidated_at.items() if at < horizon]:
+                del self._invalidated_at[stale]
+
+    def claims_valid(self, user_id: int, issued_at: Optional[float]) -> bool:
+        if issued_at is None:
+            return False
+        with self._lock:
+            invalidated_at = self._invalidated_at.get(user_id)
+        return invalidated_at is None or issued_at > invalidated_at
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._invalidated_at.clear()
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS, max_entries=settings.AUTH_CACHE_MAX_ENTRIES
+)
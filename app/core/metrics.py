@@ -0,0 +1,134 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, Sequence, Tuple
+
+# Seconds; covers sub-millisecond pool checkouts up to multi-second stalls.
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class Counter:
+    """Monotonic, thread-safe counter."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    """Thread-safe value that can go up and down."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Histogram:
+    """
+    Thread-safe fixed-bucket histogram.
+
+    Buckets are upper bounds; `snapshot` reports cumulative counts per bound,
+    plus `+Inf`, which maps directly onto the Prometheus exposition format.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative: Dict[str, int] = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            cumulative[repr(bound)] = running
+        cumulative["+Inf"] = running + counts[-1]
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+
+
+class RequestMetrics:
+    """
+    HTTP request metrics: an in-flight gauge, request counts by method, route
+    template and status, and latency histograms by method and route template.
+
+    Routes are labelled by template (`/api/v1/risks/{risk_id}`), never by the
+    raw path, so the number of series stays bounded.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.in_progress = Gauge()
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, int], Counter] = {}
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        with self._lock:
+            counter = self._requests.get((method, route, status))
+            if counter is None:
+                counter = self._requests[(method, route, status)] = Counter()
+            histogram = self._latency.get((method, route))
+            if histogram is None:
+                histogram = self._latency[(method, route)] = Histogram(self.buckets)
+        counter.inc()
+        histogram.observe(seconds)
+
+    def requests(self) -> Dict[Tuple[str, str, int], float]:
+        with self._lock:
+            counters = dict(self._requests)
+        return {key: counter.value for key, counter in counters.items()}
+
+    def latency(self) -> Dict[Tuple[str, str], Dict[str, object]]:
+        with self._lock:
+            histograms = dict(self._latency)
+        return {key: histogram.snapshot() for key, histogram in histograms.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._requests.clear()
+            self._latency.clear()
+
+
+request_metrics = RequestMetrics()
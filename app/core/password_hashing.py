@@ -0,0 +1,135 @@
+"""
+bcrypt hashing and verification off the request threads.
+
+Calls are dispatched to a small process pool (`PASSWORD_HASH_WORKERS`) so a
+login burst cannot pin every request thread on bcrypt. At most
+`PASSWORD_HASH_MAX_PENDING` calls may be running or queued; beyond that a
+call waits up to `PASSWORD_HASH_QUEUE_TIMEOUT` seconds for a slot and then
+raises `PasswordHashingBusy`, which the API maps to 429.
+
+The cost factor is pinned to `BCRYPT_ROUNDS`: hashes made with any other cost
+are reported by `verify_and_update` so they can be re-hashed on login.
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram
+
+# bcrypt at production cost takes ~50ms-1s; finer buckets below that are noise
+HASH_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool has no free slot."""
+
+
+@lru_cache(maxsize=None)
+def _context(rounds: int) -> CryptContext:
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+# Module-level so they can be pickled to the worker processes.
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return _context(rounds).verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        *,
+        rounds: int,
+        workers: int,
+        max_pending: int,
+        queue_timeout: float,
+    ) -> None:
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self.latency = Histogram(HASH_LATENCY_BUCKETS)
+        self.rejected = Counter()
+        self.rehashed = Counter()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self.rejected.inc()
+            raise PasswordHashingBusy()
+        with self._lock:
+            self._pending += 1
+        start = time.perf_counter()
+        try:
+            if self.workers <= 0:
+                return fn(*args)
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self.latency.observe(time.perf_counter() - start)
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password, self.rounds)
+
+    def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Return (valid, new_hash); `new_hash` is set when the cost factor changed."""
+        valid, new_hash = self._run(_verify_and_update, password, hashed, self.rounds)
+        if new_hash:
+            self.rehashed.inc()
+        return valid, new_hash
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "rejected": self.rejected.value,
+            "rehashed": self.rehashed.value,
+            "latency": self.latency.snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    queue_timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT,
+)
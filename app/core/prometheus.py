@@ -0,0 +1,64 @@
+"""
+Prometheus text exposition format (version 0.0.4), without the client library.
+"""
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Mapping[str, object]
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Exposition:
+    """Collects metric families and renders them as one scrape body."""
+
+    def __init__(self) -> None:
+        self._lines: List[str] = []
+
+    def _header(self, name: str, kind: str, help_text: str) -> None:
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {kind}")
+
+    def _sample(self, name: str, labels: Labels, value: float) -> None:
+        self._lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    def counter(self, name: str, help_text: str, samples: Iterable[Tuple[Labels, float]]) -> None:
+        self._header(name, "counter", help_text)
+        for labels, value in samples:
+            self._sample(name, labels, value)
+
+    def gauge(self, name: str, help_text: str, samples: Iterable[Tuple[Labels, float]]) -> None:
+        self._header(name, "gauge", help_text)
+        for labels, value in samples:
+            self._sample(name, labels, value)
+
+    def histogram(
+        self, name: str, help_text: str, series: Iterable[Tuple[Labels, Dict[str, object]]]
+    ) -> None:
+        """`series` holds (labels, `Histogram.snapshot()`) pairs."""
+        self._header(name, "histogram", help_text)
+        for labels, snapshot in series:
+            for bound, count in snapshot["buckets"].items():
+                self._sample(f"{name}_bucket", {**labels, "le": bound}, count)
+            self._sample(f"{name}_sum", labels, snapshot["sum"])
+            self._sample(f"{name}_count", labels, snapshot["count"])
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
@@ -1,29 +1,64 @@
+import uuid
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Dict, Optional, Tuple, Union
 
 from jose import jwt
-from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.password_hashing import password_hasher
+from app.core.tokens import ACCESS_TOKEN_TYPE, REFRESH_TOKEN_TYPE
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
+def create_access_token(
+    subject: Union[str, Any],
+    expires_delta: timedelta = None,
+    claims: Optional[Dict[str, Any]] = None,
+) -> str:
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(
+        expire = now + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {
+        **(claims or {}),
+        "typ": ACCESS_TOKEN_TYPE,
+        "exp": expire,
+        "iat": now,
+        "sub": str(subject),
+    }
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
+def create_refresh_token(subject: Union[str, Any], family: Optional[str] = None) -> str:
+    """
+    Single-use refresh token. `family` ties rotated tokens to the login they
+    descend from, so the whole chain can be revoked at once.
+    """
+    now = datetime.utcnow()
+    to_encode = {
+        "typ": REFRESH_TOKEN_TYPE,
+        "jti": uuid.uuid4().hex,
+        "fam": family or uuid.uuid4().hex,
+        "exp": now + timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES),
+        "iat": now,
+        "sub": str(subject),
+    }
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify_and_update(plain_password, hashed_password)[0]
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Like `verify_password`, plus a new hash if the stored cost is outdated."""
+    return password_hasher.verify_and_update(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+    return password_hasher.hash(password)
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Token verification cache and refresh-token revocation.
+
+Access tokens are verified once per process and the decoded payload is kept
+in a small LRU (`TOKEN_CACHE_MAX_ENTRIES`) until the token expires, so
+repeated requests with the same bearer token skip the JWT decode.
+
+Refresh tokens rotate: each one can be exchanged once. The `jti` of a used
+token and any revoked token family (a login session) are recorded in the
+revocation store. Presenting an already-used refresh token revokes its whole
+family. The default store is in-process; set `TOKEN_REVOCATION_STORE` to a
+"module:attribute" path of a shared `RevocationStore` (e.g. Redis-backed)
+when running several processes.
+"""
+import importlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError
+
+from app.core.config import settings
+
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+
+class RevocationStore(ABC):
+    """
+    Interface for revocation backends. Keys expire on their own at
+    `expires_at` (epoch seconds), when the tokens they cover are invalid anyway.
+    """
+
+    @abstractmethod
+    def claim(self, key: str, expires_at: float) -> bool:
+        """Atomically mark `key`; return False if it was already marked."""
+
+    @abstractmethod
+    def revoke(self, key: str, expires_at: float) -> None:
+        ...
+
+    @abstractmethod
+    def is_revoked(self, key: str) -> bool:
+        ...
+
+
+class InMemoryRevocationStore(RevocationStore):
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._keys: Dict[str, float] = {}
+        self._next_prune = 0.0
+
+    def _prune(self, now: float) -> None:
+        if now < self._next_prune:
+            return
+        self._next_prune = now + 60
+        for key in [k for k, exp in self._keys.items() if exp <= now]:
+            del self._keys[key]
+
+    def claim(self, key: str, expires_at: float) -> bool:
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            if self._keys.get(key, 0) > now:
+                return False
+            self._keys[key] = expires_at
+            return True
+
+    def revoke(self, key: str, expires_at: float) -> None:
+        with self._lock:
+            self._keys[key] = max(expires_at, self._keys.get(key, 0))
+
+    def is_revoked(self, key: str) -> bool:
+        with self._lock:
+            return self._keys.get(key, 0) > time.time()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+
+def _load_store(path: Optional[str]) -> RevocationStore:
+    if not path:
+        return InMemoryRevocationStore()
+    module, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+
+revocation_store = _load_store(settings.TOKEN_REVOCATION_STORE)
+
+
+class TokenCache:
+    """LRU of verified token payloads, each valid until the token's `exp`."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            payload = self._entries.get(token)
+            if payload is None:
+                return None
+            if payload.get("exp", 0) <= time.time():
+                del self._entries[token]
+                raise ExpiredSignatureError("Signature has expired.")
+            self._entries.move_to_end(token)
+            return payload
+
+    def set(self, token: str, payload: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[token] = payload
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_MAX_ENTRIES)
+
+
+def decode_token(token: str, *, cache: bool = True) -> Dict[str, Any]:
+    """Verify `token` and return its payload; raises `JWTError` when invalid."""
+    if cache:
+        payload = token_cache.get(token)
+        if payload is not None:
+            return payload
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    if cache:
+        token_cache.set(token, payload)
+    return payload
+
+
+def jti_key(jti: str) -> str:
+    return f"jti:{jti}"
+
+
+def family_key(family: str) -> str:
+    return f"family:{family}"
@@ -1,18 +1,45 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session, joinedload
-from app.crud.base import CRUDBase
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.crud.fieldsets import FieldSet, FieldSpec
+from app.crud.loaders import LoaderProfile, nested
+from app.crud.pagination import CountMode, PageResult, paginate
+from app.db.search import search_clauses
 from app.db.models.control import Control
 from app.db.models.risk import Risk
-from app.schemas.control import ControlCreate, ControlUpdate
-import math
+from app.schemas.control import ControlCreate, ControlInDB, ControlUpdate
+from app.schemas.risk import RiskInDB
+from app.services.residual_risk import recompute_residual_risk
+from app.services.risk_scoring import answer_level
+
+EFF_PROBABILITY_QUESTIONS = ("eff_prob_question_1", "eff_prob_question_2", "eff_prob_question_3")
+EFF_IMPACT_QUESTIONS = ("eff_imp_question_1", "eff_imp_question_2", "eff_imp_question_3")
+CONTROL_FIELDS = FieldSpec(Control, ControlInDB, {"risks": (Risk, RiskInDB)})
+# `schemas.control.Control`: the control with its nested risks
+CONTROL_LIST_LOADERS = LoaderProfile(nested(Control.risks, RiskInDB))
+CONTROL_SEARCH_COLUMNS = (Control.control_code, Control.description)
+
+
+def _apply_effectiveness_levels(db_obj: Control, update_data: dict) -> None:
+    if "eff_prob_question_1" in update_data:
+        db_obj.effectiveness_probability = answer_level(
+            [update_data[q] for q in EFF_PROBABILITY_QUESTIONS]
+        )
+    if "eff_imp_question_1" in update_data:
+        db_obj.effectiveness_impact = answer_level(
+            [update_data[q] for q in EFF_IMPACT_QUESTIONS]
+        )
+
 
 class CRUDControl(CRUDBase[Control, ControlCreate, ControlUpdate]):
     def create_with_organization_and_risks(
         self, db: Session, *, obj_in: ControlCreate, organization_id: int, owner_id: int
     ) -> Control:
         # Calculate effectiveness
-        eff_prob = math.ceil((obj_in.eff_prob_question_1 + obj_in.eff_prob_question_2 + obj_in.eff_prob_question_3) / 3)
-        eff_imp = math.ceil((obj_in.eff_imp_question_1 + obj_in.eff_imp_question_2 + obj_in.eff_imp_question_3) / 3)
+        eff_prob = answer_level([getattr(obj_in, q) for q in EFF_PROBABILITY_QUESTIONS])
+        eff_imp = answer_level([getattr(obj_in, q) for q in EFF_IMPACT_QUESTIONS])
 
         db_obj = Control(
             description=obj_in.description,
@@ -25,22 +52,13 @@ class CRUDControl(CRUDBase[Control, ControlCreate, ControlUpdate]):
         )
         
         if obj_in.risk_ids:
-            risks = db.query(Risk).filter(Risk.id.in_(obj_in.risk_ids)).all()
-            
-            for risk in risks:
-                risk.controls.append(db_obj)
-                sum_eff_prob = sum(c.effectiveness_probability for c in risk.controls)
-                sum_eff_imp = sum(c.effectiveness_impact for c in risk.controls)
-                
-                risk.residual_probability = risk.inherent_probability - sum_eff_prob
-                if risk.residual_probability < 1:
-                    risk.residual_probability = 1
-
-                risk.residual_impact = risk.inherent_impact - sum_eff_imp
-                if risk.residual_impact < 1:
-                    risk.residual_impact = 1
-        
+            # The control is new, so assigning its collection loads nothing
+            db_obj.risks = db.query(Risk).filter(Risk.id.in_(obj_in.risk_ids)).all()
+
         db.add(db_obj)
+        db.flush()
+        # Recalculate residual risk for all linked risks in one pass
+        recompute_residual_risk(db, control_ids=[db_obj.id])
         db.commit()
         db.refresh(db_obj)
         return db_obj
@@ -51,27 +69,7 @@ class CRUDControl(CRUDBase[Control, ControlCreate, ControlUpdate]):
         update_data = obj_in.dict(exclude_unset=True)
 
         # Recalculate effectiveness if questions are provided
-        if "eff_prob_question_1" in update_data:
-            eff_prob = math.ceil(
-                (
-                    update_data["eff_prob_question_1"]
-                    + update_data["eff_prob_question_2"]
-                    + update_data["eff_prob_question_3"]
-                )
-                / 3
-            )
-            db_obj.effectiveness_probability = eff_prob
-
-        if "eff_imp_question_1" in update_data:
-            eff_imp = math.ceil(
-                (
-                    update_data["eff_imp_question_1"]
-                    + update_data["eff_imp_question_2"]
-                    + update_data["eff_imp_question_3"]
-                )
-                / 3
-            )
-            db_obj.effectiveness_impact = eff_imp
+        _apply_effectiveness_levels(db_obj, update_data)
 
         # Update other fields
         if "description" in update_data:
@@ -81,25 +79,18 @@ class CRUDControl(CRUDBase[Control, ControlCreate, ControlUpdate]):
         if "assigned_to_id" in update_data:
             db_obj.assigned_to_id = update_data["assigned_to_id"]
 
-        # Update associated risks
+        # Update associated risks; unlinked risks need recalculation too
+        unlinked_risk_ids = []
         if "risk_ids" in update_data:
+            unlinked_risk_ids = [r.id for r in db_obj.risks]
             risks = db.query(Risk).filter(Risk.id.in_(update_data["risk_ids"])).all()
             db_obj.risks = risks
 
-        # Recalculate residual risk for all associated risks
-        for risk in db_obj.risks:
-            sum_eff_prob = sum(c.effectiveness_probability for c in risk.controls)
-            sum_eff_imp = sum(c.effectiveness_impact for c in risk.controls)
-
-            risk.residual_probability = risk.inherent_probability - sum_eff_prob
-            if risk.residual_probability < 1:
-                risk.residual_probability = 1
-
-            risk.residual_impact = risk.inherent_impact - sum_eff_imp
-            if risk.residual_impact < 1:
-                risk.residual_impact = 1
-
         db.add(db_obj)
+        # Recalculate residual risk for all associated risks in one pass
+        recompute_residual_risk(
+            db, risk_ids=unlinked_risk_ids, control_ids=[db_obj.id]
+        )
         db.commit()
         db.refresh(db_obj)
         return db_obj
@@ -107,6 +98,7 @@ class CRUDControl(CRUDBase[Control, ControlCreate, ControlUpdate]):
     def add_risk(self, db: Session, *, control_obj: Control, risk_obj: Risk) -> Control:
         if risk_obj not in control_obj.risks:
             control_obj.risks.append(risk_obj)
+            recompute_residual_risk(db, risk_ids=[risk_obj.id])
             db.commit()
             db.refresh(control_obj)
         return control_obj
@@ -114,6 +106,77 @@ class CRUDControl(CRUDBase[Control, ControlCreate, ControlUpdate]):
     def get(self, db: Session, id: int) -> Optional[Control]:
         return db.query(self.model).options(joinedload(self.model.risks)).filter(self.model.id == id).first()
 
+    def get_effectiveness_by_id(
+        self, db: Session, *, ids: Iterable[int], organization_id: int
+    ) -> Dict[int, Tuple[int, int]]:
+        """
+        Map control id -> (effectiveness_probability, effectiveness_impact) for
+        the organization's controls among `ids`, in a single column-only query.
+        """
+        ids = set(ids)
+        if not ids:
+            return {}
+        rows = db.query(
+            self.model.id, self.model.effectiveness_probability, self.model.effectiveness_impact
+        ).filter(self.model.id.in_(ids), self.model.organization_id == organization_id)
+        return {row.id: (row.effectiveness_probability, row.effectiveness_impact) for row in rows}
+
+    def _list_query(
+        self,
+        db: Session,
+        *,
+        search: Optional[str] = None,
+        filters: Optional[dict] = None,
+        fields: Optional[FieldSet] = None,
+        sort: Optional[str] = None,
+        loaders: Optional[LoaderProfile] = None,
+    ):
+        query = db.query(self.model)
+        if fields is not None:
+            query = query.options(*CONTROL_FIELDS.load_options(fields, sort))
+        elif loaders is not None:
+            query = loaders.apply(query)
+
+        if filters:
+            for key, value in filters.items():
+                query = query.filter(getattr(self.model, key) == value)
+
+        rank = None
+        if search:
+            condition, rank = search_clauses(
+                db.get_bind().dialect.name, self.model, CONTROL_SEARCH_COLUMNS, search
+            )
+            query = query.filter(condition)
+        return query, rank
+
+    def get_page(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        search: Optional[str] = None,
+        filters: Optional[dict] = None,
+        cursor: Optional[str] = None,
+        count: Optional[CountMode] = None,
+        fields: Optional[FieldSet] = None,
+        loaders: Optional[LoaderProfile] = None,
+    ) -> PageResult[Control]:
+        query, rank = self._list_query(
+            db, search=search, filters=filters, fields=fields, sort=sort, loaders=loaders
+        )
+        return paginate(
+            query,
+            self.model,
+            sort=sort,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            count=count,
+            rank=rank,
+        )
+
     def get_multi(
         self,
         db: Session,
@@ -123,15 +186,112 @@ class CRUDControl(CRUDBase[Control, ControlCreate, ControlUpdate]):
         sort: Optional[str] = None,
         search: Optional[str] = None,
         filters: Optional[dict] = None,
+        cursor: Optional[str] = None,
+    ) -> List[Control]:
+        return self.get_page(
+            db, skip=skip, limit=limit, sort=sort, search=search, filters=filters, cursor=cursor
+        ).items
+
+control = CRUDControl(Control)
+
+
+class AsyncCRUDControl(AsyncCRUDBase[Control, ControlCreate, ControlUpdate]):
+    async def get(self, db: AsyncSession, id: int) -> Optional[Control]:
+        result = await db.execute(
+            select(self.model)
+            .options(selectinload(self.model.risks))
+            .where(self.model.id == id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+
+    async def create_with_organization_and_risks(
+        self, db: AsyncSession, *, obj_in: ControlCreate, organization_id: int, owner_id: int
+    ) -> Control:
+        eff_prob = answer_level([getattr(obj_in, q) for q in EFF_PROBABILITY_QUESTIONS])
+        eff_imp = answer_level([getattr(obj_in, q) for q in EFF_IMPACT_QUESTIONS])
+
+        db_obj = Control(
+            description=obj_in.description,
+            type=obj_in.type,
+            effectiveness_probability=eff_prob,
+            effectiveness_impact=eff_imp,
+            organization_id=organization_id,
+            owner_id=owner_id,
+            assigned_to_id=obj_in.assigned_to_id,
+        )
+
+        if obj_in.risk_ids:
+            result = await db.execute(select(Risk).where(Risk.id.in_(obj_in.risk_ids)))
+            db_obj.risks = list(result.scalars().all())
+
+        db.add(db_obj)
+        await db.flush()
+        await db.run_sync(lambda session: recompute_residual_risk(session, control_ids=[db_obj.id]))
+        await db.commit()
+        return await self.get(db, id=db_obj.id)
+
+    async def update(
+        self, db: AsyncSession, *, db_obj: Control, obj_in: ControlUpdate
+    ) -> Control:
+        update_data = obj_in.dict(exclude_unset=True)
+        # Collections cannot be lazy-loaded here, so make sure `risks` is present
+        await db.refresh(db_obj, attribute_names=["risks"])
+
+        _apply_effectiveness_levels(db_obj, update_data)
+
+        if "description" in update_data:
+            db_obj.description = update_data["description"]
+        if "type" in update_data:
+            db_obj.type = update_data["type"]
+        if "assigned_to_id" in update_data:
+            db_obj.assigned_to_id = update_data["assigned_to_id"]
+
+        unlinked_risk_ids = []
+        if "risk_ids" in update_data:
+            unlinked_risk_ids = [r.id for r in db_obj.risks]
+            result = await db.execute(select(Risk).where(Risk.id.in_(update_data["risk_ids"])))
+            db_obj.risks = list(result.scalars().all())
+
+        db.add(db_obj)
+        await db.run_sync(
+            lambda session: recompute_residual_risk(
+                session, risk_ids=unlinked_risk_ids, control_ids=[db_obj.id]
+            )
+        )
+        await db.commit()
+        return await self.get(db, id=db_obj.id)
+
+    async def add_risk(self, db: AsyncSession, *, control_obj: Control, risk_obj: Risk) -> Control:
+        await db.refresh(control_obj, attribute_names=["risks"])
+        if risk_obj not in control_obj.risks:
+            control_obj.risks.append(risk_obj)
+            await db.run_sync(lambda session: recompute_residual_risk(session, risk_ids=[risk_obj.id]))
+            await db.commit()
+            control_obj = await self.get(db, id=control_obj.id)
+        return control_obj
+
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        search: Optional[str] = None,
+        filters: Optional[dict] = None,
     ) -> List[Control]:
-        query = db.query(self.model).options(joinedload(self.model.risks))
+        query = select(self.model).options(selectinload(self.model.risks))
 
         if filters:
             for key, value in filters.items():
-                query = query.filter(getattr(self.model, key) == value)
+                query = query.where(getattr(self.model, key) == value)
 
         if search:
-            query = query.filter(self.model.description.ilike(f"%{search}%"))
+            condition, _ = search_clauses(
+                db.get_bind().dialect.name, self.model, CONTROL_SEARCH_COLUMNS, search
+            )
+            query = query.where(condition)
 
         if sort:
             if sort.startswith("-"):
@@ -139,6 +299,7 @@ class CRUDControl(CRUDBase[Control, ControlCreate, ControlUpdate]):
             else:
                 query = query.order_by(getattr(self.model, sort).asc())
 
-        return query.offset(skip).limit(limit).all()
+        result = await db.execute(query.offset(skip).limit(limit))
+        return list(result.scalars().all())
 
-control = CRUDControl(Control)
\ No newline at end of file
+async_control = AsyncCRUDControl(Control)
@@ -1,12 +1,27 @@
-from typing import List, Optional, Any, Dict, Union
+from typing import List, Optional, Any, Dict, Tuple, Union
 from datetime import datetime
-from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from fastapi.encoders import jsonable_encoder
 
-from app.crud.base import CRUDBase
-from app.db.models.form import Form, Question, Option, FormSubmission, Answer, QuestionType
-from app.schemas.form import FormCreate, FormUpdate
-from app.schemas.submission import SubmissionCreate
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.crud.loaders import LoaderProfile, nested
+from app.crud.pagination import CountMode, PageResult, paginate
+from app.db.models.form import Form, Question, Option, FormSubmission, Answer, GradingStatus
+from app.schemas.form import FormCreate, FormUpdate, Option as OptionSchema, Question as QuestionSchema
+from app.schemas.submission import Answer as AnswerSchema, SubmissionCreate
+from app.services import grading
+from app.services.grading import AnswerKey
+from app.services.public_forms import public_form_cache
+
+# `schemas.Form`: the form with its questions and their options
+FORM_LIST_LOADERS = LoaderProfile(
+    nested(Form.questions, QuestionSchema, nested(Question.options, OptionSchema))
+)
+# `schemas.Submission`: the submission with its answers
+SUBMISSION_LIST_LOADERS = LoaderProfile(nested(FormSubmission.answers, AnswerSchema))
 
 class CRUDForm(CRUDBase[Form, FormCreate, FormUpdate]):
     def create_with_questions(self, db: Session, *, obj_in: FormCreate, created_by: int, organization_id: int) -> Form:
@@ -47,12 +62,31 @@ class CRUDForm(CRUDBase[Form, FormCreate, FormUpdate]):
             .all()
         )
 
+    def get_page_by_organization(
+        self,
+        db: Session,
+        *,
+        organization_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count: Optional[CountMode] = None,
+        loaders: Optional[LoaderProfile] = None,
+    ) -> PageResult[Form]:
+        query = db.query(Form).filter(Form.organization_id == organization_id)
+        if loaders is not None:
+            query = loaders.apply(query)
+        return paginate(
+            query, Form, sort=sort, skip=skip, limit=limit, cursor=cursor, count=count
+        )
+
     def update_with_questions(
         self, db: Session, *, db_obj: Form, obj_in: Union[FormUpdate, Dict[str, Any]]
     ) -> Form:
         obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
-            update_data = obj_in
+            update_data = dict(obj_in)
         else:
             update_data = obj_in.dict(exclude_unset=True)
         
@@ -66,97 +100,110 @@ class CRUDForm(CRUDBase[Form, FormCreate, FormUpdate]):
         
         # Removing 'questions' from update_data to avoid error if passed to Form(**)
         questions_data = update_data.pop("questions", None)
+        # Invalidates cached answer keys of the previous version
+        update_data["version"] = Form.version + 1
         
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        db_obj = super().update(db, db_obj=db_obj, obj_in=update_data)
+        public_form_cache.invalidate(db_obj.id)
+        return db_obj
 
 form = CRUDForm(Form)
 
 
-from fastapi import HTTPException
+def _accepted_answers(obj_in: SubmissionCreate, key: AnswerKey) -> list:
+    # Answers to questions that are not part of the form are dropped
+    answers = [a for a in obj_in.answers if a.question_id in key.questions]
+    for answer_in in answers:
+        if answer_in.selected_option_id and not key.is_valid_option(
+            answer_in.question_id, answer_in.selected_option_id
+        ):
+            raise HTTPException(status_code=400, detail=f"Option {answer_in.selected_option_id} does not belong to question {answer_in.question_id}")
+    return answers
+
+
+def _grade(
+    answers: list, key: AnswerKey, *, background: bool = False
+) -> Tuple[float, Optional[bool], str]:
+    """(score, passed, grading_status) of accepted answers; pending when `background`."""
+    if background:
+        return 0.0, None, GradingStatus.pending.value
+    score, passed = key.grade(grading.selected_options(answers))
+    return score, passed, GradingStatus.graded.value
+
 
 class CRUDSubmission(CRUDBase[FormSubmission, SubmissionCreate, SubmissionCreate]):
     def create_submission(
-        self, db: Session, *, obj_in: SubmissionCreate, form: Form
-    ) -> FormSubmission:
-        # Calculate Score
-        score = 0.0
-        total_points = 0
-        
-        # Map answers to dictionary for easier processing
-        # We need to check correctness.
-        # Retrieve full question details from DB to verify correct options
-        
-        # This is a simplified grading logic
-        passed = None
-        
-        # Create Submission Record
-        db_submission = FormSubmission(
-            form_id=form.id,
-            respondent_email=obj_in.respondent_email,
-            respondent_name=obj_in.respondent_name,
-            respondent_identifier=obj_in.respondent_identifier,
-            start_time=datetime.utcnow(), # Or passed from frontend if tracked there
-            end_time=datetime.utcnow()
-        )
-        db.add(db_submission)
-        db.flush()
+        self, db: Session, *, obj_in: SubmissionCreate, form: Form, background: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Validate against the form's cached answer key and store the submission
+        and all its answers with two INSERT .. RETURNING statements; questions
+        and options are never loaded. With `background`, the submission is
+        stored as pending and handed to `grading_queue` after the commit,
+        unless the queue has no workers: it is then graded here, so the
+        response carries the result rather than a pending status.
 
-        # Process Answers
-        if form.is_graded:
-            for q in form.questions:
-                total_points += q.points
-        
-        earned_points = 0.0
-
-        for answer_in in obj_in.answers:
-            # Find the question
-            question = next((q for q in form.questions if q.id == answer_in.question_id), None)
-            if not question:
-                continue
-            
-            # Validate option match if selected
-            if answer_in.selected_option_id:
-                valid_option = next((o for o in question.options if o.id == answer_in.selected_option_id), None)
-                if not valid_option:
-                    # Rollback logic or raise error. Since we are in a transaction (autocommit=False usually), 
-                    # raising Exception will rollback the db.add(db_submission) above if caught by FastAPI dependency
-                    raise HTTPException(status_code=400, detail=f"Option {answer_in.selected_option_id} does not belong to question {answer_in.question_id}")
-            
-            db_answer = Answer(
-                submission_id=db_submission.id,
-                question_id=answer_in.question_id,
-                text_value=answer_in.text_value,
-                selected_option_id=answer_in.selected_option_id
-            )
-            db.add(db_answer)
-            # Flush to ensure ID and relationship is established? 
-            # Not strictly needed for adding to session but good for debugging
-            
-            # Grading Logic
-            if form.is_graded and question.points > 0:
-                if question.question_type in [QuestionType.single_choice, QuestionType.multiple_choice]:
-                    # Check if selected option is correct
-                    selected_opt = next((o for o in question.options if o.id == answer_in.selected_option_id), None)
-                    if selected_opt and selected_opt.is_correct:
-                        earned_points += question.points
-        
-        if form.is_graded and total_points > 0:
-            # Scale to 0-100 or keep raw? Let's keep raw points or percentage?
-            # Requirement says "Score", let's assume percentage 0-100 or points.
-            # Let's do percentage for consistency.
-            final_score = (earned_points / total_points) * 100.0
-            db_submission.score = final_score
-            # threshold defaults to 60? Or defined in form? 
-            # Assuming 60 for now or add to Form model later.
-            db_submission.passed = final_score >= 60.0 
-        else:
-            db_submission.score = 0.0
-            db_submission.passed = None # Not graded
+        Returns the stored submission as a dict (the `Submission` schema).
+        """
+        background = background and grading.grading_queue.workers > 0
+        key = grading.get_answer_key(db, form)
+        answers = _accepted_answers(obj_in, key)
+        score, passed, status = _grade(answers, key, background=background)
 
+        now = datetime.utcnow()
+        submission_data = {
+            "form_id": form.id,
+            "respondent_email": obj_in.respondent_email,
+            "respondent_name": obj_in.respondent_name,
+            "respondent_identifier": obj_in.respondent_identifier,
+            "start_time": now,
+            "end_time": now,
+            "score": score,
+            "passed": passed,
+            "grading_status": status,
+        }
+        submission_id = db.scalar(
+            insert(FormSubmission).values(submission_data).returning(FormSubmission.id)
+        )
+        answers_data = [
+            {
+                "submission_id": submission_id,
+                "question_id": answer_in.question_id,
+                "text_value": answer_in.text_value,
+                "selected_option_id": answer_in.selected_option_id,
+            }
+            for answer_in in answers
+        ]
+        if answers_data:
+            answer_ids = db.scalars(
+                insert(Answer).returning(Answer.id, sort_by_parameter_order=True), answers_data
+            ).all()
+            for answer_data, answer_id in zip(answers_data, answer_ids):
+                answer_data["id"] = answer_id
         db.commit()
-        db.refresh(db_submission)
-        return db_submission
+        if background:
+            grading.grading_queue.enqueue(submission_id)
+        return {**submission_data, "id": submission_id, "answers": answers_data}
     
+    def get_page_by_form(
+        self,
+        db: Session,
+        *,
+        form_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count: Optional[CountMode] = None,
+        loaders: Optional[LoaderProfile] = None,
+    ) -> PageResult[FormSubmission]:
+        query = db.query(FormSubmission).filter(FormSubmission.form_id == form_id)
+        if loaders is not None:
+            query = loaders.apply(query)
+        return paginate(
+            query, FormSubmission, sort=sort, skip=skip, limit=limit, cursor=cursor, count=count
+        )
+
     def get_by_respondent(self, db: Session, *, form_id: int, identifier: str) -> List[FormSubmission]:
         return db.query(FormSubmission).filter(
             FormSubmission.form_id == form_id, 
@@ -165,3 +212,121 @@ class CRUDSubmission(CRUDBase[FormSubmission, SubmissionCreate, SubmissionCreate
 
 submission = CRUDSubmission(FormSubmission)
 
+
+class AsyncCRUDForm(AsyncCRUDBase[Form, FormCreate, FormUpdate]):
+    async def get(self, db: AsyncSession, id: int) -> Optional[Form]:
+        result = await db.execute(
+            select(Form)
+            .options(selectinload(Form.questions).selectinload(Question.options))
+            .where(Form.id == id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+
+    async def create_with_questions(
+        self, db: AsyncSession, *, obj_in: FormCreate, created_by: int, organization_id: int
+    ) -> Form:
+        obj_in_data = jsonable_encoder(obj_in)
+        questions_data = obj_in_data.pop("questions", [])
+
+        db_obj = Form(**obj_in_data, created_by=created_by, organization_id=organization_id)
+        for q_data in questions_data:
+            options_data = q_data.pop("options", [])
+            db_question = Question(**q_data)
+            for opt_data in options_data:
+                opt_data.pop("id", None)
+                db_question.options.append(Option(**opt_data))
+            db_obj.questions.append(db_question)
+
+        db.add(db_obj)
+        await db.commit()
+        return await self.get(db, id=db_obj.id)
+
+    async def get_by_access_code(self, db: AsyncSession, *, access_code: str) -> Optional[Form]:
+        result = await db.execute(select(Form).where(Form.access_code == access_code))
+        return result.scalars().first()
+
+    async def get_multi_by_organization(
+        self, db: AsyncSession, *, organization_id: int, skip: int = 0, limit: int = 100
+    ) -> List[Form]:
+        result = await db.execute(
+            select(Form)
+            .options(selectinload(Form.questions).selectinload(Question.options))
+            .where(Form.organization_id == organization_id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def update_with_questions(
+        self, db: AsyncSession, *, db_obj: Form, obj_in: Union[FormUpdate, Dict[str, Any]]
+    ) -> Form:
+        if isinstance(obj_in, dict):
+            update_data = dict(obj_in)
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        # Nested questions are not updated here, same as the sync implementation
+        update_data.pop("questions", None)
+        update_data["version"] = Form.version + 1
+        await super().update(db, db_obj=db_obj, obj_in=update_data)
+        public_form_cache.invalidate(db_obj.id)
+        return await self.get(db, id=db_obj.id)
+
+async_form = AsyncCRUDForm(Form)
+
+
+class AsyncCRUDSubmission(AsyncCRUDBase[FormSubmission, SubmissionCreate, SubmissionCreate]):
+    async def create_submission(
+        self, db: AsyncSession, *, obj_in: SubmissionCreate, form: Form
+    ) -> FormSubmission:
+        """
+        `form` must have been loaded through `async_form.get` so its questions
+        and options are available without lazy loading.
+        """
+        key = grading.answer_key_cache.get(form.id, form.version)
+        if key is None:
+            key = AnswerKey.from_form(form)
+            grading.answer_key_cache.set(key)
+        answers = _accepted_answers(obj_in, key)
+        score, passed, status = _grade(answers, key)
+        now = datetime.utcnow()
+        db_submission = FormSubmission(
+            form_id=form.id,
+            respondent_email=obj_in.respondent_email,
+            respondent_name=obj_in.respondent_name,
+            respondent_identifier=obj_in.respondent_identifier,
+            start_time=now,
+            end_time=now,
+            score=score,
+            passed=passed,
+            grading_status=status,
+            answers=[
+                Answer(
+                    question_id=answer_in.question_id,
+                    text_value=answer_in.text_value,
+                    selected_option_id=answer_in.selected_option_id,
+                )
+                for answer_in in answers
+            ],
+        )
+
+        db.add(db_submission)
+        await db.commit()
+        result = await db.execute(
+            select(FormSubmission)
+            .options(selectinload(FormSubmission.answers))
+            .where(FormSubmission.id == db_submission.id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().one()
+
+    async def get_by_respondent(self, db: AsyncSession, *, form_id: int, identifier: str) -> List[FormSubmission]:
+        result = await db.execute(
+            select(FormSubmission).where(
+                FormSubmission.form_id == form_id,
+                FormSubmission.respondent_identifier == identifier
+            )
+        )
+        return list(result.scalars().all())
+
+async_submission = AsyncCRUDSubmission(FormSubmission)
@@ -1,45 +1,65 @@
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.crud.fieldsets import FieldSet, FieldSpec
+from app.crud.loaders import LoaderProfile, nested
+from app.crud.pagination import CountMode, PageResult, paginate
+from app.db.search import search_clauses
 from app.db.models.risk import Risk
 from app.db.models.control import Control
-from app.schemas.risk import RiskCreate, RiskUpdate
-import math
+from app.schemas.control import ControlInDB
+from app.schemas.risk import RiskCreate, RiskInDB, RiskUpdate
+from app.services.residual_risk import recompute_residual_risk
+from app.services.risk_heatmap import record_risk_change, risk_cells
+from app.services.risk_scoring import answer_level, score_risk
+
+PROBABILITY_QUESTIONS = ("prob_question_1", "prob_question_2", "prob_question_3")
+IMPACT_QUESTIONS = ("imp_question_1", "imp_question_2", "imp_question_3")
+RISK_FIELDS = FieldSpec(Risk, RiskInDB, {"controls": (Control, ControlInDB)})
+# `schemas.risk.Risk`: the risk with its nested controls
+RISK_LIST_LOADERS = LoaderProfile(nested(Risk.controls, ControlInDB))
+RISK_SEARCH_COLUMNS = (Risk.process_name, Risk.risk_description)
+
+
+def _score_new_risk(obj_in: RiskCreate, controls: List[Control]):
+    return score_risk(
+        [getattr(obj_in, q) for q in PROBABILITY_QUESTIONS],
+        [getattr(obj_in, q) for q in IMPACT_QUESTIONS],
+        sum(c.effectiveness_probability for c in controls),
+        sum(c.effectiveness_impact for c in controls),
+    )
+
+
+def _apply_inherent_levels(db_obj: Risk, update_data: dict) -> None:
+    if "prob_question_1" in update_data:
+        db_obj.inherent_probability = answer_level(
+            [update_data[q] for q in PROBABILITY_QUESTIONS]
+        )
+    if "imp_question_1" in update_data:
+        db_obj.inherent_impact = answer_level(
+            [update_data[q] for q in IMPACT_QUESTIONS]
+        )
+
 
 class CRUDRisk(CRUDBase[Risk, RiskCreate, RiskUpdate]):
     def create_with_organization_and_owner(
         self, db: Session, *, obj_in: RiskCreate, organization_id: int, owner_id: int
     ) -> Risk:
-        # Calculate inherent probability and impact
-        inherent_probability = math.ceil((obj_in.prob_question_1 + obj_in.prob_question_2 + obj_in.prob_question_3) / 3)
-        inherent_impact = math.ceil((obj_in.imp_question_1 + obj_in.imp_question_2 + obj_in.imp_question_3) / 3)
-
-        residual_probability = inherent_probability
-        residual_impact = inherent_impact
-        
         controls = []
         if obj_in.control_ids:
             controls = db.query(Control).filter(Control.id.in_(obj_in.control_ids)).all()
-            
-            sum_eff_prob = sum(c.effectiveness_probability for c in controls)
-            sum_eff_imp = sum(c.effectiveness_impact for c in controls)
-
-            residual_probability = inherent_probability - sum_eff_prob
-            if residual_probability < 1:
-                residual_probability = 1
-
-            residual_impact = inherent_impact - sum_eff_imp
-            if residual_impact < 1:
-                residual_impact = 1
 
+        score = _score_new_risk(obj_in, controls)
         db_obj = Risk(
             process_name=obj_in.process_name,
             risk_description=obj_in.risk_description,
             area_id=obj_in.area_id,
-            inherent_probability=inherent_probability,
-            inherent_impact=inherent_impact,
-            residual_probability=residual_probability,
-            residual_impact=residual_impact,
+            inherent_probability=score.inherent_probability,
+            inherent_impact=score.inherent_impact,
+            residual_probability=score.residual_probability,
+            residual_impact=score.residual_impact,
             organization_id=organization_id,
             owner_id=owner_id,
             assigned_to_id=obj_in.assigned_to_id,
@@ -48,6 +68,7 @@ class CRUDRisk(CRUDBase[Risk, RiskCreate, RiskUpdate]):
         db_obj.controls.extend(controls)
         
         db.add(db_obj)
+        record_risk_change(db, [], risk_cells(db_obj))
         db.commit()
         db.refresh(db_obj)
         return db_obj
@@ -56,48 +77,20 @@ class CRUDRisk(CRUDBase[Risk, RiskCreate, RiskUpdate]):
         self, db: Session, *, db_obj: Risk, obj_in: RiskUpdate
     ) -> Risk:
         update_data = obj_in.dict(exclude_unset=True)
+        cells = risk_cells(db_obj)
 
         # Recalculate inherent probability and impact if questions are provided
-        if "prob_question_1" in update_data:
-            inherent_probability = math.ceil(
-                (
-                    update_data["prob_question_1"]
-                    + update_data["prob_question_2"]
-                    + update_data["prob_question_3"]
-                )
-                / 3
-            )
-            db_obj.inherent_probability = inherent_probability
-
-        if "imp_question_1" in update_data:
-            inherent_impact = math.ceil(
-                (
-                    update_data["imp_question_1"]
-                    + update_data["imp_question_2"]
-                    + update_data["imp_question_3"]
-                )
-                / 3
-            )
-            db_obj.inherent_impact = inherent_impact
+        _apply_inherent_levels(db_obj, update_data)
 
         # Update other fields
         for field in update_data:
             if hasattr(db_obj, field):
                 setattr(db_obj, field, update_data[field])
 
-        # Recalculate residual risk
-        sum_eff_prob = sum(c.effectiveness_probability for c in db_obj.controls)
-        sum_eff_imp = sum(c.effectiveness_impact for c in db_obj.controls)
-
-        db_obj.residual_probability = db_obj.inherent_probability - sum_eff_prob
-        if db_obj.residual_probability < 1:
-            db_obj.residual_probability = 1
-
-        db_obj.residual_impact = db_obj.inherent_impact - sum_eff_imp
-        if db_obj.residual_impact < 1:
-            db_obj.residual_impact = 1
-
         db.add(db_obj)
+        record_risk_change(db, cells, risk_cells(db_obj))
+        # Recalculate residual risk
+        recompute_residual_risk(db, risk_ids=[db_obj.id])
         db.commit()
         db.refresh(db_obj)
         return db_obj
@@ -109,21 +102,74 @@ class CRUDRisk(CRUDBase[Risk, RiskCreate, RiskUpdate]):
             risk_obj.controls.append(control_obj)
 
             # Recalculate residual risk
-            sum_eff_prob = sum(c.effectiveness_probability for c in risk_obj.controls)
-            sum_eff_imp = sum(c.effectiveness_impact for c in risk_obj.controls)
-
-            risk_obj.residual_probability = risk_obj.inherent_probability - sum_eff_prob
-            if risk_obj.residual_probability < 1:
-                risk_obj.residual_probability = 1
-
-            risk_obj.residual_impact = risk_obj.inherent_impact - sum_eff_imp
-            if risk_obj.residual_impact < 1:
-                risk_obj.residual_impact = 1
-
+            recompute_residual_risk(db, risk_ids=[risk_obj.id])
             db.commit()
             db.refresh(risk_obj)
         return risk_obj
 
+    def remove(self, db: Session, *, id: int) -> Risk:
+        obj = db.query(self.model).get(id)
+        record_risk_change(db, risk_cells(obj), [])
+        db.delete(obj)
+        db.commit()
+        return obj
+
+    def _list_query(
+        self,
+        db: Session,
+        *,
+        search: Optional[str] = None,
+        filters: Optional[dict] = None,
+        fields: Optional[FieldSet] = None,
+        sort: Optional[str] = None,
+        loaders: Optional[LoaderProfile] = None,
+    ):
+        query = db.query(self.model)
+        if fields is not None:
+            query = query.options(*RISK_FIELDS.load_options(fields, sort))
+        elif loaders is not None:
+            query = loaders.apply(query)
+
+        if filters:
+            for key, value in filters.items():
+                query = query.filter(getattr(self.model, key) == value)
+
+        rank = None
+        if search:
+            condition, rank = search_clauses(
+                db.get_bind().dialect.name, self.model, RISK_SEARCH_COLUMNS, search
+            )
+            query = query.filter(condition)
+        return query, rank
+
+    def get_page(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        search: Optional[str] = None,
+        filters: Optional[dict] = None,
+        cursor: Optional[str] = None,
+        count: Optional[CountMode] = None,
+        fields: Optional[FieldSet] = None,
+        loaders: Optional[LoaderProfile] = None,
+    ) -> PageResult[Risk]:
+        query, rank = self._list_query(
+            db, search=search, filters=filters, fields=fields, sort=sort, loaders=loaders
+        )
+        return paginate(
+            query,
+            self.model,
+            sort=sort,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            count=count,
+            rank=rank,
+        )
+
     def get_multi(
         self,
         db: Session,
@@ -133,18 +179,112 @@ class CRUDRisk(CRUDBase[Risk, RiskCreate, RiskUpdate]):
         sort: Optional[str] = None,
         search: Optional[str] = None,
         filters: Optional[dict] = None,
+        cursor: Optional[str] = None,
     ) -> List[Risk]:
-        query = db.query(self.model)
+        return self.get_page(
+            db, skip=skip, limit=limit, sort=sort, search=search, filters=filters, cursor=cursor
+        ).items
+
+risk = CRUDRisk(Risk)
+
+
+class AsyncCRUDRisk(AsyncCRUDBase[Risk, RiskCreate, RiskUpdate]):
+    async def get(self, db: AsyncSession, id: int) -> Optional[Risk]:
+        result = await db.execute(
+            select(self.model)
+            .options(selectinload(self.model.controls))
+            .where(self.model.id == id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+
+    async def create_with_organization_and_owner(
+        self, db: AsyncSession, *, obj_in: RiskCreate, organization_id: int, owner_id: int
+    ) -> Risk:
+        controls = []
+        if obj_in.control_ids:
+            result = await db.execute(select(Control).where(Control.id.in_(obj_in.control_ids)))
+            controls = list(result.scalars().all())
+
+        score = _score_new_risk(obj_in, controls)
+        db_obj = Risk(
+            process_name=obj_in.process_name,
+            risk_description=obj_in.risk_description,
+            area_id=obj_in.area_id,
+            inherent_probability=score.inherent_probability,
+            inherent_impact=score.inherent_impact,
+            residual_probability=score.residual_probability,
+            residual_impact=score.residual_impact,
+            organization_id=organization_id,
+            owner_id=owner_id,
+            assigned_to_id=obj_in.assigned_to_id,
+        )
+        db_obj.controls.extend(controls)
+
+        db.add(db_obj)
+        await db.run_sync(lambda session: record_risk_change(session, [], risk_cells(db_obj)))
+        await db.commit()
+        return await self.get(db, id=db_obj.id)
+
+    async def update(
+        self, db: AsyncSession, *, db_obj: Risk, obj_in: RiskUpdate
+    ) -> Risk:
+        update_data = obj_in.dict(exclude_unset=True)
+        # Collections cannot be lazy-loaded here, so make sure `controls` is present
+        await db.refresh(db_obj, attribute_names=["controls"])
+        cells = risk_cells(db_obj)
+
+        _apply_inherent_levels(db_obj, update_data)
+
+        for field in update_data:
+            if field in self.model.__table__.columns:
+                setattr(db_obj, field, update_data[field])
+
+        db.add(db_obj)
+        await db.run_sync(lambda session: record_risk_change(session, cells, risk_cells(db_obj)))
+        await db.run_sync(lambda session: recompute_residual_risk(session, risk_ids=[db_obj.id]))
+        await db.commit()
+        return await self.get(db, id=db_obj.id)
+
+    async def add_control(
+        self, db: AsyncSession, *, risk_obj: Risk, control_obj: Control
+    ) -> Risk:
+        await db.refresh(risk_obj, attribute_names=["controls"])
+        if control_obj not in risk_obj.controls:
+            risk_obj.controls.append(control_obj)
+            await db.run_sync(lambda session: recompute_residual_risk(session, risk_ids=[risk_obj.id]))
+            await db.commit()
+            risk_obj = await self.get(db, id=risk_obj.id)
+        return risk_obj
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Risk:
+        obj = await db.get(self.model, id)
+        await db.run_sync(lambda session: record_risk_change(session, risk_cells(obj), []))
+        await db.delete(obj)
+        await db.commit()
+        return obj
+
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        search: Optional[str] = None,
+        filters: Optional[dict] = None,
+    ) -> List[Risk]:
+        query = select(self.model).options(selectinload(self.model.controls))
 
         if filters:
             for key, value in filters.items():
-                query = query.filter(getattr(self.model, key) == value)
+                query = query.where(getattr(self.model, key) == value)
 
         if search:
-            query = query.filter(
-                self.model.process_name.ilike(f"%{search}%") |
-                self.model.risk_description.ilike(f"%{search}%")
+            condition, _ = search_clauses(
+                db.get_bind().dialect.name, self.model, RISK_SEARCH_COLUMNS, search
             )
+            query = query.where(condition)
 
         if sort:
             if sort.startswith("-"):
@@ -152,6 +292,7 @@ class CRUDRisk(CRUDBase[Risk, RiskCreate, RiskUpdate]):
             else:
                 query = query.order_by(getattr(self.model, sort).asc())
 
-        return query.offset(skip).limit(limit).all()
+        result = await db.execute(query.offset(skip).limit(limit))
+        return list(result.scalars().all())
 
-risk = CRUDRisk(Risk)
\ No newline at end of file
+async_risk = AsyncCRUDRisk(Risk)
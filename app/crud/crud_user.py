@@ -2,8 +2,10 @@ from typing import Any, Dict, List, Optional, Union
 
 from sqlalchemy.orm import Session
 
-from app.core.security import get_password_hash, verify_password
+from app.core.auth import principal_cache
+from app.core.security import get_password_hash, verify_and_update_password
 from app.crud.base import CRUDBase
+from app.crud.pagination import CountMode, PageResult, paginate
 from app.db.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
@@ -23,6 +25,22 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             .all()
         )
 
+    def get_page_by_organization(
+        self,
+        db: Session,
+        *,
+        organization_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        sort: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count: Optional[CountMode] = None,
+    ) -> PageResult[User]:
+        query = db.query(self.model).filter(self.model.organization_id == organization_id)
+        return paginate(
+            query, self.model, sort=sort, skip=skip, limit=limit, cursor=cursor, count=count
+        )
+
     def create(self, db: Session, *, obj_in: UserCreate) -> User:
         role_name = obj_in.role or "user"
 
@@ -52,15 +70,24 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             del update_data["password"]
             update_data["password_hash"] = hashed_password
 
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        db_obj = super().update(db, db_obj=db_obj, obj_in=update_data)
+        principal_cache.invalidate(db_obj.id)
+        return db_obj
+
     def authenticate(
         self, db: Session, *, email: str, password: str
     ) -> Optional[User]:
         user = self.get_by_email(db, email=email)
         if not user:
             return None
-        if not verify_password(password, user.password_hash):
+        valid, new_hash = verify_and_update_password(password, user.password_hash)
+        if not valid:
             return None
+        if new_hash:
+            # BCRYPT_ROUNDS changed since this hash was made
+            user.password_hash = new_hash
+            db.add(user)
+            db.commit()
         return user
 
     def remove(self, db: Session, *, id: int) -> User:
@@ -70,6 +97,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             db.add(obj)
             db.commit()
             db.refresh(obj)
+            principal_cache.invalidate(obj.id)
         return obj
 
 
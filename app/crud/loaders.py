@@ -0,0 +1,65 @@
+"""
+Loader profiles: how relationships are loaded for one response shape.
+
+List endpoints pass the profile matching their response schema to the CRUD
+layer. Collections are loaded with `selectinload`: one extra `IN` query per
+relationship whatever the page size, with no row duplication under `LIMIT`
+as with `joinedload`. Nested objects only load the columns their schema
+serializes, and any other relationship raises instead of lazy-loading
+once per row.
+"""
+from typing import Any, FrozenSet, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Query, raiseload, selectinload
+
+
+def schema_columns(model: Any, schema: Type[BaseModel]) -> FrozenSet[str]:
+    """Names of the table columns of `model` that `schema` serializes."""
+    return frozenset(name for name in schema.model_fields if name in model.__table__.columns)
+
+
+class NestedLoad:
+    def __init__(
+        self, relationship: Any, schema: Type[BaseModel], children: Tuple["NestedLoad", ...]
+    ) -> None:
+        self.relationship = relationship
+        self.schema = schema
+        self.children = children
+
+    def build(self) -> Any:
+        target = self.relationship.property.mapper.class_
+        columns = sorted(schema_columns(target, self.schema))
+        option = selectinload(self.relationship).load_only(
+            *(getattr(target, name) for name in columns), raiseload=True
+        )
+        return option.options(*(child.build() for child in self.children), raiseload("*"))
+
+
+def nested(relationship: Any, schema: Type[BaseModel], *children: NestedLoad) -> NestedLoad:
+    """
+    `selectinload` of a collection restricted to the columns of `schema`;
+    `children` are `nested` loads of the relationships of the nested objects.
+    """
+    return NestedLoad(relationship, schema, children)
+
+
+class LoaderProfile:
+    """
+    Loader options for one response shape. They are built on first use:
+    resolving the relationships configures the mappers, which must not
+    happen while the CRUD modules are still being imported.
+    """
+
+    def __init__(self, *loads: NestedLoad) -> None:
+        self.loads = loads
+        self._options: Optional[Tuple[Any, ...]] = None
+
+    @property
+    def options(self) -> Tuple[Any, ...]:
+        if self._options is None:
+            self._options = tuple(load.build() for load in self.loads) + (raiseload("*"),)
+        return self._options
+
+    def apply(self, query: Query) -> Query:
+        return query.options(*self.options)
@@ -0,0 +1,243 @@
+"""
+Offset and keyset (cursor) pagination for CRUD list queries.
+
+A cursor encodes the active sort key plus the values of the sort column and
+`id` of the last row returned. The next page is fetched with a range
+predicate on `(sort column, id)` instead of `OFFSET`, so deep pages cost the
+same as the first one when an index covers the sort.
+
+Totals are opt-in per request (`count`): "exact" runs a COUNT over the
+filtered query, "estimated" reads the row estimate from the PostgreSQL
+planner without touching the table, and "auto" only pays for the exact count
+when the estimate is below `PAGINATION_EXACT_COUNT_THRESHOLD`.
+
+Search results (see `app.db.search`) without an explicit `sort` are ordered
+by relevance; their cursors carry the rank of the last row instead of a
+column value.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, Generic, List, Literal, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import Date, DateTime, and_, or_
+from sqlalchemy.orm import Query
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+RANK_SORT = "rank"
+
+CountMode = Literal["exact", "estimated", "auto"]
+
+
+@dataclass
+class PageResult(Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+    total: Optional[int] = None
+    total_estimated: bool = False
+
+    def envelope(self, items: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """Body for `schemas.Page`; `items` overrides the ORM rows if given."""
+        return {
+            "items": self.items if items is None else items,
+            "next_cursor": self.next_cursor,
+            "has_more": self.has_more,
+            "total": self.total,
+            "total_estimated": self.total_estimated,
+        }
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor"
+    )
+
+
+def encode_cursor(sort: str, value: Any, id: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    payload = json.dumps([sort, value, id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Any, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort, value, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, TypeError):
+        raise _invalid_cursor()
+    return sort, value, id
+
+
+def sort_column(model: Any, sort: Optional[str]) -> Tuple[Any, bool]:
+    """Resolve `sort` ("name" or "-name") into (column, descending)."""
+    if not sort:
+        return model.id, False
+    descending = sort.startswith("-")
+    name = sort.lstrip("-")
+    if name not in model.__table__.columns:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid sort field: {name}"
+        )
+    return getattr(model, name), descending
+
+
+def _coerce(column: Any, value: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        if isinstance(column.type, DateTime):
+            return datetime.fromisoformat(value)
+        if isinstance(column.type, Date):
+            return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise _invalid_cursor()
+    return value
+
+
+def apply_sort(query: Query, model: Any, sort: Optional[str]) -> Query:
+    column, descending = sort_column(model, sort)
+    nullable = column is not model.id and column.nullable
+    ordering = column.desc() if descending else column.asc()
+    if nullable:
+        ordering = ordering.nulls_last()
+    query = query.order_by(ordering)
+    if column is not model.id:
+        query = query.order_by(model.id.desc() if descending else model.id.asc())
+    return query
+
+
+def apply_keyset(query: Query, model: Any, sort: Optional[str], cursor: str) -> Query:
+    cursor_sort, value, last_id = decode_cursor(cursor)
+    if cursor_sort != (sort or ""):
+        raise _invalid_cursor()
+    column, descending = sort_column(model, sort)
+    after_id = model.id < last_id if descending else model.id > last_id
+    if column is model.id:
+        return query.filter(after_id)
+
+    value = _coerce(column, value)
+    nullable = column.nullable
+    if value is None:
+        # Already inside the trailing NULL block
+        return query.filter(column.is_(None), after_id)
+    after_value = column < value if descending else column > value
+    condition = or_(after_value, and_(column == value, after_id))
+    if nullable:
+        condition = or_(condition, column.is_(None))
+    return query.filter(condition)
+
+
+def exact_count(query: Query) -> int:
+    return query.order_by(None).count()
+
+
+def explain_statement(query: Query, dialect: Any) -> Tuple[str, Dict[str, Any]]:
+    """`EXPLAIN` SQL and parameters for the unordered `query`, for the driver."""
+    # render_postcompile expands IN lists into one parameter per value; the
+    # plain string would keep a literal __[POSTCOMPILE_...] placeholder.
+    compiled = query.order_by(None).statement.compile(
+        dialect=dialect, compile_kwargs={"render_postcompile": True}
+    )
+    return "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params
+
+
+def estimated_count(query: Query) -> Optional[int]:
+    """
+    Planner row estimate for `query` on PostgreSQL, `None` elsewhere.
+
+    Only runs `EXPLAIN`, so the cost does not grow with the table; accuracy
+    depends on how fresh the statistics are (ANALYZE / autovacuum).
+    """
+    session = query.session
+    bind = session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    statement, parameters = explain_statement(query, bind.dialect)
+    plan = session.connection().exec_driver_sql(statement, parameters).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(query: Query, mode: CountMode) -> Tuple[int, bool]:
+    """Return (total, is_estimate) for the filtered, unpaginated `query`."""
+    if mode != "exact":
+        estimate = estimated_count(query)
+        if estimate is not None and (
+            mode == "estimated" or estimate >= settings.PAGINATION_EXACT_COUNT_THRESHOLD
+        ):
+            return estimate, True
+    return exact_count(query), False
+
+
+def apply_rank(query: Query, model: Any, rank: Any, cursor: Optional[str]) -> Query:
+    """Order by `rank` (best first, then `id`) and select it as a second column."""
+    query = query.add_columns(rank.label("search_rank")).order_by(
+        rank.desc(), model.id.asc()
+    )
+    if cursor:
+        cursor_sort, value, last_id = decode_cursor(cursor)
+        if cursor_sort != RANK_SORT or not isinstance(value, (int, float)):
+            raise _invalid_cursor()
+        query = query.filter(or_(rank < value, and_(rank == value, model.id > last_id)))
+    return query
+
+
+def paginate(
+    query: Query,
+    model: Any,
+    *,
+    sort: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
+    rank: Any = None,
+) -> PageResult:
+    """
+    Order `query` by `sort` (with `id` as tie-breaker) and return one page.
+
+    With a non-empty `cursor` the page starts right after the cursor's row and
+    `skip` is ignored; otherwise `skip`/`limit` apply as before. One extra row
+    is fetched to know whether another page exists. `count` adds the total
+    of the filtered query (see module docstring); it is skipped otherwise.
+    A `rank` expression orders by relevance when no `sort` is given.
+    """
+    total, total_estimated = count_rows(query, count) if count else (None, False)
+    ranked = rank is not None and not sort
+    if ranked:
+        query = apply_rank(query, model, rank, cursor)
+    else:
+        query = apply_sort(query, model, sort)
+        if cursor:
+            query = apply_keyset(query, model, sort, cursor)
+    if skip and not cursor:
+        query = query.offset(skip)
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [row[0] for row in rows] if ranked else rows
+    next_cursor = None
+    if has_more and rows:
+        if ranked:
+            last, last_rank = rows[-1]
+            next_cursor = encode_cursor(RANK_SORT, last_rank, last.id)
+        else:
+            column, _ = sort_column(model, sort)
+            last = rows[-1]
+            next_cursor = encode_cursor(sort or "", getattr(last, column.key), last.id)
+    return PageResult(
+        items=items,
+        next_cursor=next_cursor,
+        has_more=has_more,
+        total=total,
+        total_estimated=total_estimated,
+    )
@@ -8,4 +8,5 @@ from app.db.models.control import Control
 from app.db.models.risk_control import risk_controls
 from app.db.models.activity_log import ActivityLog
 from app.db.models.area import Area
-from app.db.models.form import Form, Question, Option, FormSubmission, Answer
\ No newline at end of file
+from app.db.models.form import Form, Question, Option, FormSubmission, Answer
+from app.db.models.risk_heatmap import RiskHeatmapCell
\ No newline at end of file
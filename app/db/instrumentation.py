@@ -0,0 +1,103 @@
+"""
+Per-request SQL statistics from engine and mapper events.
+
+`install()` registers process-wide listeners on every `Engine` (sync and the
+sync side of async engines) and every mapper. They only record while a
+`RequestStats` is active in the current context (see `track`), so code
+outside a request (workers, scripts) pays one context-variable lookup per
+statement and nothing else.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Mapper
+
+# Slowest statements are reported truncated to this many characters
+MAX_STATEMENT_LENGTH = 500
+
+_START_KEY = "instrumentation_query_start"
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: Optional[str] = None
+    objects_loaded: int = 0
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.db_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = " ".join(statement.split())[:MAX_STATEMENT_LENGTH]
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_sql_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+@contextmanager
+def track() -> Iterator[RequestStats]:
+    """
+    Record statements in a fresh `RequestStats` for the duration of the block.
+
+    The stats object is mutated in place, so statements run in worker threads
+    that inherited this context (sync endpoints, `run_in_threadpool`) count too.
+    """
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    starts = conn.info.get(_START_KEY)
+    if stats is None or not starts:
+        return
+    stats.record(statement, time.perf_counter() - starts.pop())
+
+
+def _handle_error(exception_context: Any) -> None:
+    conn = exception_context.connection
+    starts = conn.info.get(_START_KEY) if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+def _on_load(target: Any, context: Any) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.objects_loaded += 1
+
+
+_installed = False
+
+
+def install() -> None:
+    """Register the listeners; calling it again is a no-op."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    event.listen(Mapper, "load", _on_load)
+    _installed = True
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
@@ -9,4 +9,6 @@ class Area(Base):
     name = Column(String(255), nullable=False, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
 
-    organization = relationship("Organization")
\ No newline at end of file
+    organization = relationship("Organization")
+
+    __table_args__ = (Index("ix_areas_organization_id_id", "organization_id", "id"),)
\ No newline at end of file
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 from app.db.models.risk_control import risk_controls
+from app.db.search import register_sqlite_fts
 
 class Control(Base):
     __tablename__ = "controls"
@@ -25,4 +26,10 @@ class Control(Base):
     assigned_to = relationship("User", foreign_keys=[assigned_to_id])
     risks = relationship("Risk", secondary=risk_controls, back_populates="controls")
 
-    __table_args__ = (UniqueConstraint('organization_id', 'control_code', name='_organization_control_code_uc'),)
\ No newline at end of file
+    __table_args__ = (
+        UniqueConstraint('organization_id', 'control_code', name='_organization_control_code_uc'),
+        Index('ix_controls_organization_id_id', 'organization_id', 'id'),
+    )
+
+
+register_sqlite_fts(Control.__table__, ["control_code", "description"])
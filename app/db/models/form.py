@@ -1,10 +1,15 @@
-from sqlalchemy import Boolean, Column, Integer, String, Text, ForeignKey, DateTime, Enum, Float
+from sqlalchemy import Boolean, Column, Integer, String, Text, ForeignKey, DateTime, Enum, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 
 from app.db.base_class import Base
 
+class GradingStatus(str, enum.Enum):
+    pending = "pending"
+    graded = "graded"
+    failed = "failed"
+
 class QuestionType(str, enum.Enum):
     text = "text"
     single_choice = "single_choice"
@@ -27,6 +32,8 @@ class Form(Base):
     organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped on every update; keys cached answer keys
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     # Relationships
     organization = relationship("Organization", backref="forms")
@@ -34,11 +41,13 @@ class Form(Base):
     questions = relationship("Question", back_populates="form", cascade="all, delete-orphan")
     submissions = relationship("FormSubmission", back_populates="form", cascade="all, delete-orphan")
 
+    __table_args__ = (Index("ix_forms_organization_id_id", "organization_id", "id"),)
+
 class Question(Base):
     __tablename__ = "questions"
 
     id = Column(Integer, primary_key=True, index=True)
-    form_id = Column(Integer, ForeignKey("forms.id"), nullable=False)
+    form_id = Column(Integer, ForeignKey("forms.id"), nullable=False, index=True)
     text = Column(String, nullable=False)
     question_type = Column(Enum(QuestionType), nullable=False)
     points = Column(Integer, default=0)
@@ -53,7 +62,7 @@ class Option(Base):
     __tablename__ = "options"
 
     id = Column(Integer, primary_key=True, index=True)
-    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False, index=True)
     text = Column(String, nullable=False)
     is_correct = Column(Boolean, default=False)
 
@@ -72,17 +81,32 @@ class FormSubmission(Base):
     end_time = Column(DateTime(timezone=True), nullable=True)
     score = Column(Float, default=0.0)
     passed = Column(Boolean, nullable=True)
+    # pending while queued for background grading
+    grading_status = Column(
+        String(16), nullable=False, default=GradingStatus.graded.value, server_default="graded"
+    )
 
     # Relationships
     form = relationship("Form", back_populates="submissions")
     answers = relationship("Answer", back_populates="submission", cascade="all, delete-orphan")
 
+    # form_id leads so it also serves plain lookups by form
+    __table_args__ = (
+        Index(
+            "ix_form_submissions_form_id_respondent_identifier",
+            "form_id",
+            "respondent_identifier",
+        ),
+        # Submission pages and stats of one form, ordered by id
+        Index("ix_form_submissions_form_id_id", "form_id", "id"),
+    )
+
 class Answer(Base):
     __tablename__ = "answers"
 
     id = Column(Integer, primary_key=True, index=True)
-    submission_id = Column(Integer, ForeignKey("form_submissions.id"), nullable=False)
-    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    submission_id = Column(Integer, ForeignKey("form_submissions.id"), nullable=False, index=True)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False, index=True)
     text_value = Column(Text, nullable=True)
     selected_option_id = Column(Integer, ForeignKey("options.id"), nullable=True)
 
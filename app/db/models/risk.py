@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 from app.db.models.risk_control import risk_controls
+from app.db.search import register_sqlite_fts
 
 class Risk(Base):
     __tablename__ = "risks"
@@ -26,4 +27,9 @@ class Risk(Base):
     owner = relationship("User", foreign_keys=[owner_id])
     assigned_to = relationship("User", foreign_keys=[assigned_to_id])
     area = relationship("Area")
-    controls = relationship("Control", secondary=risk_controls, back_populates="risks")
\ No newline at end of file
+    controls = relationship("Control", secondary=risk_controls, back_populates="risks")
+
+    __table_args__ = (Index("ix_risks_organization_id_id", "organization_id", "id"),)
+
+
+register_sqlite_fts(Risk.__table__, ["process_name", "risk_description"])
@@ -5,5 +5,11 @@ risk_controls = Table(
     "risk_controls",
     Base.metadata,
     Column("risk_id", Integer, ForeignKey("risks.id", ondelete="CASCADE"), primary_key=True),
-    Column("control_id", Integer, ForeignKey("controls.id", ondelete="CASCADE"), primary_key=True),
+    Column(
+        "control_id",
+        Integer,
+        ForeignKey("controls.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,  # the primary key only serves lookups by risk_id
+    ),
 )
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, ForeignKey, Integer, String
+from app.db.base_class import Base
+
+INHERENT = "inherent"
+RESIDUAL = "residual"
+
+
+class RiskHeatmapCell(Base):
+    """
+    Risk counts per (probability, impact) cell for one area, maintained by
+    `app.services.risk_heatmap`.
+    """
+    __tablename__ = "risk_heatmap_cells"
+
+    organization_id = Column(
+        Integer, ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+    area_id = Column(Integer, ForeignKey("areas.id", ondelete="CASCADE"), primary_key=True)
+    kind = Column(String(16), primary_key=True)  # INHERENT or RESIDUAL
+    probability = Column(Integer, primary_key=True)
+    impact = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 from app.db.models.role import user_roles
@@ -17,4 +17,6 @@ class User(Base):
     is_superuser = Column(Boolean(), default=False)
     
     roles = relationship("Role", secondary=user_roles, back_populates="users")
-    organization = relationship("Organization")
\ No newline at end of file
+    organization = relationship("Organization")
+
+    __table_args__ = (Index("ix_users_organization_id_id", "organization_id", "id"),)
\ No newline at end of file
@@ -0,0 +1,138 @@
+import time
+from typing import Any, Dict, Optional, Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import Pool
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram
+
+
+class PoolMetrics:
+    """
+    Connection pool statistics for one engine.
+
+    Gauges (checked out, overflow, idle) are read from the live pool on each
+    `snapshot`, counters and the checkout latency histogram are fed by the
+    instrumented pool class and pool events.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.checkout_latency = Histogram()
+        self.checkout_timeouts = Counter()
+        self.connects = Counter()
+        self.invalidations = Counter()
+        self.idle_pings = Counter()
+        self._engine: Optional[Engine] = None
+
+    def attach(self, engine: Engine) -> None:
+        self._engine = engine
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection: Any, connection_record: Any) -> None:
+        self.connects.inc()
+
+    def _on_invalidate(self, dbapi_connection: Any, connection_record: Any, exception: Any) -> None:
+        self.invalidations.inc()
+
+    def snapshot(self) -> Dict[str, Any]:
+        pool = self._engine.pool if self._engine is not None else None
+        gauges: Dict[str, Any] = {}
+        if pool is not None and hasattr(pool, "checkedout"):
+            gauges = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            }
+        return {
+            "name": self.name,
+            **gauges,
+            "connects": self.connects.value,
+            "invalidations": self.invalidations.value,
+            "idle_pings": self.idle_pings.value,
+            "checkout_timeouts": self.checkout_timeouts.value,
+            "checkout_wait_seconds": self.checkout_latency.sum,
+            "checkout_latency": self.checkout_latency.snapshot(),
+        }
+
+
+def instrumented_pool_class(base: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """
+    Subclass `base` so every checkout is timed into `metrics`.
+
+    A class attribute is used instead of instance state because
+    `Pool.recreate()` (engine.dispose(), invalidation) builds a fresh
+    instance from `self.__class__`.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return base._do_get(self)
+        except exc.TimeoutError:
+            metrics.checkout_timeouts.inc()
+            raise
+        finally:
+            metrics.checkout_latency.observe(time.perf_counter() - start)
+
+    return type(f"Instrumented{base.__name__}", (base,), {"_do_get": _do_get})
+
+
+def install_idle_ping(engine: Engine, idle_seconds: float, metrics: Optional[PoolMetrics] = None) -> None:
+    """
+    Cheaper alternative to `pool_pre_ping`.
+
+    Only connections that sat idle in the pool for longer than `idle_seconds`
+    are pinged on checkout; hot connections are handed out without the extra
+    round trip. A failed ping raises DisconnectionError, which makes the pool
+    discard the connection and retry with a fresh one.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        connection_record.info["last_checkin"] = time.monotonic()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        connection_record.info["last_checkin"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        last_checkin = connection_record.info.get("last_checkin")
+        if last_checkin is None or time.monotonic() - last_checkin < idle_seconds:
+            return
+        if metrics is not None:
+            metrics.idle_pings.inc()
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception as e:
+            raise exc.DisconnectionError() from e
+        finally:
+            cursor.close()
+
+
+def engine_options(url: str, pool_class: Optional[Type[Pool]] = None) -> Dict[str, Any]:
+    """
+    `create_engine` keyword arguments derived from Settings.
+
+    SQLite (tests, local tooling) keeps SQLAlchemy's default pool because its
+    Singleton/NullPool implementations reject the sizing arguments.
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    options: Dict[str, Any] = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+    }
+    if pool_class is not None:
+        options["poolclass"] = pool_class
+    return options
@@ -0,0 +1,147 @@
+"""
+Indexed text search for list endpoints.
+
+`?search=` keeps its substring, case-insensitive semantics on every backend,
+but is answered from an index instead of a sequential scan:
+
+* PostgreSQL: `pg_trgm` GIN indexes make `ILIKE '%term%'` indexable, and a
+  generated `search_vector` tsvector column (GIN indexed) adds word matches
+  and the relevance rank. Both are created by the
+  `f1c2a7d9b3e4_add_search_indexes` migration and are not mapped on the
+  models.
+* SQLite (tests, local development): an FTS5 external-content table using the
+  trigram tokenizer mirrors the searched columns and is kept in sync by
+  triggers. It is created together with the table by `create_all`, and by
+  the same migration for databases built with `alembic upgrade`.
+
+Terms shorter than three characters cannot use trigrams and fall back to a
+plain `ILIKE`.
+"""
+from typing import Any, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    DDL,
+    Double,
+    Table,
+    and_,
+    cast,
+    column,
+    event,
+    func,
+    literal_column,
+    or_,
+    select,
+    table,
+)
+from sqlalchemy.sql.elements import ColumnElement
+
+SEARCH_TS_CONFIG = "simple"
+MIN_TRIGRAM_LENGTH = 3
+SEARCH_VECTOR_COLUMN = "search_vector"
+
+# Objects created by the search migration that are intentionally not part of
+# the ORM metadata; alembic/env.py skips them during autogenerate.
+UNMAPPED_INDEXES = {
+    "ix_risks_process_name_trgm",
+    "ix_risks_risk_description_trgm",
+    "ix_risks_search_vector",
+    "ix_controls_control_code_trgm",
+    "ix_controls_description_trgm",
+    "ix_controls_search_vector",
+}
+
+
+def fts_table_name(table_name: str) -> str:
+    return f"{table_name}_fts"
+
+
+def register_sqlite_fts(target: Table, columns: Sequence[str]) -> None:
+    """Create/drop the FTS5 mirror of `columns` along with `target` on SQLite."""
+    name = target.name
+    fts = fts_table_name(name)
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    delete_old = (
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});"
+    )
+    insert_new = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});"
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{name}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {name} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {name} BEGIN {delete_old} END",
+        # Only updates of the indexed columns, not e.g. residual recomputes
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {name} BEGIN "
+        f"{delete_old} {insert_new} END",
+    ]
+    for statement in statements:
+        event.listen(target, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(
+        target, "before_drop", DDL(f"DROP TABLE IF EXISTS {fts}").execute_if(dialect="sqlite")
+    )
+
+
+def _contains_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _ilike_any(columns: Sequence[Any], term: str) -> ColumnElement:
+    pattern = _contains_pattern(term)
+    return or_(*(col.ilike(pattern, escape="\\") for col in columns))
+
+
+def _postgresql_clauses(
+    model: Any, columns: Sequence[Any], term: str
+) -> Tuple[ColumnElement, ColumnElement]:
+    vector = literal_column(f"{model.__tablename__}.{SEARCH_VECTOR_COLUMN}")
+    query = func.websearch_to_tsquery(SEARCH_TS_CONFIG, term)
+    condition = or_(vector.op("@@")(query), _ilike_any(columns, term))
+    # Similarity against the first non-nullable column (a NULL control_code
+    # would make the whole rank NULL, which sorts first under DESC and cannot
+    # be put in a cursor); coalesce guards the sum anyway.
+    title = next((col for col in columns if not col.nullable), columns[0])
+    # ts_rank/word_similarity return real; cast so the value survives a
+    # round-trip through a pagination cursor unchanged.
+    rank = cast(
+        func.coalesce(func.ts_rank(vector, query), 0)
+        + func.coalesce(func.word_similarity(term, title), 0),
+        Double,
+    )
+    return condition, rank
+
+
+def _sqlite_clauses(
+    model: Any, columns: Sequence[Any], term: str
+) -> Tuple[ColumnElement, ColumnElement]:
+    name = fts_table_name(model.__tablename__)
+    fts = table(name, column("rowid"), column(name))
+    match = fts.c[name].op("MATCH")('"' + term.replace('"', '""') + '"')
+    condition = model.id.in_(select(fts.c.rowid).where(match))
+    # bm25() is lower-is-better; weight the first (title-like) column higher.
+    weights = [10.0] + [1.0] * (len(columns) - 1)
+    rank = (
+        select(-func.bm25(literal_column(name), *weights))
+        .select_from(fts)
+        .where(and_(match, fts.c.rowid == model.id))
+        .scalar_subquery()
+    )
+    return condition, rank
+
+
+def search_clauses(
+    dialect_name: str, model: Any, columns: Sequence[Any], term: str
+) -> Tuple[ColumnElement, Optional[ColumnElement]]:
+    """
+    Return `(condition, rank)` for searching `term` in `columns` of `model`.
+
+    `rank` is higher for better matches, or `None` when the backend/term
+    cannot be ranked (callers then keep their default ordering).
+    """
+    if len(term) >= MIN_TRIGRAM_LENGTH:
+        if dialect_name == "postgresql":
+            return _postgresql_clauses(model, columns, term)
+        if dialect_name == "sqlite":
+            return _sqlite_clauses(model, columns, term)
+    return _ilike_any(columns, term), None
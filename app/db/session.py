@@ -1,7 +1,40 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.core.config import settings
+from app.db.pool import PoolMetrics, engine_options, install_idle_ping, instrumented_pool_class
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+pool_metrics = PoolMetrics("sync")
+engine = create_engine(
+    settings.DATABASE_URL,
+    **engine_options(settings.DATABASE_URL, instrumented_pool_class(QueuePool, pool_metrics)),
+)
+pool_metrics.attach(engine)
+if not settings.DB_POOL_PRE_PING and settings.DB_POOL_PING_IDLE_SECONDS > 0:
+    install_idle_ping(engine, settings.DB_POOL_PING_IDLE_SECONDS, pool_metrics)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# The async engine is only built when ASYNC_DATABASE_URL is configured, so the
+# async driver (asyncpg / aiosqlite) stays optional for sync-only deployments.
+async_pool_metrics = PoolMetrics("async")
+async_engine = None
+if settings.ASYNC_DATABASE_URL:
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL,
+        **engine_options(
+            settings.ASYNC_DATABASE_URL,
+            instrumented_pool_class(AsyncAdaptedQueuePool, async_pool_metrics),
+        ),
+    )
+    async_pool_metrics.attach(async_engine.sync_engine)
+    if not settings.DB_POOL_PRE_PING and settings.DB_POOL_PING_IDLE_SECONDS > 0:
+        install_idle_ping(
+            async_engine.sync_engine, settings.DB_POOL_PING_IDLE_SECONDS, async_pool_metrics
+        )
+# expire_on_commit=False: attributes must stay readable after commit because
+# lazy loads are not possible outside the event loop's greenlet.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
@@ -1,14 +1,28 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from app.api import metrics
 from app.api.v1 import api_router
 from app.core.config import settings
+from app.core.metrics import request_metrics
+from app.core.password_hashing import PasswordHashingBusy
+from app.middlewares.custom_middlewares import MetricsMiddleware, SQLInstrumentationMiddleware
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
 )
 
+
+@app.exception_handler(PasswordHashingBusy)
+def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many concurrent password operations, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], 
@@ -17,7 +31,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.SQL_INSTRUMENTATION:
+    app.add_middleware(
+        SQLInstrumentationMiddleware,
+        max_statements=settings.SLOW_REQUEST_MAX_STATEMENTS,
+        max_db_seconds=settings.SLOW_REQUEST_MAX_DB_SECONDS,
+        slow_statement_seconds=settings.SLOW_STATEMENT_SECONDS,
+        server_timing=settings.SERVER_TIMING_HEADER,
+    )
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 
 @app.get("/")
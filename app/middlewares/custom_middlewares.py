@@ -1,11 +1,154 @@
-# Example of a custom middleware
-#
-# from starlette.middleware.base import BaseHTTPMiddleware
-# from fastapi import Request, Response
-#
-# class ExampleMiddleware(BaseHTTPMiddleware):
-#     async def dispatch(self, request: Request, call_next) -> Response:
-#         # Do something before the request is handled
-#         response = await call_next(request)
-#         # Do something after the request is handled
-#         return response
\ No newline at end of file
+import json
+import logging
+import time
+from typing import Any, Dict, List
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import RequestMetrics
+from app.db import instrumentation
+from app.db.instrumentation import RequestStats
+
+logger = logging.getLogger("app.requests")
+
+# Route label of requests that matched no route (404s, probes), so arbitrary
+# paths cannot create new series
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """Feed `RequestMetrics` with every HTTP request, labelled by route template."""
+
+    def __init__(self, app: ASGIApp, *, metrics: RequestMetrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.metrics.in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.in_progress.dec()
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            self.metrics.observe(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status_code,
+                time.perf_counter() - start,
+            )
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Per-request SQL statistics as a `Server-Timing` header and a log line.
+
+    Every request is logged at DEBUG as one JSON object (method, path,
+    status, duration, statement count, DB time, slowest statement, ORM
+    objects loaded). Requests over `max_statements` statements or
+    `max_db_seconds` of DB time, or with a statement slower than
+    `slow_statement_seconds`, are logged at WARNING with the reasons under
+    `"slow"`.
+
+    A plain ASGI middleware rather than `BaseHTTPMiddleware`, so streamed
+    responses are not buffered. Their header is sent before the body is
+    produced and only covers the statements run until then; the log line
+    covers the whole request.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        max_statements: int,
+        max_db_seconds: float,
+        slow_statement_seconds: float,
+        server_timing: bool = True,
+    ) -> None:
+        self.app = app
+        self.max_statements = max_statements
+        self.max_db_seconds = max_db_seconds
+        self.slow_statement_seconds = slow_statement_seconds
+        self.server_timing = server_timing
+        instrumentation.install()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        with instrumentation.track() as stats:
+
+            async def send_with_timing(message: Message) -> None:
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    if self.server_timing:
+                        headers = MutableHeaders(scope=message)
+                        headers.append(
+                            "Server-Timing", server_timing(stats, time.perf_counter() - start)
+                        )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                self._log(scope, status_code, time.perf_counter() - start, stats)
+
+    def slow_reasons(self, stats: RequestStats) -> List[str]:
+        reasons = []
+        if stats.statements > self.max_statements:
+            reasons.append("statements")
+        if stats.db_seconds > self.max_db_seconds:
+            reasons.append("db_time")
+        if stats.slowest_seconds > self.slow_statement_seconds:
+            reasons.append("slow_statement")
+        return reasons
+
+    def _log(self, scope: Scope, status_code: int, seconds: float, stats: RequestStats) -> None:
+        reasons = self.slow_reasons(stats)
+        level = logging.WARNING if reasons else logging.DEBUG
+        if not logger.isEnabledFor(level):
+            return
+        record: Dict[str, Any] = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "duration_ms": round(seconds * 1000, 2),
+            "db_statements": stats.statements,
+            "db_ms": round(stats.db_seconds * 1000, 2),
+            "db_slowest_ms": round(stats.slowest_seconds * 1000, 2),
+            "db_slowest_statement": stats.slowest_statement,
+            "orm_objects_loaded": stats.objects_loaded,
+        }
+        if reasons:
+            record["slow"] = reasons
+        logger.log(level, json.dumps(record), extra={"request_stats": record})
+
+
+def server_timing(stats: RequestStats, seconds: float) -> str:
+    return ", ".join(
+        [
+            f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.statements} statements"',
+            f"db-slowest;dur={stats.slowest_seconds * 1000:.2f}",
+            f'orm;desc="{stats.objects_loaded} objects loaded"',
+            f"app;dur={seconds * 1000:.2f}",
+        ]
+    )
@@ -1,11 +1,12 @@
 from .example import Example
+from .page import Page
 from .role import Role, RoleCreate
 from .user import User, UserCreate, UserUpdate
-from .token import Token, TokenData
+from .token import RefreshTokenRequest, Token, TokenData
 from .control import Control, ControlInDB
 from .risk import Risk, RiskInDB
 from .form import Form, FormCreate, FormUpdate, Question, QuestionCreate, Option, OptionCreate, FormPublic
-from .submission import Submission, SubmissionCreate, Answer, AnswerCreate, AccessRequest, FormStats
+from .submission import Submission, SubmissionCreate, SubmissionStatus, Answer, AnswerCreate, AccessRequest, FormStats
 
 # Resolve forward references
 Control.model_rebuild()
@@ -66,6 +66,7 @@ class Form(FormBase):
     organization_id: int
     created_by: int
     created_at: datetime
+    version: int = 1
     questions: List[Question] = []
 
     class Config:
@@ -0,0 +1,19 @@
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    """
+    Response envelope for list endpoints.
+
+    Pass `next_cursor` back as `cursor` to fetch the following page. `total`
+    is only filled when requested with `count`; `total_estimated` tells
+    whether it came from planner statistics rather than an exact COUNT.
+    """
+    items: List[T]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+    total: Optional[int] = None
+    total_estimated: bool = False
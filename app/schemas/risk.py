@@ -89,3 +89,70 @@ class RiskInDB(RiskBase):
 class Risk(RiskInDB):
     controls: List["ControlInDB"] = []
 
+
+# Batch scoring
+class RiskScoreInput(BaseModel):
+    prob_question_1: int = Field(..., ge=1, le=4)
+    prob_question_2: int = Field(..., ge=1, le=4)
+    prob_question_3: int = Field(..., ge=1, le=4)
+    imp_question_1: int = Field(..., ge=1, le=4)
+    imp_question_2: int = Field(..., ge=1, le=4)
+    imp_question_3: int = Field(..., ge=1, le=4)
+    control_ids: Optional[List[int]] = []
+
+class RiskScoreBatch(BaseModel):
+    items: List[RiskScoreInput] = Field(..., max_length=10000)
+
+class RiskScoreResult(BaseModel):
+    inherent_probability: int
+    inherent_impact: int
+    residual_probability: int
+    residual_impact: int
+
+class RiskScoreBatchResult(BaseModel):
+    items: List[RiskScoreResult]
+
+
+# Bulk import
+class RiskImportError(BaseModel):
+    row: int
+    errors: List[str]
+
+class RiskImportReport(BaseModel):
+    total_rows: int
+    created: int
+    failed: int
+    errors: List[RiskImportError] = []
+    errors_truncated: bool = False
+
+
+# Bulk control linking
+class RiskControlLink(BaseModel):
+    risk_id: int
+    control_id: int
+
+class RiskControlLinkBatch(BaseModel):
+    items: List[RiskControlLink] = Field(..., max_length=10000)
+
+class RiskControlLinkResult(BaseModel):
+    changed: int
+    skipped: List[RiskControlLink] = []
+
+
+# Heat-map
+class RiskHeatmapCell(BaseModel):
+    probability: int
+    impact: int
+    count: int
+
+class RiskHeatmapArea(BaseModel):
+    area_id: int
+    total: int
+    inherent: List[RiskHeatmapCell] = []
+    residual: List[RiskHeatmapCell] = []
+
+class RiskHeatmap(BaseModel):
+    total: int
+    inherent: List[RiskHeatmapCell] = []
+    residual: List[RiskHeatmapCell] = []
+    areas: List[RiskHeatmapArea] = []
@@ -35,20 +35,41 @@ class Submission(SubmissionBase):
     end_time: Optional[datetime]
     score: float
     passed: Optional[bool]
+    grading_status: str = "graded"
     answers: List[Answer] = []
 
     class Config:
         orm_mode = True
 
+class SubmissionStatus(BaseModel):
+    id: int
+    grading_status: str
+    score: float
+    passed: Optional[bool]
+
+    class Config:
+        orm_mode = True
+
 class AccessRequest(BaseModel):
     access_code: Optional[str] = None
     respondent_email: EmailStr
     respondent_identifier: str
     
+class ScoreBucket(BaseModel):
+    min_score: float
+    max_score: float
+    count: int
+
+class QuestionStats(BaseModel):
+    question_id: int
+    answered: int
+    correct: Optional[int] = None  # None for questions that are not graded
+    correct_rate: Optional[float] = None
+
 class FormStats(BaseModel):
     total_submissions: int
+    graded_submissions: int
     average_score: float
-    submissions: List[Submission]
-
-    class Config:
-        orm_mode = True
+    pass_rate: float
+    score_histogram: List[ScoreBucket] = []
+    questions: List[QuestionStats] = []
@@ -0,0 +1,127 @@
+"""
+Form statistics computed with SQL aggregates.
+
+Nothing here loads `FormSubmission` rows: the summary, the score histogram
+and per-question correctness are each one aggregate query over the form's
+submissions, returning O(buckets) or O(questions) rows whatever the number of
+submissions. Averages, pass rate and histogram only cover graded submissions
+(`grading_status="graded"`).
+
+Per-question correctness follows the grading rules of
+`app.services.grading`: answers are first reduced per (submission, question)
+to the number of correct and incorrect options selected, then compared with
+the answer key.
+"""
+from typing import Any, Dict, List
+
+from sqlalchemy import Integer, case, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.db.models.form import Answer, Form, FormSubmission, GradingStatus, Option, QuestionType
+from app.services.grading import QuestionKey, get_answer_key
+
+HISTOGRAM_BUCKETS = 10
+BUCKET_WIDTH = 100.0 / HISTOGRAM_BUCKETS
+CHOICE_TYPES = (QuestionType.single_choice, QuestionType.multiple_choice)
+
+
+def _summary(db: Session, form_id: int) -> Dict[str, Any]:
+    graded = FormSubmission.grading_status == GradingStatus.graded.value
+    row = db.execute(
+        select(
+            func.count().label("total"),
+            func.count().filter(graded).label("graded"),
+            func.avg(FormSubmission.score).filter(graded).label("average"),
+            func.count().filter(graded, FormSubmission.passed.is_(True)).label("passed"),
+        ).where(FormSubmission.form_id == form_id)
+    ).one()
+    return {
+        "total_submissions": row.total,
+        "graded_submissions": row.graded,
+        "average_score": float(row.average or 0.0),
+        "pass_rate": row.passed / row.graded if row.graded else 0.0,
+    }
+
+
+def _histogram(db: Session, form_id: int) -> List[Dict[str, Any]]:
+    # Scores are percentages; 100 falls into the last bucket
+    bucket = case(
+        (FormSubmission.score >= 100.0, HISTOGRAM_BUCKETS - 1),
+        else_=cast(FormSubmission.score / BUCKET_WIDTH, Integer),
+    ).label("bucket")
+    counts = dict(
+        db.execute(
+            select(bucket, func.count())
+            .where(
+                FormSubmission.form_id == form_id,
+                FormSubmission.grading_status == GradingStatus.graded.value,
+            )
+            .group_by(bucket)
+        ).all()
+    )
+    return [
+        {
+            "min_score": i * BUCKET_WIDTH,
+            "max_score": (i + 1) * BUCKET_WIDTH,
+            "count": counts.get(i, 0),
+        }
+        for i in range(HISTOGRAM_BUCKETS)
+    ]
+
+
+def _is_correct(question: QuestionKey, hits: int, misses: int) -> bool:
+    if misses:
+        return False
+    if question.question_type == QuestionType.single_choice:
+        return hits == 1
+    return bool(question.correct) and hits == len(question.correct)
+
+
+def _question_stats(db: Session, form: Form) -> List[Dict[str, Any]]:
+    key = get_answer_key(db, form)
+    per_answer = (
+        select(
+            Answer.question_id,
+            func.count(Option.id).filter(Option.is_correct.is_(True)).label("hits"),
+            func.count(Option.id).filter(Option.is_correct.isnot(True)).label("misses"),
+        )
+        .join(FormSubmission, FormSubmission.id == Answer.submission_id)
+        .outerjoin(Option, Option.id == Answer.selected_option_id)
+        .where(FormSubmission.form_id == form.id)
+        .group_by(Answer.submission_id, Answer.question_id)
+        .subquery()
+    )
+    stats = {
+        question_id: {
+            "question_id": question_id,
+            "answered": 0,
+            "correct": 0 if question.question_type in CHOICE_TYPES else None,
+        }
+        for question_id, question in sorted(key.questions.items())
+    }
+    rows = db.execute(
+        select(per_answer.c.question_id, per_answer.c.hits, per_answer.c.misses, func.count())
+        .group_by(per_answer.c.question_id, per_answer.c.hits, per_answer.c.misses)
+    )
+    for question_id, hits, misses, count in rows:
+        entry = stats.get(question_id)
+        if entry is None:
+            continue
+        entry["answered"] += count
+        if entry["correct"] is not None and _is_correct(key.questions[question_id], hits, misses):
+            entry["correct"] += count
+
+    for entry in stats.values():
+        if entry["correct"] is None:
+            entry["correct_rate"] = None
+        else:
+            entry["correct_rate"] = entry["correct"] / entry["answered"] if entry["answered"] else 0.0
+    return list(stats.values())
+
+
+def form_stats(db: Session, form: Form) -> Dict[str, Any]:
+    return {
+        **_summary(db, form.id),
+        "score_histogram": _histogram(db, form.id),
+        "questions": _question_stats(db, form),
+    }
@@ -0,0 +1,323 @@
+"""
+Form grading against a compiled answer key.
+
+An `AnswerKey` maps question id -> points, type, valid option ids and correct
+option ids. It is built once per form version (one column-only query, or from
+an already loaded form) and kept in a process-wide LRU keyed by
+`(form_id, Form.version)`; `CRUDForm` bumps the version on every update, so a
+stale key is never used. Grading a submission is then O(answers).
+
+Scoring: a single-choice question earns its points when exactly one option is
+selected and it is correct; a multiple-choice question earns them when the
+set of selected options equals the set of correct ones. The score is the
+percentage of the form's total points.
+
+Submissions can also be stored ungraded (`grading_status="pending"`) and
+handed to `grading_queue`, whose worker threads grade them in batches with
+one UPDATE per batch.
+"""
+import logging
+import queue
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.db.models.form import (
+    Answer,
+    Form,
+    FormSubmission,
+    GradingStatus,
+    Option,
+    Question,
+    QuestionType,
+)
+
+logger = logging.getLogger(__name__)
+
+PASS_THRESHOLD = 60.0
+
+KeyRow = Tuple[int, int, QuestionType, Optional[int], Optional[bool]]
+
+
+@dataclass(frozen=True)
+class QuestionKey:
+    points: int
+    question_type: QuestionType
+    options: FrozenSet[int]
+    correct: FrozenSet[int]
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    form_id: int
+    version: int
+    is_graded: bool
+    total_points: int
+    questions: Dict[int, QuestionKey]
+
+    @classmethod
+    def build(cls, form: Any, rows: Iterable[KeyRow]) -> "AnswerKey":
+        """Compile from (question id, points, type, option id, is_correct) rows."""
+        questions: Dict[int, Tuple[int, QuestionType, set, set]] = {}
+        for question_id, points, question_type, option_id, is_correct in rows:
+            entry = questions.setdefault(question_id, (points or 0, question_type, set(), set()))
+            if option_id is not None:
+                entry[2].add(option_id)
+                if is_correct:
+                    entry[3].add(option_id)
+        compiled = {
+            question_id: QuestionKey(points, question_type, frozenset(options), frozenset(correct))
+            for question_id, (points, question_type, options, correct) in questions.items()
+        }
+        return cls(
+            form_id=form.id,
+            version=form.version,
+            is_graded=bool(form.is_graded),
+            total_points=sum(q.points for q in compiled.values()),
+            questions=compiled,
+        )
+
+    @classmethod
+    def from_form(cls, form: Any) -> "AnswerKey":
+        """Compile from a form whose questions and options are already loaded."""
+        rows = []
+        for q in form.questions:
+            rows.append((q.id, q.points, q.question_type, None, None))
+            rows.extend((q.id, q.points, q.question_type, o.id, o.is_correct) for o in q.options)
+        return cls.build(form, rows)
+
+    def is_valid_option(self, question_id: int, option_id: int) -> bool:
+        question = self.questions.get(question_id)
+        return question is not None and option_id in question.options
+
+    def grade(self, selected: Dict[int, FrozenSet[int]]) -> Tuple[float, Optional[bool]]:
+        """
+        Return (score, passed) for question id -> selected option ids;
+        (0.0, None) when the form is not graded.
+        """
+        if not self.is_graded or self.total_points <= 0:
+            return 0.0, None
+        earned = 0
+        for question_id, option_ids in selected.items():
+            question = self.questions.get(question_id)
+            if question is None or question.points <= 0 or not option_ids:
+                continue
+            if question.question_type == QuestionType.single_choice:
+                if len(option_ids) == 1 and option_ids <= question.correct:
+                    earned += question.points
+            elif question.question_type == QuestionType.multiple_choice:
+                if question.correct and option_ids == question.correct:
+                    earned += question.points
+        score = earned / self.total_points * 100.0
+        return score, score >= PASS_THRESHOLD
+
+
+class AnswerKeyCache:
+    """LRU of answer keys by (form id, form version)."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[int, int], AnswerKey]" = OrderedDict()
+
+    def get(self, form_id: int, version: int) -> Optional[AnswerKey]:
+        with self._lock:
+            key = self._entries.get((form_id, version))
+            if key is not None:
+                self._entries.move_to_end((form_id, version))
+            return key
+
+    def set(self, key: AnswerKey) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[(key.form_id, key.version)] = key
+            self._entries.move_to_end((key.form_id, key.version))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+answer_key_cache = AnswerKeyCache(settings.ANSWER_KEY_CACHE_MAX_ENTRIES)
+
+
+def load_answer_key(db: Session, form: Any) -> AnswerKey:
+    rows = db.execute(
+        select(
+            Question.id, Question.points, Question.question_type, Option.id, Option.is_correct
+        )
+        .outerjoin(Option, Option.question_id == Question.id)
+        .where(Question.form_id == form.id)
+    ).tuples()
+    return AnswerKey.build(form, rows)
+
+
+def get_answer_key(db: Session, form: Any) -> AnswerKey:
+    """Cached answer key of `form` at its current version."""
+    key = answer_key_cache.get(form.id, form.version)
+    if key is None:
+        key = load_answer_key(db, form)
+        answer_key_cache.set(key)
+    return key
+
+
+def selected_options(answers: Iterable[Any]) -> Dict[int, FrozenSet[int]]:
+    """Group answers' `selected_option_id` by question id."""
+    selected: Dict[int, set] = {}
+    for answer in answers:
+        options = selected.setdefault(answer.question_id, set())
+        if answer.selected_option_id is not None:
+            options.add(answer.selected_option_id)
+    return {question_id: frozenset(options) for question_id, options in selected.items()}
+
+
+def grade_submissions(db: Session, submission_ids: Iterable[int]) -> int:
+    """
+    Grade the pending submissions among `submission_ids` and commit; returns
+    how many were graded.
+    """
+    ids = set(submission_ids)
+    if not ids:
+        return 0
+    pending = db.execute(
+        select(FormSubmission.id.label("submission_id"), Form.id, Form.version, Form.is_graded)
+        .join(Form, Form.id == FormSubmission.form_id)
+        .where(
+            FormSubmission.id.in_(ids),
+            FormSubmission.grading_status == GradingStatus.pending.value,
+        )
+    ).all()
+    if not pending:
+        return 0
+
+    answers: Dict[int, List[Any]] = {}
+    for answer in db.execute(
+        select(Answer.submission_id, Answer.question_id, Answer.selected_option_id).where(
+            Answer.submission_id.in_([row.submission_id for row in pending])
+        )
+    ):
+        answers.setdefault(answer.submission_id, []).append(answer)
+
+    values = []
+    for row in pending:
+        # The row carries the form's id, version and is_graded
+        score, passed = get_answer_key(db, row).grade(
+            selected_options(answers.get(row.submission_id, []))
+        )
+        values.append(
+            {
+                "id": row.submission_id,
+                "score": score,
+                "passed": passed,
+                "grading_status": GradingStatus.graded.value,
+            }
+        )
+    db.execute(update(FormSubmission), values)
+    db.commit()
+    return len(values)
+
+
+def _default_session_factory() -> Session:
+    from app.db.session import SessionLocal
+
+    return SessionLocal()
+
+
+class GradingQueue:
+    """
+    Background grading of pending submissions.
+
+    `workers` daemon threads are started on first use; each takes up to
+    `batch_size` queued submission ids at a time. With 0 workers submissions
+    are graded inline by `enqueue`. Queued ids are lost on restart and stay
+    `pending`; `grade_submissions` can be run over them again.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int,
+        batch_size: int,
+        session_factory: Optional[Callable[[], Session]] = None,
+    ) -> None:
+        self.workers = workers
+        self.batch_size = batch_size
+        self._session_factory = session_factory or _default_session_factory
+        self._queue: "queue.Queue[int]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self.graded = Counter()
+        self.failed = Counter()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def enqueue(self, submission_id: int) -> None:
+        if self.workers <= 0:
+            self._grade([submission_id])
+            return
+        self._start()
+        self._queue.put(submission_id)
+
+    def _start(self) -> None:
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._work, name=f"grading-{len(self._threads)}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._grade(batch)
+
+    def _grade(self, submission_ids: List[int]) -> None:
+        db = self._session_factory()
+        try:
+            self.graded.inc(grade_submissions(db, submission_ids))
+        except Exception:
+            logger.exception("Grading failed for submissions %s", submission_ids)
+            db.rollback()
+            db.execute(
+                update(FormSubmission)
+                .where(
+                    FormSubmission.id.in_(submission_ids),
+                    FormSubmission.grading_status == GradingStatus.pending.value,
+                )
+                .values(grading_status=GradingStatus.failed.value)
+            )
+            db.commit()
+            self.failed.inc(len(submission_ids))
+        finally:
+            db.close()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "graded": self.graded.value,
+            "failed": self.failed.value,
+        }
+
+
+grading_queue = GradingQueue(
+    workers=settings.SUBMISSION_GRADING_WORKERS,
+    batch_size=settings.SUBMISSION_GRADING_BATCH_SIZE,
+)
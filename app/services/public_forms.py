@@ -0,0 +1,123 @@
+"""
+Cached public form structure.
+
+The respondent-facing `FormPublic` payload only changes with the form's
+`version`, so it is serialized once and the bytes are kept, with the version
+and a strong ETag derived from their hash, in a per-process TTL/LRU cache
+keyed by form id. Repeat requests cost one primary-key lookup of the current
+version instead of loading the form, questions and options, and clients
+revalidating with `If-None-Match` get `304 Not Modified` without a body.
+
+An entry is only served for the version it was built from. A payload of an
+older version cached late (by a request that read the form just before an
+update) is therefore never served, and updates made through other workers
+take effect immediately. `CRUDForm.update_with_questions` still invalidates
+the entry to free it.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.db.models.form import Form, Question
+from app.schemas.form import FormPublic
+
+
+@dataclass(frozen=True)
+class PublicForm:
+    version: int
+    body: bytes
+    etag: str
+
+
+class PublicFormCache:
+    def __init__(self, ttl_seconds: float, max_entries: int, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+
+    def get(self, form_id: int, version: int) -> Optional[PublicForm]:
+        with self._lock:
+            entry = self._entries.get(form_id)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= self._clock() or payload.version < version:
+                del self._entries[form_id]
+                return None
+            if payload.version != version:
+                return None
+            self._entries.move_to_end(form_id)
+            return payload
+
+    def set(self, form_id: int, payload: PublicForm) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            entry = self._entries.get(form_id)
+            if entry is not None and entry[1].version > payload.version:
+                return
+            self._entries[form_id] = (self._clock() + self.ttl_seconds, payload)
+            self._entries.move_to_end(form_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, form_id: int) -> None:
+        with self._lock:
+            self._entries.pop(form_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+public_form_cache = PublicFormCache(
+    ttl_seconds=settings.PUBLIC_FORM_CACHE_TTL_SECONDS,
+    max_entries=settings.PUBLIC_FORM_CACHE_MAX_ENTRIES,
+)
+
+
+def serialize(form: Form) -> PublicForm:
+    body = FormPublic.model_validate(form, from_attributes=True).model_dump_json().encode()
+    return PublicForm(
+        version=form.version, body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    )
+
+
+def get_public_form(db: Session, form_id: int) -> Optional[PublicForm]:
+    """Serialized public structure of a form, or None when it does not exist."""
+    version = db.scalar(select(Form.version).where(Form.id == form_id))
+    if version is None:
+        return None
+    payload = public_form_cache.get(form_id, version)
+    if payload is not None:
+        return payload
+    # Form, questions and options in a single SELECT
+    form = db.scalars(
+        select(Form)
+        .options(joinedload(Form.questions).joinedload(Question.options))
+        .where(Form.id == form_id)
+    ).unique().first()
+    if form is None:
+        return None
+    payload = serialize(form)
+    public_form_cache.set(form_id, payload)
+    return payload
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """`If-None-Match` check (weak comparison, as RFC 9110 requires for it)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
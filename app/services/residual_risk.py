@@ -0,0 +1,132 @@
+"""
+Residual risk recomputation.
+
+Residual probability/impact of a risk is its inherent value minus the summed
+effectiveness of every linked control, floored at 1. Instead of walking
+`risk.controls` for each affected risk (one lazy load per risk), the engine
+aggregates over `risk_controls` for the whole set of affected risks at once.
+"""
+from typing import Iterable, Optional
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models.control import Control
+from app.db.models.risk import Risk
+from app.db.models.risk_control import risk_controls
+from app.services.risk_heatmap import track_risks
+from app.services.risk_scoring import MIN_RESIDUAL_LEVEL, residual_levels
+
+risks_table = Risk.__table__
+
+
+def _affected_condition(risk_ids: Iterable[int], control_ids: Iterable[int]):
+    conditions = []
+    if risk_ids:
+        conditions.append(risks_table.c.id.in_(risk_ids))
+    if control_ids:
+        conditions.append(
+            risks_table.c.id.in_(
+                select(risk_controls.c.risk_id).where(
+                    risk_controls.c.control_id.in_(control_ids)
+                )
+            )
+        )
+    return or_(*conditions)
+
+
+def effectiveness_totals(condition):
+    """
+    One row per affected risk: id, inherent levels and summed control
+    effectiveness (0 when the risk has no controls).
+    """
+    controls_table = Control.__table__
+    return (
+        select(
+            risks_table.c.id.label("risk_id"),
+            risks_table.c.inherent_probability,
+            risks_table.c.inherent_impact,
+            func.coalesce(func.sum(controls_table.c.effectiveness_probability), 0).label("eff_prob"),
+            func.coalesce(func.sum(controls_table.c.effectiveness_impact), 0).label("eff_imp"),
+        )
+        .select_from(risks_table)
+        .outerjoin(risk_controls, risk_controls.c.risk_id == risks_table.c.id)
+        .outerjoin(controls_table, controls_table.c.id == risk_controls.c.control_id)
+        .where(condition)
+        .group_by(
+            risks_table.c.id,
+            risks_table.c.inherent_probability,
+            risks_table.c.inherent_impact,
+        )
+    )
+
+
+def residual_update_statement(condition):
+    """
+    Single set-based `UPDATE risks ... FROM (aggregate)` statement.
+
+    Requires UPDATE..FROM and GREATEST, i.e. PostgreSQL.
+    """
+    totals = effectiveness_totals(condition).subquery("totals")
+    return (
+        update(risks_table)
+        .where(risks_table.c.id == totals.c.risk_id)
+        .values(
+            residual_probability=func.greatest(
+                risks_table.c.inherent_probability - totals.c.eff_prob, MIN_RESIDUAL_LEVEL
+            ),
+            residual_impact=func.greatest(
+                risks_table.c.inherent_impact - totals.c.eff_imp, MIN_RESIDUAL_LEVEL
+            ),
+        )
+    )
+
+
+def _recompute_in_python(db: Session, condition) -> None:
+    # Fallback for SQLite and other dialects: one aggregate SELECT, residuals
+    # computed vectorised, then one executemany UPDATE keyed by primary key.
+    rows = db.execute(effectiveness_totals(condition)).all()
+    if not rows:
+        return
+    ids, inherent_prob, inherent_imp, eff_prob, eff_imp = zip(*rows)
+    residual_prob = residual_levels(inherent_prob, eff_prob).tolist()
+    residual_imp = residual_levels(inherent_imp, eff_imp).tolist()
+    db.execute(
+        update(Risk),
+        [
+            {"id": risk_id, "residual_probability": prob, "residual_impact": imp}
+            for risk_id, prob, imp in zip(ids, residual_prob, residual_imp)
+        ],
+    )
+
+
+def recompute_residual_risk(
+    db: Session,
+    *,
+    risk_ids: Optional[Iterable[int]] = None,
+    control_ids: Optional[Iterable[int]] = None,
+) -> None:
+    """
+    Recompute residual probability/impact for the given risks and for every
+    risk linked to the given controls.
+
+    Pending changes (new links, edited effectiveness) are flushed first so the
+    aggregate sees them. Residual attributes of `Risk` instances already in the
+    session are expired so they reload on next access. Does not commit.
+    """
+    risk_ids = {i for i in (risk_ids or []) if i is not None}
+    control_ids = {i for i in (control_ids or []) if i is not None}
+    if not risk_ids and not control_ids:
+        return
+
+    db.flush()
+    condition = _affected_condition(risk_ids, control_ids)
+    with track_risks(db, condition):
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(residual_update_statement(condition))
+        else:
+            _recompute_in_python(db, condition)
+
+    for obj in list(db.identity_map.values()):
+        if isinstance(obj, Risk):
+            db.expire(obj, ["residual_probability", "residual_impact"])
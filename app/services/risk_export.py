@@ -0,0 +1,133 @@
+"""
+Streaming export of the risk register.
+
+Risks are read with a single query that joins the linked control codes
+(aggregated into one `;`-separated column, the same separator the importer
+reads) and fetched through a server-side cursor in batches of `batch_size`
+rows (`yield_per`). Each batch is encoded and handed to the response before
+the next one is fetched, so memory stays constant for CSV and NDJSON.
+
+XLSX is a zip archive and cannot be emitted row by row; rows are written
+with openpyxl's write-only mode into a spooled temporary file, which is then
+streamed back in chunks.
+"""
+import csv
+import io
+import json
+import tempfile
+from datetime import datetime
+from typing import Any, Iterator, Literal, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import aggregate_strings
+
+from app.db.models.control import Control
+from app.db.models.risk import Risk
+from app.db.models.risk_control import risk_controls
+from app.services.risk_import import CONTROL_IDS_SEPARATOR
+
+EXPORT_COLUMNS = (
+    "id",
+    "area_id",
+    "process_name",
+    "risk_description",
+    "inherent_probability",
+    "inherent_impact",
+    "residual_probability",
+    "residual_impact",
+    "owner_id",
+    "assigned_to_id",
+    "reviewed_at",
+    "created_at",
+    "updated_at",
+)
+HEADER = EXPORT_COLUMNS + ("control_codes",)
+
+ExportFormat = Literal["csv", "ndjson", "xlsx"]
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+# Read size when streaming the finished XLSX file
+XLSX_CHUNK_SIZE = 64 * 1024
+
+
+def export_query(organization_id: int, area_id: Optional[int] = None):
+    control_codes = aggregate_strings(Control.control_code, CONTROL_IDS_SEPARATOR)
+    query = (
+        select(*(getattr(Risk, name) for name in EXPORT_COLUMNS), control_codes.label("control_codes"))
+        .outerjoin(risk_controls, risk_controls.c.risk_id == Risk.id)
+        .outerjoin(Control, Control.id == risk_controls.c.control_id)
+        .where(Risk.organization_id == organization_id)
+        .group_by(Risk.id)
+        .order_by(Risk.id)
+    )
+    if area_id is not None:
+        query = query.where(Risk.area_id == area_id)
+    return query
+
+
+def iter_batches(db: Session, query, batch_size: int) -> Iterator[Sequence[Any]]:
+    result = db.execute(query.execution_options(yield_per=batch_size))
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+
+
+def _cell(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def iter_csv(batches: Iterator[Sequence[Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADER)
+    for rows in batches:
+        writer.writerows([_cell(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(batches: Iterator[Sequence[Any]]) -> Iterator[str]:
+    for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(HEADER, (_cell(value) for value in row)))) + "\n" for row in rows
+        )
+
+
+def iter_xlsx(batches: Iterator[Sequence[Any]]) -> Iterator[bytes]:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Risks")
+    sheet.append(HEADER)
+    for rows in batches:
+        for row in rows:
+            # openpyxl rejects timezone-aware datetimes
+            sheet.append([_cell(value) for value in row])
+    with tempfile.SpooledTemporaryFile(max_size=XLSX_CHUNK_SIZE * 16) as file:
+        workbook.save(file)
+        file.seek(0)
+        while chunk := file.read(XLSX_CHUNK_SIZE):
+            yield chunk
+
+
+ENCODERS = {"csv": iter_csv, "ndjson": iter_ndjson, "xlsx": iter_xlsx}
+
+
+def export_risks(
+    db: Session,
+    *,
+    export_format: ExportFormat,
+    organization_id: int,
+    area_id: Optional[int] = None,
+    batch_size: int = 1000,
+) -> Iterator[Any]:
+    query = export_query(organization_id, area_id)
+    return ENCODERS[export_format](iter_batches(db, query, batch_size))
@@ -0,0 +1,219 @@
+"""
+Incrementally maintained risk heat-map.
+
+`risk_heatmap_cells` holds the number of risks per (probability, impact)
+cell, inherent and residual, for each organization and area, so the
+dashboard reads O(cells) rows instead of every risk.
+
+Writers adjust the cells by deltas in the same transaction as their change:
+the risk CRUD records the cells a risk leaves and enters
+(`record_risk_change`), set-based writes count the cells of the rows they
+touch before and after (`track_risks`) or add the rows they insert
+(`apply_deltas`). Deltas are applied with `INSERT .. ON CONFLICT DO UPDATE
+SET count = count + excluded.count`, so concurrent writers to the same area
+serialize on the cell rows instead of conflicting, and cells whose count
+drops to 0 are deleted.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from sqlalchemy import delete, func, insert, literal, select, true, tuple_, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db.models.risk import Risk
+from app.db.models.risk_heatmap import INHERENT, RESIDUAL, RiskHeatmapCell
+
+Scope = Tuple[int, int]
+# (organization_id, area_id, kind, probability, impact)
+Cell = Tuple[int, int, str, int, int]
+
+CELL_COLUMNS = ("organization_id", "area_id", "kind", "probability", "impact")
+# (kind, probability attribute, impact attribute) of the two grids
+GRIDS = (
+    (INHERENT, "inherent_probability", "inherent_impact"),
+    (RESIDUAL, "residual_probability", "residual_impact"),
+)
+
+risks_table = Risk.__table__
+cells_table = RiskHeatmapCell.__table__
+
+
+def risk_cells(risk: Union[Risk, Mapping[str, Any]]) -> List[Cell]:
+    """The cells `risk` (a `Risk` or a row of its column values) is counted in."""
+    if isinstance(risk, Mapping):
+        get = risk.get
+    else:
+        def get(name: str) -> Any:
+            return getattr(risk, name)
+    org_id, area_id = get("organization_id"), get("area_id")
+    if org_id is None or area_id is None:
+        return []
+    cells = []
+    for kind, probability, impact in GRIDS:
+        if get(probability) is not None and get(impact) is not None:
+            cells.append((org_id, area_id, kind, get(probability), get(impact)))
+    return cells
+
+
+def apply_deltas(db: Session, deltas: Mapping[Cell, int]) -> None:
+    """Add `deltas` to the cells, creating missing ones and deleting emptied ones."""
+    # Sorted, so concurrent writers lock shared cells in the same order
+    changes = sorted((cell, n) for cell, n in deltas.items() if n)
+    if not changes:
+        return
+    values = [dict(zip(CELL_COLUMNS, cell), count=n) for cell, n in changes]
+    key = tuple_(*(cells_table.c[name] for name in CELL_COLUMNS))
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        module = postgresql if dialect == "postgresql" else sqlite
+        statement = module.insert(cells_table).values(values)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=list(CELL_COLUMNS),
+                set_={"count": cells_table.c["count"] + statement.excluded["count"]},
+            )
+        )
+    else:
+        # No upsert support: update the existing cells, insert the others
+        existing = set(
+            db.execute(
+                select(*key.clauses).where(key.in_([cell for cell, _ in changes]))
+            ).tuples()
+        )
+        for (cell, n), row in zip(changes, values):
+            if cell in existing:
+                db.execute(
+                    update(cells_table).where(key == cell).values(count=cells_table.c["count"] + n)
+                )
+            else:
+                db.execute(insert(cells_table).values(row))
+    emptied = [cell for cell, n in changes if n < 0]
+    if emptied:
+        db.execute(delete(cells_table).where(key.in_(emptied), cells_table.c["count"] <= 0))
+
+
+def record_risk_change(db: Session, before: Iterable[Cell], after: Iterable[Cell]) -> None:
+    """Move one risk from the cells `before` to the cells `after` (see `risk_cells`)."""
+    deltas = Counter(after)
+    deltas.subtract(before)
+    apply_deltas(db, deltas)
+
+
+def _cell_counts(kind: str, probability, impact, condition):
+    return (
+        select(
+            risks_table.c.organization_id,
+            risks_table.c.area_id,
+            literal(kind).label("kind"),
+            probability.label("probability"),
+            impact.label("impact"),
+            func.count().label("count"),
+        )
+        .where(
+            condition,
+            risks_table.c.organization_id.isnot(None),
+            risks_table.c.area_id.isnot(None),
+            probability.isnot(None),
+            impact.isnot(None),
+        )
+        .group_by(risks_table.c.organization_id, risks_table.c.area_id, probability, impact)
+    )
+
+
+def _counts_query(condition):
+    return union_all(
+        *(
+            _cell_counts(kind, risks_table.c[probability], risks_table.c[impact], condition)
+            for kind, probability, impact in GRIDS
+        )
+    )
+
+
+def cell_counts(db: Session, condition) -> Counter:
+    """Cell counts of the risks matching `condition` (on `risks`)."""
+    return Counter(
+        {tuple(row[:5]): row[5] for row in db.execute(_counts_query(condition))}
+    )
+
+
+@contextmanager
+def track_risks(db: Session, condition) -> Iterator[None]:
+    """
+    Adjust the cells for a set-based write to the risks matching `condition`.
+
+    `condition` must select the same risks before and after the write.
+    """
+    before = cell_counts(db, condition)
+    yield
+    deltas = cell_counts(db, condition)
+    deltas.subtract(before)
+    apply_deltas(db, deltas)
+
+
+def refresh_cells(db: Session, scopes: Optional[Iterable[Scope]] = None) -> None:
+    """
+    Rebuild the cells of `scopes` from `risks`; every scope when None.
+
+    For backfills and repairs only: the rebuild is not safe against
+    concurrent writes to the same scopes.
+    """
+    if scopes is not None:
+        scopes = list(scopes)
+        if not scopes:
+            return
+
+    def _in_scopes(table):
+        if scopes is None:
+            return true()
+        return tuple_(table.c.organization_id, table.c.area_id).in_(scopes)
+
+    db.execute(delete(cells_table).where(_in_scopes(cells_table)))
+    db.execute(
+        insert(cells_table).from_select(
+            [*CELL_COLUMNS, "count"], _counts_query(_in_scopes(risks_table))
+        )
+    )
+
+
+def get_heatmap(
+    db: Session, *, organization_id: int, area_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """Heat-map of an organization, per area and summed over its areas."""
+    query = select(cells_table).where(cells_table.c.organization_id == organization_id)
+    if area_id is not None:
+        query = query.where(cells_table.c.area_id == area_id)
+    query = query.order_by(
+        cells_table.c.area_id,
+        cells_table.c.kind,
+        cells_table.c.probability,
+        cells_table.c.impact,
+    )
+
+    areas: Dict[int, Dict[str, Any]] = {}
+    totals: Dict[str, Dict[Tuple[int, int], int]] = {INHERENT: {}, RESIDUAL: {}}
+    for row in db.execute(query):
+        area = areas.setdefault(
+            row.area_id, {"area_id": row.area_id, "total": 0, INHERENT: [], RESIDUAL: []}
+        )
+        area[row.kind].append(
+            {"probability": row.probability, "impact": row.impact, "count": row.count}
+        )
+        if row.kind == INHERENT:
+            area["total"] += row.count
+        cell = (row.probability, row.impact)
+        totals[row.kind][cell] = totals[row.kind].get(cell, 0) + row.count
+
+    def _cells(counts: Dict[Tuple[int, int], int]) -> List[Dict[str, int]]:
+        return [
+            {"probability": probability, "impact": impact, "count": count}
+            for (probability, impact), count in sorted(counts.items())
+        ]
+
+    return {
+        "total": sum(area["total"] for area in areas.values()),
+        INHERENT: _cells(totals[INHERENT]),
+        RESIDUAL: _cells(totals[RESIDUAL]),
+        "areas": list(areas.values()),
+    }
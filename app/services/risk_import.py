@@ -0,0 +1,229 @@
+"""
+Bulk import of risk registers.
+
+Rows are streamed from the uploaded file, validated against `RiskCreate`,
+scored in vectorised batches and inserted chunk by chunk with multi-row
+INSERTs, one transaction per chunk. A chunk that fails to insert is rolled
+back and reported without aborting the rest of the import.
+"""
+import csv
+import heapq
+import io
+from collections import Counter
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.crud import crud_control
+from app.db.models.area import Area
+from app.db.models.risk import Risk
+from app.db.models.risk_control import risk_controls
+from app.schemas.risk import RiskCreate
+from app.services.risk_heatmap import apply_deltas, risk_cells
+from app.services.risk_scoring import score_questionnaires
+
+Row = Tuple[int, Dict[str, Any]]
+
+CONTROL_IDS_SEPARATOR = ";"
+
+
+def iter_csv_rows(file: BinaryIO) -> Iterator[Row]:
+    """Yield (line number, row) pairs; the header is line 1."""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [c.strip() for c in header]
+        for values in reader:
+            if not any(v.strip() for v in values):
+                continue
+            yield reader.line_num, dict(zip(columns, values))
+    finally:
+        # Leave the underlying upload open for the caller to close
+        text.detach()
+
+
+def iter_xlsx_rows(file: BinaryIO) -> Iterator[Row]:
+    """Yield (sheet row number, row) pairs from the first worksheet."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c).strip() if c is not None else "" for c in header]
+        for number, values in enumerate(rows, start=2):
+            if values is None or all(v is None for v in values):
+                continue
+            yield number, dict(zip(columns, values))
+    finally:
+        workbook.close()
+
+
+def _parse_row(raw: Dict[str, Any]) -> RiskCreate:
+    data = {
+        key.strip(): value
+        for key, value in raw.items()
+        if key and value is not None and str(value).strip() != ""
+    }
+    control_ids = data.get("control_ids")
+    if isinstance(control_ids, str):
+        data["control_ids"] = [
+            part.strip() for part in control_ids.split(CONTROL_IDS_SEPARATOR) if part.strip()
+        ]
+    elif control_ids is not None:
+        data["control_ids"] = [control_ids]
+    return RiskCreate.model_validate(data)
+
+
+def _format_validation_error(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}"
+        for e in error.errors()
+    ]
+
+
+class RiskImporter:
+    def __init__(
+        self,
+        db: Session,
+        *,
+        organization_id: int,
+        owner_id: int,
+        chunk_size: int = 1000,
+        max_reported_errors: int = 1000,
+    ) -> None:
+        self.db = db
+        self.organization_id = organization_id
+        self.owner_id = owner_id
+        self.chunk_size = chunk_size
+        self.max_reported_errors = max_reported_errors
+        self.total_rows = 0
+        self.created = 0
+        self.failed = 0
+        # Max-heap on the row number (negated), so the reported errors are the
+        # lowest rows whatever order the checks find them in
+        self._errors: List[Tuple[int, int, Dict[str, Any]]] = []
+
+    def _fail(self, row_number: int, messages: List[str]) -> None:
+        self.failed += 1
+        entry = (-row_number, self.failed, {"row": row_number, "errors": messages})
+        if len(self._errors) < self.max_reported_errors:
+            heapq.heappush(self._errors, entry)
+        elif self._errors and entry > self._errors[0]:
+            heapq.heapreplace(self._errors, entry)
+
+    def run(self, rows: Iterable[Row]) -> Dict[str, Any]:
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.total_rows += len(chunk)
+            self._import_chunk(chunk)
+        return {
+            "total_rows": self.total_rows,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": [error for _, _, error in sorted(self._errors, reverse=True)],
+            "errors_truncated": self.failed > len(self._errors),
+        }
+
+    def _import_chunk(self, chunk: List[Row]) -> None:
+        parsed: List[Tuple[int, RiskCreate]] = []
+        for row_number, raw in chunk:
+            try:
+                parsed.append((row_number, _parse_row(raw)))
+            except ValidationError as e:
+                self._fail(row_number, _format_validation_error(e))
+        if not parsed:
+            return
+
+        valid_area_ids = set(
+            self.db.scalars(
+                select(Area.id).where(
+                    Area.organization_id == self.organization_id,
+                    Area.id.in_({risk_in.area_id for _, risk_in in parsed}),
+                )
+            )
+        )
+        effectiveness = crud_control.control.get_effectiveness_by_id(
+            self.db,
+            ids={cid for _, risk_in in parsed for cid in (risk_in.control_ids or [])},
+            organization_id=self.organization_id,
+        )
+
+        accepted: List[Tuple[int, RiskCreate]] = []
+        for row_number, risk_in in parsed:
+            messages = []
+            if risk_in.area_id not in valid_area_ids:
+                messages.append(f"area_id: area {risk_in.area_id} not found")
+            unknown = [cid for cid in risk_in.control_ids or [] if cid not in effectiveness]
+            if unknown:
+                messages.append(f"control_ids: controls {unknown} not found")
+            if messages:
+                self._fail(row_number, messages)
+            else:
+                accepted.append((row_number, risk_in))
+        if not accepted:
+            return
+
+        scores = score_questionnaires([risk_in for _, risk_in in accepted], effectiveness)
+        values = [
+            {
+                "organization_id": self.organization_id,
+                "owner_id": self.owner_id,
+                "area_id": risk_in.area_id,
+                "process_name": risk_in.process_name,
+                "risk_description": risk_in.risk_description,
+                "assigned_to_id": risk_in.assigned_to_id,
+                **score,
+            }
+            for (_, risk_in), score in zip(accepted, scores)
+        ]
+        try:
+            risk_ids = self.db.scalars(
+                insert(Risk).returning(Risk.id, sort_by_parameter_order=True), values
+            ).all()
+            links = [
+                {"risk_id": risk_id, "control_id": control_id}
+                for risk_id, (_, risk_in) in zip(risk_ids, accepted)
+                for control_id in set(risk_in.control_ids or [])
+            ]
+            if links:
+                self.db.execute(insert(risk_controls), links)
+            apply_deltas(self.db, Counter(cell for row in values for cell in risk_cells(row)))
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            message = f"database error: {e.__class__.__name__}"
+            for row_number, _ in accepted:
+                self._fail(row_number, [message])
+            return
+        self.created += len(accepted)
+
+
+def import_risks(
+    db: Session,
+    rows: Iterable[Row],
+    *,
+    organization_id: int,
+    owner_id: int,
+    chunk_size: int = 1000,
+    max_reported_errors: int = 1000,
+) -> Dict[str, Any]:
+    return RiskImporter(
+        db,
+        organization_id=organization_id,
+        owner_id=owner_id,
+        chunk_size=chunk_size,
+        max_reported_errors=max_reported_errors,
+    ).run(rows)
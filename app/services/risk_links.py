@@ -0,0 +1,113 @@
+"""
+Bulk linking of controls to risks.
+
+The single-pair endpoints load both objects and the whole `risk.controls`
+collection to test membership. Here the requested pairs are checked against
+the organization with one id-only query per side, written to `risk_controls`
+with set-based statements (`INSERT .. ON CONFLICT DO NOTHING` / `DELETE ..
+WHERE (risk_id, control_id) IN (..)`) and residuals are recomputed once for
+every affected risk, all in one transaction.
+"""
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db.models.control import Control
+from app.db.models.risk import Risk
+from app.db.models.risk_control import risk_controls
+from app.services.residual_risk import recompute_residual_risk
+
+Pair = Tuple[int, int]
+
+# Two bind parameters per pair; stays well under SQLite/PostgreSQL limits
+CHUNK_SIZE = 1000
+
+
+def _chunks(pairs: List[Pair]) -> Iterable[List[Pair]]:
+    for start in range(0, len(pairs), CHUNK_SIZE):
+        yield pairs[start:start + CHUNK_SIZE]
+
+
+def _split_pairs(
+    db: Session, pairs: Iterable[Pair], organization_id: int
+) -> Tuple[List[Pair], List[Pair]]:
+    """Deduplicate `pairs` and split them into (valid, skipped) for the organization."""
+    unique = list(dict.fromkeys(pairs))
+    risk_ids = {risk_id for risk_id, _ in unique}
+    control_ids = {control_id for _, control_id in unique}
+    known_risks: Set[int] = set()
+    known_controls: Set[int] = set()
+    if unique:
+        known_risks = set(
+            db.scalars(
+                select(Risk.id).where(Risk.organization_id == organization_id, Risk.id.in_(risk_ids))
+            )
+        )
+        known_controls = set(
+            db.scalars(
+                select(Control.id).where(
+                    Control.organization_id == organization_id, Control.id.in_(control_ids)
+                )
+            )
+        )
+    valid: List[Pair] = []
+    skipped: List[Pair] = []
+    for pair in unique:
+        if pair[0] in known_risks and pair[1] in known_controls:
+            valid.append(pair)
+        else:
+            skipped.append(pair)
+    return valid, skipped
+
+
+def _insert_ignoring_existing(db: Session, pairs: List[Pair]) -> int:
+    dialect = db.get_bind().dialect.name
+    values = [{"risk_id": risk_id, "control_id": control_id} for risk_id, control_id in pairs]
+    if dialect in ("postgresql", "sqlite"):
+        module = postgresql if dialect == "postgresql" else sqlite
+        statement = module.insert(risk_controls).values(values).on_conflict_do_nothing()
+        return db.execute(statement).rowcount
+    # No upsert support: drop the pairs that already exist first
+    existing = set(
+        db.execute(
+            select(risk_controls.c.risk_id, risk_controls.c.control_id).where(
+                tuple_(risk_controls.c.risk_id, risk_controls.c.control_id).in_(pairs)
+            )
+        ).tuples()
+    )
+    values = [v for v in values if (v["risk_id"], v["control_id"]) not in existing]
+    if values:
+        db.execute(insert(risk_controls), values)
+    return len(values)
+
+
+def _finish(db: Session, valid: List[Pair], skipped: List[Pair], changed: int) -> Dict[str, Any]:
+    if changed:
+        recompute_residual_risk(db, risk_ids={risk_id for risk_id, _ in valid})
+    db.commit()
+    return {
+        "changed": changed,
+        "skipped": [{"risk_id": risk_id, "control_id": control_id} for risk_id, control_id in skipped],
+    }
+
+
+def link_controls(db: Session, pairs: Iterable[Pair], *, organization_id: int) -> Dict[str, Any]:
+    """Link every (risk_id, control_id) pair; already-linked pairs are left as they are."""
+    valid, skipped = _split_pairs(db, pairs, organization_id)
+    changed = sum(_insert_ignoring_existing(db, chunk) for chunk in _chunks(valid))
+    return _finish(db, valid, skipped, changed)
+
+
+def unlink_controls(db: Session, pairs: Iterable[Pair], *, organization_id: int) -> Dict[str, Any]:
+    """Remove every (risk_id, control_id) pair; pairs that are not linked are ignored."""
+    valid, skipped = _split_pairs(db, pairs, organization_id)
+    changed = 0
+    for chunk in _chunks(valid):
+        changed += db.execute(
+            delete(risk_controls).where(
+                tuple_(risk_controls.c.risk_id, risk_controls.c.control_id).in_(chunk)
+            )
+        ).rowcount
+    return _finish(db, valid, skipped, changed)
@@ -0,0 +1,119 @@
+"""
+Risk scoring methodology.
+
+Every level in the register is derived the same way:
+
+* inherent probability / impact: ceiling of the mean of three 1-4 answers
+* control effectiveness: ceiling of the mean of three effectiveness answers
+* residual level: inherent level minus the summed effectiveness of the linked
+  controls, never below MIN_RESIDUAL_LEVEL
+
+The scalar helpers are used on write paths for a single risk or control; the
+`score_batch` variant scores whole arrays of risks at once with NumPy.
+"""
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+MIN_RESIDUAL_LEVEL = 1
+
+
+@dataclass(frozen=True)
+class RiskScore:
+    inherent_probability: int
+    inherent_impact: int
+    residual_probability: int
+    residual_impact: int
+
+
+def answer_level(answers: Sequence[float]) -> int:
+    """Ceiling of the mean of a questionnaire's answers."""
+    return math.ceil(sum(answers) / len(answers))
+
+
+def residual_level(inherent: int, effectiveness: float) -> int:
+    return int(max(inherent - effectiveness, MIN_RESIDUAL_LEVEL))
+
+
+def score_risk(
+    probability_answers: Sequence[float],
+    impact_answers: Sequence[float],
+    effectiveness_probability: float = 0,
+    effectiveness_impact: float = 0,
+) -> RiskScore:
+    inherent_probability = answer_level(probability_answers)
+    inherent_impact = answer_level(impact_answers)
+    return RiskScore(
+        inherent_probability=inherent_probability,
+        inherent_impact=inherent_impact,
+        residual_probability=residual_level(inherent_probability, effectiveness_probability),
+        residual_impact=residual_level(inherent_impact, effectiveness_impact),
+    )
+
+
+def answer_levels(answers) -> np.ndarray:
+    """Vectorised `answer_level` over an (n, k) array of answers."""
+    answers = np.asarray(answers, dtype=float)
+    return np.ceil(answers.sum(axis=-1) / answers.shape[-1]).astype(np.int64)
+
+
+def residual_levels(inherent, effectiveness) -> np.ndarray:
+    """Vectorised `residual_level` over equally sized arrays."""
+    residual = np.asarray(inherent) - np.asarray(effectiveness)
+    return np.maximum(residual, MIN_RESIDUAL_LEVEL).astype(np.int64)
+
+
+def score_batch(
+    probability_answers,
+    impact_answers,
+    effectiveness_probability=None,
+    effectiveness_impact=None,
+) -> dict:
+    """
+    Score n risks at once.
+
+    `probability_answers` / `impact_answers` are (n, 3) arrays, the summed
+    control effectiveness arrays have length n and default to zero. Returns a
+    mapping of column name to int64 array of length n.
+    """
+    inherent_probability = answer_levels(probability_answers).reshape(-1)
+    inherent_impact = answer_levels(impact_answers).reshape(-1)
+    if effectiveness_probability is None:
+        effectiveness_probability = np.zeros(len(inherent_probability))
+    if effectiveness_impact is None:
+        effectiveness_impact = np.zeros(len(inherent_impact))
+    return {
+        "inherent_probability": inherent_probability,
+        "inherent_impact": inherent_impact,
+        "residual_probability": residual_levels(inherent_probability, effectiveness_probability),
+        "residual_impact": residual_levels(inherent_impact, effectiveness_impact),
+    }
+
+
+def score_questionnaires(items: Sequence, effectiveness_by_id: Dict[int, Tuple[int, int]]) -> List[dict]:
+    """
+    Score questionnaire objects (attributes `prob_question_1..3`,
+    `imp_question_1..3` and optional `control_ids`) in one vectorised pass.
+
+    `effectiveness_by_id` maps control id -> (probability, impact)
+    effectiveness; ids missing from it are ignored.
+    """
+    if not items:
+        return []
+    probability_answers = [
+        (i.prob_question_1, i.prob_question_2, i.prob_question_3) for i in items
+    ]
+    impact_answers = [(i.imp_question_1, i.imp_question_2, i.imp_question_3) for i in items]
+    effectiveness = np.zeros((len(items), 2))
+    for row, item in enumerate(items):
+        for control_id in set(item.control_ids or []):
+            if control_id in effectiveness_by_id:
+                effectiveness[row] += effectiveness_by_id[control_id]
+
+    scores = score_batch(
+        probability_answers, impact_answers, effectiveness[:, 0], effectiveness[:, 1]
+    )
+    columns = {name: values.tolist() for name, values in scores.items()}
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
@@ -0,0 +1,146 @@
+"""
+Benchmark command line.
+
+    python -m benchmarks seed --database-url sqlite:///./benchmark.db \\
+        --organizations 4 --risks 5000 --controls 200
+    python -m benchmarks run --database-url sqlite:///./benchmark.db \\
+        --requests 200 --compare benchmarks/baselines/sqlite.json
+
+`run` reseeds first unless `--no-seed` is given, because the write scenarios
+change the data. `--save PATH` writes a new baseline; `--compare PATH` exits
+with status 1 on regressions.
+"""
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+DEFAULT_DATABASE_URL = "sqlite:///./benchmark.db"
+SCENARIO_NAMES = ["login", "read_risks", "create_risk", "update_control", "submit_form"]
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    dataset = argparse.ArgumentParser(add_help=False)
+    dataset.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    dataset.add_argument("--organizations", type=int, default=2)
+    dataset.add_argument("--risks", type=int, default=2000, help="risks per organization")
+    dataset.add_argument("--controls", type=int, default=100, help="controls per organization")
+    dataset.add_argument("--controls-per-risk", type=int, default=3)
+    dataset.add_argument("--random-seed", type=int, default=0)
+
+    commands.add_parser("seed", parents=[dataset], help="recreate and fill the database")
+
+    run = commands.add_parser("run", parents=[dataset], help="seed, then measure scenarios")
+    run.add_argument("--no-seed", action="store_true", help="reuse the existing data")
+    run.add_argument("--requests", type=int, default=100, help="measured requests per scenario")
+    run.add_argument("--concurrency", type=int, default=1)
+    run.add_argument("--warmup", type=int, default=5)
+    run.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIO_NAMES),
+        help=f"comma-separated subset of {','.join(SCENARIO_NAMES)}",
+    )
+    run.add_argument("--save", type=Path, help="write the results as a baseline")
+    run.add_argument("--compare", type=Path, help="baseline to check the results against")
+    run.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed relative p95 increase"
+    )
+    return parser
+
+
+def _configure(database_url: str) -> None:
+    # Settings are read on import, so the environment must be ready before
+    # anything under `app` is imported.
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["SQL_INSTRUMENTATION"] = "true"
+    os.environ["SERVER_TIMING_HEADER"] = "true"
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    os.environ.setdefault("SUPERUSER_EMAIL", "admin@benchmark.example.com")
+    os.environ.setdefault("SUPERUSER_PASSWORD", "benchmark-password")
+
+
+def main() -> int:
+    args = _parser().parse_args()
+    _configure(args.database_url)
+    # Slow-request warnings would repeat what the report shows
+    logging.getLogger("app.requests").setLevel(logging.ERROR)
+
+    from sqlalchemy.engine import make_url
+
+    from app.core.password_hashing import password_hasher
+    from app.db.session import engine
+    from benchmarks import report, seed
+
+    dataset = {
+        "organizations": args.organizations,
+        "risks": args.risks,
+        "controls": args.controls,
+        "controls_per_risk": args.controls_per_risk,
+        "random_seed": args.random_seed,
+    }
+    try:
+        if args.command == "seed" or not args.no_seed:
+            print(f"Seeding {dataset}", file=sys.stderr)
+            seed.seed(
+                engine,
+                organizations=args.organizations,
+                risks=args.risks,
+                controls=args.controls,
+                controls_per_risk=args.controls_per_risk,
+                random_seed=args.random_seed,
+            )
+        if args.command == "seed":
+            return 0
+
+        from benchmarks.run import SCENARIOS, run
+
+        scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+        unknown = [name for name in scenarios if name not in SCENARIOS]
+        if unknown:
+            print(f"Unknown scenarios: {', '.join(unknown)}", file=sys.stderr)
+            return 2
+        organizations = seed.load(engine)
+        if not organizations:
+            print("The database holds no benchmark data; run `seed` first", file=sys.stderr)
+            return 2
+
+        results = run(
+            organizations,
+            scenarios,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            warmup=args.warmup,
+            random_seed=args.random_seed,
+            progress=lambda name: print(f"Running {name}", file=sys.stderr),
+        )
+        summaries = {name: result.summary() for name, result in results.items()}
+        print(report.format_table(summaries))
+
+        config = {
+            **dataset,
+            "database": make_url(args.database_url).get_backend_name(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "bcrypt_rounds": password_hasher.rounds,
+        }
+        if args.save:
+            report.save(args.save, config, summaries)
+        if args.compare:
+            regressions = report.compare(
+                summaries, report.load(args.compare), tolerance=args.tolerance
+            )
+            for line in regressions:
+                print(f"REGRESSION {line}")
+            if regressions:
+                return 1
+        return 0
+    finally:
+        password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
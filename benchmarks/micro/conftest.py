@@ -0,0 +1,114 @@
+"""
+Fixtures for the microbenchmarks: an in-memory SQLite database seeded once
+per session with one organization, 100 risks linked to 3 of 20 controls each,
+and a graded form of 10 questions.
+
+Run with `pytest benchmarks/micro` (they are outside the default `testpaths`);
+`--benchmark-autosave` / `--benchmark-compare` track results over time.
+"""
+import random
+from typing import Generator
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.crud.crud_form import form as crud_form
+from app.db.base import Base
+from app.db.models.area import Area
+from app.db.models.control import Control
+from app.db.models.organization import Organization
+from app.db.models.risk import Risk
+from app.db.models.user import User
+from app.schemas.form import FormCreate
+from app.services.grading import answer_key_cache
+from app.services.public_forms import public_form_cache
+
+RISKS = 100
+CONTROLS = 20
+QUESTIONS = 10
+
+engine = create_engine(
+    "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+)
+BenchmarkSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _seed(db: Session) -> None:
+    rng = random.Random(0)
+    org = Organization(name="Benchmark organization")
+    owner = User(
+        organization=org,
+        email="owner@benchmark.example.com",
+        password_hash="x",
+        full_name="Benchmark owner",
+        role="admin",
+    )
+    area = Area(name="Benchmark area", organization=org)
+    db.add(owner)
+    controls = [
+        Control(
+            organization=org,
+            control_code=f"C-{n}",
+            description=f"Control {n}",
+            type="preventive",
+            effectiveness_probability=rng.randint(0, 2),
+            effectiveness_impact=rng.randint(0, 2),
+        )
+        for n in range(CONTROLS)
+    ]
+    for n in range(RISKS):
+        probability, impact = rng.randint(1, 5), rng.randint(1, 5)
+        db.add(
+            Risk(
+                organization=org,
+                area=area,
+                process_name=f"Process {n}",
+                risk_description=f"Risk {n}",
+                inherent_probability=probability,
+                inherent_impact=impact,
+                residual_probability=probability,
+                residual_impact=impact,
+                controls=rng.sample(controls, 3),
+            )
+        )
+    db.commit()
+    crud_form.create_with_questions(
+        db,
+        obj_in=FormCreate(
+            title="Benchmark form",
+            is_graded=True,
+            questions=[
+                {
+                    "text": f"Question {n}",
+                    "question_type": "single_choice",
+                    "points": 1,
+                    "options": [
+                        {"text": f"Option {k}", "is_correct": k == 0} for k in range(4)
+                    ],
+                }
+                for n in range(QUESTIONS)
+            ],
+        ),
+        organization_id=org.id,
+        created_by=owner.id,
+    )
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database() -> Generator:
+    Base.metadata.create_all(bind=engine)
+    with BenchmarkSession() as db:
+        _seed(db)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db() -> Generator:
+    answer_key_cache.clear()
+    public_form_cache.clear()
+    session = BenchmarkSession()
+    yield session
+    session.close()
@@ -0,0 +1,85 @@
+"""Per-call cost of CRUD write paths, each including its commit."""
+from itertools import count
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.crud.crud_area import area as crud_area
+from app.crud.crud_form import submission as crud_submission
+from app.crud.crud_risk import risk as crud_risk
+from app.db.models.area import Area
+from app.db.models.form import Form
+from app.db.models.risk import Risk
+from app.schemas.area import AreaCreate
+from app.schemas.risk import RiskUpdate
+from app.schemas.submission import SubmissionCreate
+from app.services.grading import get_answer_key
+
+
+def test_base_update(benchmark, db: Session) -> None:
+    """`CRUDBase.update`, which encodes the whole object to find its field names."""
+    area = db.scalars(select(Area)).first()
+    names = (f"Area {n}" for n in count())
+
+    benchmark(lambda: crud_area.update(db, db_obj=area, obj_in=AreaCreate(name=next(names))))
+
+
+def test_risk_update(benchmark, db: Session) -> None:
+    """`CRUDRisk.update` with new answers: inherent levels plus residual recompute."""
+    risk = db.scalars(select(Risk)).first()
+    answers = count()
+
+    def update() -> None:
+        level = next(answers) % 4 + 1
+        crud_risk.update(
+            db,
+            db_obj=risk,
+            obj_in=RiskUpdate(
+                prob_question_1=level,
+                prob_question_2=level,
+                prob_question_3=level,
+                imp_question_1=level,
+                imp_question_2=level,
+                imp_question_3=level,
+            ),
+        )
+
+    benchmark(update)
+
+
+def test_create_submission(benchmark, db: Session) -> None:
+    """`CRUDSubmission.create_submission` graded inline, answer key cached."""
+    form = db.scalars(select(Form)).first()
+    key = get_answer_key(db, form)
+    answers = [
+        {"question_id": question_id, "selected_option_id": min(question.options)}
+        for question_id, question in key.questions.items()
+    ]
+    respondents = count()
+
+    def submit() -> None:
+        n = next(respondents)
+        crud_submission.create_submission(
+            db,
+            obj_in=SubmissionCreate(
+                form_id=form.id,
+                respondent_email=f"respondent{n}@benchmark.example.com",
+                respondent_name=f"Respondent {n}",
+                respondent_identifier=f"benchmark-{n}",
+                answers=answers,
+            ),
+            form=form,
+        )
+
+    benchmark(submit)
+
+
+def test_grade(benchmark, db: Session) -> None:
+    """`AnswerKey.grade` alone, without any I/O."""
+    key = get_answer_key(db, db.scalars(select(Form)).first())
+    selected = {
+        question_id: frozenset([min(question.options)])
+        for question_id, question in key.questions.items()
+    }
+
+    benchmark(key.grade, selected)
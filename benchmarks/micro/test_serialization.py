@@ -0,0 +1,35 @@
+"""
+Response serialization of list endpoints, as FastAPI does it: validate the
+ORM objects against the response model, then dump them to JSON.
+"""
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from app.db.models.control import Control
+from app.db.models.risk import Risk
+from app.schemas.control import Control as ControlSchema
+from app.schemas.risk import Risk as RiskSchema
+
+risks_adapter = TypeAdapter(List[RiskSchema])
+controls_adapter = TypeAdapter(List[ControlSchema])
+
+
+def _serialize(adapter: TypeAdapter, objects: list) -> bytes:
+    return adapter.dump_json(adapter.validate_python(objects, from_attributes=True))
+
+
+def test_serialize_risks(benchmark, db: Session) -> None:
+    risks = db.scalars(select(Risk).options(selectinload(Risk.controls))).all()
+
+    body = benchmark(_serialize, risks_adapter, risks)
+    assert body.startswith(b"[{")
+
+
+def test_serialize_controls(benchmark, db: Session) -> None:
+    controls = db.scalars(select(Control).options(selectinload(Control.risks))).all()
+
+    body = benchmark(_serialize, controls_adapter, controls)
+    assert body.startswith(b"[{")
@@ -0,0 +1,105 @@
+"""
+Latency summaries and baseline files.
+
+A baseline is the JSON written by `save`: the run configuration plus one
+summary per endpoint. `compare` flags an endpoint whose p95 grew by more
+than `tolerance` (relative), whose SQL statement count grew at all, or that
+returned errors. Statement counts are deterministic for a given dataset, so
+they catch N+1 regressions in `app/crud` on any machine; latencies are only
+comparable between runs on the same hardware and database.
+"""
+import json
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values; 0 when empty."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class EndpointResult:
+    name: str
+    seconds: float = 0.0
+    errors: int = 0
+    latencies: List[float] = field(default_factory=list)
+    statements: List[int] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        requests = len(latencies)
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "throughput_rps": round(requests / self.seconds, 2) if self.seconds else 0.0,
+            "mean_ms": round(sum(latencies) / requests * 1000, 3) if requests else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "statements_mean": (
+                round(sum(self.statements) / len(self.statements), 2) if self.statements else 0.0
+            ),
+            "statements_max": max(self.statements, default=0),
+        }
+
+
+def format_table(summaries: Dict[str, Dict[str, Any]]) -> str:
+    columns = [
+        ("endpoint", None),
+        ("requests", "requests"),
+        ("errors", "errors"),
+        ("req/s", "throughput_rps"),
+        ("p50 ms", "p50_ms"),
+        ("p95 ms", "p95_ms"),
+        ("p99 ms", "p99_ms"),
+        ("stmts", "statements_mean"),
+    ]
+    rows = [[title for title, _ in columns]]
+    for name, summary in summaries.items():
+        rows.append([name] + [str(summary[key]) for _, key in columns[1:]])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    lines = []
+    for row in rows:
+        cells = [row[0].ljust(widths[0])]
+        cells.extend(cell.rjust(width) for cell, width in zip(row[1:], widths[1:]))
+        lines.append("  ".join(cells))
+    return "\n".join(lines)
+
+
+def save(path: Path, config: Dict[str, Any], summaries: Dict[str, Dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"config": config, "endpoints": summaries}, indent=2) + "\n")
+
+
+def load(path: Path) -> Dict[str, Any]:
+    return json.loads(path.read_text())
+
+
+def compare(
+    summaries: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], *, tolerance: float
+) -> List[str]:
+    """Human-readable regressions against `baseline`; empty when there are none."""
+    regressions = []
+    for name, summary in summaries.items():
+        if summary["errors"]:
+            regressions.append(f"{name}: {summary['errors']} failed requests")
+        previous = baseline["endpoints"].get(name)
+        if previous is None:
+            continue
+        if summary["statements_max"] > previous["statements_max"]:
+            regressions.append(
+                f"{name}: up to {summary['statements_max']} SQL statements per request, "
+                f"baseline {previous['statements_max']}"
+            )
+        if summary["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {summary['p95_ms']} ms, baseline {previous['p95_ms']} ms "
+                f"(+{tolerance:.0%} allowed)"
+            )
+    return regressions
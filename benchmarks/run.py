@@ -0,0 +1,203 @@
+"""
+Drive the API in-process and measure each scenario.
+
+Requests go through `TestClient` against the real application, so routing,
+validation, dependencies, middleware and serialization are all included and
+no server or network is needed. Each worker thread has its own client. The
+number of SQL statements per request is read from the `Server-Timing`
+header written by `SQLInstrumentationMiddleware`.
+"""
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from fastapi.testclient import TestClient
+from httpx import Response
+
+from app.core.config import settings
+from app.main import app
+from benchmarks.report import EndpointResult
+from benchmarks.seed import PASSWORD, SeededOrganization
+
+STATEMENTS = re.compile(r'db;[^,]*desc="(\d+) statements"')
+API = settings.API_V1_STR
+
+
+@dataclass
+class Context:
+    organizations: List[SeededOrganization]
+    headers: List[Dict[str, str]]
+    random_seed: int = 0
+
+    def organization(self, i: int) -> SeededOrganization:
+        return self.organizations[i % len(self.organizations)]
+
+    def auth(self, i: int) -> Dict[str, str]:
+        return self.headers[i % len(self.headers)]
+
+
+Scenario = Callable[[TestClient, Context, int], Response]
+
+
+def login(client: TestClient, ctx: Context, i: int) -> Response:
+    return client.post(
+        f"{API}/login/access-token",
+        data={"username": ctx.organization(i).admin_email, "password": PASSWORD},
+    )
+
+
+def read_risks(client: TestClient, ctx: Context, i: int) -> Response:
+    pages = max(min(len(ctx.organization(i).risk_ids), 2000) // 50, 1)
+    return client.get(
+        f"{API}/risks/",
+        params={"limit": 50, "skip": (i // len(ctx.organizations)) % pages * 50},
+        headers=ctx.auth(i),
+    )
+
+
+def create_risk(client: TestClient, ctx: Context, i: int) -> Response:
+    org = ctx.organization(i)
+    rng = random.Random(ctx.random_seed + i)
+    questions = {
+        name: rng.randint(1, 4)
+        for name in (
+            "prob_question_1",
+            "prob_question_2",
+            "prob_question_3",
+            "imp_question_1",
+            "imp_question_2",
+            "imp_question_3",
+        )
+    }
+    return client.post(
+        f"{API}/risks/",
+        json={
+            "process_name": f"Benchmark process {i}",
+            "risk_description": f"Benchmark risk {i}",
+            "area_id": org.area_id,
+            "control_ids": rng.sample(org.control_ids, min(3, len(org.control_ids))),
+            **questions,
+        },
+        headers=ctx.auth(i),
+    )
+
+
+def update_control(client: TestClient, ctx: Context, i: int) -> Response:
+    org = ctx.organization(i)
+    control_id = org.control_ids[(i // len(ctx.organizations)) % len(org.control_ids)]
+    return client.put(
+        f"{API}/controls/{control_id}",
+        json={"description": f"Updated by benchmark request {i}"},
+        headers=ctx.auth(i),
+    )
+
+
+def submit_form(client: TestClient, ctx: Context, i: int) -> Response:
+    org = ctx.organization(i)
+    return client.post(
+        f"{API}/forms/public/{org.form_id}/submit",
+        json={
+            "form_id": org.form_id,
+            "respondent_email": f"respondent{i}@benchmark.example.com",
+            "respondent_name": f"Respondent {i}",
+            "respondent_identifier": f"benchmark-{i}",
+            "answers": [
+                {"question_id": question_id, "selected_option_id": options[i % len(options)]}
+                for question_id, options in org.questions.items()
+            ],
+        },
+    )
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "login": login,
+    "read_risks": read_risks,
+    "create_risk": create_risk,
+    "update_control": update_control,
+    "submit_form": submit_form,
+}
+
+
+def authenticate(organizations: List[SeededOrganization]) -> List[Dict[str, str]]:
+    headers = []
+    with TestClient(app) as client:
+        for org in organizations:
+            r = client.post(
+                f"{API}/login/access-token",
+                data={"username": org.admin_email, "password": PASSWORD},
+            )
+            r.raise_for_status()
+            headers.append({"Authorization": f"Bearer {r.json()['access_token']}"})
+    return headers
+
+
+def run_scenario(
+    name: str,
+    ctx: Context,
+    *,
+    requests: int,
+    concurrency: int = 1,
+    warmup: int = 5,
+) -> EndpointResult:
+    scenario = SCENARIOS[name]
+    result = EndpointResult(name)
+    local = threading.local()
+    clients: List[TestClient] = []
+    lock = threading.Lock()
+
+    def client() -> TestClient:
+        if not hasattr(local, "client"):
+            local.client = TestClient(app)
+            with lock:
+                clients.append(local.client)
+        return local.client
+
+    def call(i: int) -> None:
+        start = time.perf_counter()
+        response = scenario(client(), ctx, i)
+        elapsed = time.perf_counter() - start
+        match = STATEMENTS.search(response.headers.get("server-timing", ""))
+        with lock:
+            if response.status_code >= 400:
+                result.errors += 1
+            result.latencies.append(elapsed)
+            if match:
+                result.statements.append(int(match.group(1)))
+
+    # Warm-up requests use indices after the measured ones, so they do not
+    # collide with them on unique values (respondent identifiers)
+    for i in range(requests, requests + warmup):
+        scenario(client(), ctx, i)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(requests)))
+    result.seconds = time.perf_counter() - start
+    for c in clients:
+        c.close()
+    return result
+
+
+def run(
+    organizations: List[SeededOrganization],
+    scenarios: List[str],
+    *,
+    requests: int,
+    concurrency: int = 1,
+    warmup: int = 5,
+    random_seed: int = 0,
+    progress: Optional[Callable[[str], None]] = None,
+) -> Dict[str, EndpointResult]:
+    ctx = Context(organizations, authenticate(organizations), random_seed)
+    results = {}
+    for name in scenarios:
+        if progress is not None:
+            progress(name)
+        results[name] = run_scenario(
+            name, ctx, requests=requests, concurrency=concurrency, warmup=warmup
+        )
+    return results
@@ -0,0 +1,261 @@
+"""
+Bulk seeding of a benchmark database.
+
+Each organization gets one admin, one area, `controls` controls, `risks`
+risks linked to `controls_per_risk` controls each, and one active graded
+form. Rows are written with multi-row core INSERTs (`insert(...).returning`
+for the ids that are needed later), chunk by chunk, so seeding 10 x 10 000
+risks takes seconds rather than the minutes the ORM or the API would.
+Generation is driven by a seeded `random.Random`, so two runs with the same
+arguments produce the same data.
+"""
+import random
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.security import get_password_hash
+from app.db.base import Base
+from app.db.models.area import Area
+from app.db.models.control import Control
+from app.db.models.form import Form, Option, Question, QuestionType
+from app.db.models.organization import Organization
+from app.db.models.risk import Risk
+from app.db.models.risk_control import risk_controls
+from app.db.models.user import User
+from app.services.risk_heatmap import refresh_cells
+
+PASSWORD = "benchmark-password"
+CHUNK_SIZE = 1000
+QUESTIONS_PER_FORM = 5
+OPTIONS_PER_QUESTION = 4
+
+
+@dataclass
+class SeededOrganization:
+    id: int
+    admin_email: str
+    area_id: int
+    control_ids: List[int]
+    risk_ids: List[int]
+    form_id: int
+    # question id -> option ids, the first one correct
+    questions: Dict[int, List[int]] = field(default_factory=dict)
+
+
+def _chunks(rows: Iterable[Dict[str, Any]], size: int = CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _insert_returning_ids(db: Session, model: Any, rows: Iterable[Dict[str, Any]]) -> List[int]:
+    ids: List[int] = []
+    for chunk in _chunks(rows):
+        ids.extend(db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), chunk))
+    return ids
+
+
+def _seed_organization(
+    db: Session,
+    rng: random.Random,
+    index: int,
+    *,
+    risks: int,
+    controls: int,
+    controls_per_risk: int,
+    password_hash: str,
+) -> SeededOrganization:
+    (org_id,) = _insert_returning_ids(
+        db, Organization, [{"name": f"Benchmark organization {index}", "is_active": True}]
+    )
+    admin_email = f"admin{index}@benchmark.example.com"
+    (admin_id,) = _insert_returning_ids(
+        db,
+        User,
+        [
+            {
+                "organization_id": org_id,
+                "email": admin_email,
+                "password_hash": password_hash,
+                "full_name": f"Benchmark admin {index}",
+                "role": "admin",
+                "is_active": True,
+                "is_superuser": False,
+            }
+        ],
+    )
+    (area_id,) = _insert_returning_ids(
+        db, Area, [{"name": f"Area {index}", "organization_id": org_id}]
+    )
+    control_ids = _insert_returning_ids(
+        db,
+        Control,
+        (
+            {
+                "organization_id": org_id,
+                "control_code": f"C-{index}-{n}",
+                "description": f"Control {n} of organization {index}",
+                "type": rng.choice(["preventive", "detective", "corrective"]),
+                "effectiveness_probability": rng.randint(0, 2),
+                "effectiveness_impact": rng.randint(0, 2),
+                "owner_id": admin_id,
+            }
+            for n in range(controls)
+        ),
+    )
+    risk_rows = []
+    for n in range(risks):
+        probability, impact = rng.randint(1, 5), rng.randint(1, 5)
+        risk_rows.append(
+            {
+                "organization_id": org_id,
+                "area_id": area_id,
+                "process_name": f"Process {n % 50}",
+                "risk_description": f"Risk {n} of organization {index}",
+                "inherent_probability": probability,
+                "inherent_impact": impact,
+                "residual_probability": max(probability - 1, 1),
+                "residual_impact": max(impact - 1, 1),
+                "owner_id": admin_id,
+            }
+        )
+    risk_ids = _insert_returning_ids(db, Risk, risk_rows)
+    links = (
+        {"risk_id": risk_id, "control_id": control_id}
+        for risk_id in risk_ids
+        for control_id in rng.sample(control_ids, min(controls_per_risk, len(control_ids)))
+    )
+    for chunk in _chunks(links):
+        db.execute(insert(risk_controls), chunk)
+
+    (form_id,) = _insert_returning_ids(
+        db,
+        Form,
+        [
+            {
+                "title": f"Benchmark form {index}",
+                "organization_id": org_id,
+                "created_by": admin_id,
+                "is_active": True,
+                "is_graded": True,
+                "version": 1,
+            }
+        ],
+    )
+    question_ids = _insert_returning_ids(
+        db,
+        Question,
+        (
+            {
+                "form_id": form_id,
+                "text": f"Question {n}",
+                "question_type": QuestionType.single_choice,
+                "points": 1,
+                "order_index": n,
+            }
+            for n in range(QUESTIONS_PER_FORM)
+        ),
+    )
+    questions: Dict[int, List[int]] = {}
+    for question_id in question_ids:
+        questions[question_id] = _insert_returning_ids(
+            db,
+            Option,
+            (
+                {"question_id": question_id, "text": f"Option {n}", "is_correct": n == 0}
+                for n in range(OPTIONS_PER_QUESTION)
+            ),
+        )
+    return SeededOrganization(
+        id=org_id,
+        admin_email=admin_email,
+        area_id=area_id,
+        control_ids=control_ids,
+        risk_ids=risk_ids,
+        form_id=form_id,
+        questions=questions,
+    )
+
+
+def seed(
+    engine: Engine,
+    *,
+    organizations: int,
+    risks: int,
+    controls: int,
+    controls_per_risk: int = 3,
+    random_seed: int = 0,
+) -> List[SeededOrganization]:
+    """Recreate every table on `engine` and fill it; one transaction per organization."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(random_seed)
+    password_hash = get_password_hash(PASSWORD)
+    seeded = []
+    with Session(engine) as db:
+        for index in range(organizations):
+            seeded.append(
+                _seed_organization(
+                    db,
+                    rng,
+                    index,
+                    risks=risks,
+                    controls=controls,
+                    controls_per_risk=controls_per_risk,
+                    password_hash=password_hash,
+                )
+            )
+            db.commit()
+        refresh_cells(db)
+        db.commit()
+    return seeded
+
+
+def load(engine: Engine) -> List[SeededOrganization]:
+    """Read back the organizations written by `seed`, in seeding order."""
+    with Session(engine) as db:
+        organizations = list(db.scalars(select(Organization.id).order_by(Organization.id)))
+        seeded = []
+        for org_id in organizations:
+            admin_email = db.scalar(
+                select(User.email).where(User.organization_id == org_id, User.role == "admin")
+            )
+            area_id = db.scalar(select(Area.id).where(Area.organization_id == org_id))
+            form_id = db.scalar(select(Form.id).where(Form.organization_id == org_id))
+            if admin_email is None or area_id is None or form_id is None:
+                continue
+            questions: Dict[int, List[int]] = {}
+            for question_id, option_id in db.execute(
+                select(Question.id, Option.id)
+                .join(Option, Option.question_id == Question.id)
+                .where(Question.form_id == form_id)
+                .order_by(Question.id, Option.id)
+            ):
+                questions.setdefault(question_id, []).append(option_id)
+            seeded.append(
+                SeededOrganization(
+                    id=org_id,
+                    admin_email=admin_email,
+                    area_id=area_id,
+                    control_ids=list(
+                        db.scalars(
+                            select(Control.id)
+                            .where(Control.organization_id == org_id)
+                            .order_by(Control.id)
+                        )
+                    ),
+                    risk_ids=list(
+                        db.scalars(
+                            select(Risk.id).where(Risk.organization_id == org_id).order_by(Risk.id)
+                        )
+                    ),
+                    form_id=form_id,
+                    questions=questions,
+                )
+            )
+    return seeded
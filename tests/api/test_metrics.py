@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import Histogram
+from app.core.prometheus import Exposition
+from tests.utils.organization import create_org_admin_headers
+
+
+def _samples(body: str) -> dict:
+    samples = {}
+    for line in body.splitlines():
+        if line and not line.startswith("#"):
+            name, _, value = line.rpartition(" ")
+            samples[name] = float(value)
+    return samples
+
+
+def test_exposition_format() -> None:
+    histogram = Histogram((0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(2)
+    exposition = Exposition()
+    exposition.counter("requests_total", "Requests", [({"route": 'a"b'}, 3)])
+    exposition.histogram("latency_seconds", "Latency", [({"route": "/"}, histogram.snapshot())])
+    body = exposition.render()
+    assert "# TYPE requests_total counter" in body
+    assert 'requests_total{route="a\\"b"} 3' in body
+    assert 'latency_seconds_bucket{route="/",le="0.1"} 1' in body
+    assert 'latency_seconds_bucket{route="/",le="+Inf"} 2' in body
+    assert 'latency_seconds_count{route="/"} 2' in body
+
+
+def test_metrics_endpoint(client: TestClient, db: Session) -> None:
+    headers = create_org_admin_headers(client=client, db=db)
+    route = f"{settings.API_V1_STR}/users/{{user_id}}"
+    before = _samples(client.get("/metrics").text)
+    client.get(f"{settings.API_V1_STR}/users/999999", headers=headers)
+    client.get(f"{settings.API_V1_STR}/no-such-path")
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = _samples(r.text)
+
+    key = f'http_requests_total{{method="GET",route="{route}",status="404"}}'
+    assert after[key] - before.get(key, 0) == 1
+    count = f'http_request_duration_seconds_count{{method="GET",route="{route}"}}'
+    assert after[count] - before.get(count, 0) == 1
+    unmatched = 'http_requests_total{method="GET",route="unmatched",status="404"}'
+    assert after[unmatched] - before.get(unmatched, 0) == 1
+    # The scrape itself is in flight while rendering
+    assert after["http_requests_in_progress"] >= 1
+    assert 'db_pool_connects_total{pool="sync"}' in after
+    assert "password_hash_rejected_total" in after
+    assert "grading_queue_pending" in after
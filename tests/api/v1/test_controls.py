@@ -2,6 +2,7 @@ from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from tests.utils.organization import create_org_admin_headers
 from tests.utils.user import authentication_token_from_email
 from tests.utils.utils import random_lower_string, random_email
 
@@ -106,3 +107,29 @@ def test_update_control(client: TestClient, db: Session) -> None:
     content = response.json()
     assert content["description"] == update_data["description"]
 
+
+
+def test_read_controls_with_total(client: TestClient, db: Session) -> None:
+    headers = create_org_admin_headers(client=client, db=db)
+    for _ in range(2):
+        control_data = {
+            "description": random_lower_string(),
+            "type": "Manual",
+            "eff_prob_question_1": 1.0,
+            "eff_prob_question_2": 1.0,
+            "eff_prob_question_3": 1.0,
+            "eff_imp_question_1": 1.0,
+            "eff_imp_question_2": 1.0,
+            "eff_imp_question_3": 1.0,
+        }
+        client.post(f"{settings.API_V1_STR}/controls/", headers=headers, json=control_data)
+
+    response = client.get(
+        f"{settings.API_V1_STR}/controls/", headers=headers, params={"limit": 1, "count": "auto"}
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert len(page["items"]) == 1
+    assert page["total"] == 2
+    assert page["has_more"] is True
+    assert page["next_cursor"]
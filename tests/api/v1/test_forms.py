@@ -0,0 +1,207 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from tests.utils.organization import create_org_admin_headers
+from tests.utils.utils import random_email, random_lower_string
+
+
+def test_public_submit_and_status(client: TestClient, db: Session) -> None:
+    headers = create_org_admin_headers(client=client, db=db)
+    form_data = {
+        "title": random_lower_string(),
+        "is_graded": True,
+        "questions": [
+            {
+                "text": "q1",
+                "question_type": "single_choice",
+                "points": 1,
+                "options": [
+                    {"text": "yes", "is_correct": True},
+                    {"text": "no", "is_correct": False},
+                ],
+            }
+        ],
+    }
+    r = client.post(f"{settings.API_V1_STR}/forms/", headers=headers, json=form_data)
+    assert r.status_code == 200
+    form = r.json()
+    question = form["questions"][0]
+    correct = next(o for o in question["options"] if o["is_correct"])
+
+    submission_in = {
+        "form_id": form["id"],
+        "respondent_email": random_email(),
+        "respondent_name": random_lower_string(),
+        "respondent_identifier": "123",
+        "answers": [{"question_id": question["id"], "selected_option_id": correct["id"]}],
+    }
+    url = f"{settings.API_V1_STR}/forms/public/{form['id']}"
+    r = client.post(f"{url}/submit", json=submission_in)
+    assert r.status_code == 200
+    submission = r.json()
+    assert submission["score"] == 100.0
+    assert submission["grading_status"] == "graded"
+    assert submission["answers"][0]["selected_option_id"] == correct["id"]
+
+    status_url = f"{url}/submissions/{submission['id']}/status"
+    r = client.get(status_url, params={"respondent_identifier": "123"})
+    assert r.status_code == 200
+    assert r.json() == {
+        "id": submission["id"], "grading_status": "graded", "score": 100.0, "passed": True
+    }
+    assert client.get(status_url, params={"respondent_identifier": "999"}).status_code == 404
+
+    # Options of other questions are rejected
+    bad = {**submission_in, "answers": [{"question_id": question["id"], "selected_option_id": -1}]}
+    assert client.post(f"{url}/submit", json=bad).status_code == 400
+
+
+def test_public_form_structure_etag(client: TestClient, db: Session) -> None:
+    from app.crud import crud_form
+
+    headers = create_org_admin_headers(client=client, db=db)
+    form_data = {
+        "title": random_lower_string(),
+        "questions": [
+            {
+                "text": "q1",
+                "question_type": "single_choice",
+                "options": [{"text": "yes", "is_correct": True}],
+            }
+        ],
+    }
+    form_id = client.post(f"{settings.API_V1_STR}/forms/", headers=headers, json=form_data).json()["id"]
+    url = f"{settings.API_V1_STR}/forms/public/{form_id}/structure"
+
+    r = client.get(url)
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    (option,) = r.json()["questions"][0]["options"]
+    assert option["text"] == "yes" and "is_correct" not in option
+
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert client.get(url, headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+
+    # Updating the form invalidates the cached payload and its ETag
+    form = crud_form.form.get(db, id=form_id)
+    crud_form.form.update_with_questions(db, db_obj=form, obj_in={"title": "renamed"})
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["title"] == "renamed"
+    assert r.headers["etag"] != etag
+
+    assert client.get(f"{settings.API_V1_STR}/forms/public/0/structure").status_code == 404
+
+
+def test_public_form_structure_follows_version(client: TestClient, db: Session) -> None:
+    from app.db.models.form import Form
+    from app.services import public_forms
+
+    headers = create_org_admin_headers(client=client, db=db)
+    form_data = {"title": random_lower_string(), "questions": []}
+    form_id = client.post(f"{settings.API_V1_STR}/forms/", headers=headers, json=form_data).json()["id"]
+    url = f"{settings.API_V1_STR}/forms/public/{form_id}/structure"
+    stale = public_forms.get_public_form(db, form_id)
+    assert client.get(url).headers["etag"] == stale.etag
+
+    # Updated by another worker: this process's entry is not invalidated
+    db.execute(
+        update(Form).where(Form.id == form_id).values(title="renamed", version=Form.version + 1)
+    )
+    r = client.get(url)
+    assert r.json()["title"] == "renamed"
+    etag = r.headers["etag"]
+
+    # A request that loaded the form before the update caches it afterwards
+    public_forms.public_form_cache.set(form_id, stale)
+    r = client.get(url)
+    assert r.json()["title"] == "renamed"
+    assert r.headers["etag"] == etag
+
+
+def test_form_stats_and_submissions(client: TestClient, db: Session) -> None:
+    headers = create_org_admin_headers(client=client, db=db)
+    form_data = {
+        "title": random_lower_string(),
+        "is_graded": True,
+        "questions": [
+            {
+                "text": "single",
+                "question_type": "single_choice",
+                "points": 1,
+                "options": [{"text": "yes", "is_correct": True}, {"text": "no"}],
+            },
+            {
+                "text": "multiple",
+                "question_type": "multiple_choice",
+                "points": 1,
+                "options": [
+                    {"text": "a", "is_correct": True},
+                    {"text": "b", "is_correct": True},
+                    {"text": "c"},
+                ],
+            },
+            {"text": "free", "question_type": "text"},
+        ],
+    }
+    form = client.post(f"{settings.API_V1_STR}/forms/", headers=headers, json=form_data).json()
+    single, multiple, free = form["questions"]
+    yes, no = (o["id"] for o in single["options"])
+    a, b, c = (o["id"] for o in multiple["options"])
+
+    def submit(*answers) -> None:
+        r = client.post(
+            f"{settings.API_V1_STR}/forms/public/{form['id']}/submit",
+            json={
+                "form_id": form["id"],
+                "respondent_email": random_email(),
+                "respondent_name": random_lower_string(),
+                "respondent_identifier": random_lower_string(),
+                "answers": list(answers),
+            },
+        )
+        assert r.status_code == 200
+
+    submit(  # 100
+        {"question_id": single["id"], "selected_option_id": yes},
+        {"question_id": multiple["id"], "selected_option_id": a},
+        {"question_id": multiple["id"], "selected_option_id": b},
+        {"question_id": free["id"], "text_value": "x"},
+    )
+    submit(  # 50
+        {"question_id": single["id"], "selected_option_id": yes},
+        {"question_id": multiple["id"], "selected_option_id": a},
+    )
+    submit(  # 0
+        {"question_id": single["id"], "selected_option_id": no},
+        {"question_id": multiple["id"], "selected_option_id": a},
+        {"question_id": multiple["id"], "selected_option_id": b},
+        {"question_id": multiple["id"], "selected_option_id": c},
+    )
+
+    r = client.get(f"{settings.API_V1_STR}/forms/{form['id']}/stats", headers=headers)
+    assert r.status_code == 200
+    stats = r.json()
+    assert stats["total_submissions"] == stats["graded_submissions"] == 3
+    assert stats["average_score"] == 50.0
+    assert stats["pass_rate"] == 1 / 3
+    histogram = {bucket["min_score"]: bucket["count"] for bucket in stats["score_histogram"]}
+    assert (histogram[0.0], histogram[50.0], histogram[90.0], sum(histogram.values())) == (1, 1, 1, 3)
+    assert stats["questions"] == [
+        {"question_id": single["id"], "answered": 3, "correct": 2, "correct_rate": 2 / 3},
+        {"question_id": multiple["id"], "answered": 3, "correct": 1, "correct_rate": 1 / 3},
+        {"question_id": free["id"], "answered": 1, "correct": None, "correct_rate": None},
+    ]
+
+    url = f"{settings.API_V1_STR}/forms/{form['id']}/submissions"
+    r = client.get(url, headers=headers, params={"limit": 2, "envelope": True, "count": "exact"})
+    page = r.json()
+    assert page["total"] == 3
+    assert len(page["items"]) == 2
+    assert len(page["items"][0]["answers"]) == 4
+    r = client.get(url, headers=headers, params={"limit": 2, "cursor": page["next_cursor"]})
+    assert [s["score"] for s in r.json()["items"]] == [0.0]
@@ -1,10 +1,13 @@
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.password_hashing import PasswordHashingBusy, _context, password_hasher
 from app.crud.crud_user import user as crud_user
 from app.schemas.user import UserCreate
 from app.db.models.organization import Organization
+from tests.utils.user import authentication_token_from_email, user_authentication_headers
 from tests.utils.utils import random_email, random_lower_string
 
 def _ensure_org(db: Session) -> int:
@@ -64,3 +67,167 @@ def test_use_access_token(client: TestClient, db: Session) -> None:
     assert r.status_code == 200
     assert r.json()["email"] == username
 
+
+
+def _user_selects(db: Session):
+    statements = []
+
+    @event.listens_for(db.connection(), "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    return statements
+
+
+def test_principal_is_cached(client: TestClient, db: Session) -> None:
+    headers = authentication_token_from_email(client=client, email=random_email(), db=db)
+    client.get(f"{settings.API_V1_STR}/risks/", headers=headers)
+
+    user_selects = _user_selects(db)
+    for _ in range(3):
+        r = client.get(f"{settings.API_V1_STR}/risks/", headers=headers)
+        assert r.status_code == 200
+    assert user_selects == []
+
+
+def test_token_claims_and_deactivation(
+    client: TestClient, db: Session, monkeypatch
+) -> None:
+    monkeypatch.setattr(settings, "AUTH_TOKEN_CLAIMS", True)
+    admin_headers = authentication_token_from_email(client=client, email=random_email(), db=db)
+    username = random_email()
+    password = random_lower_string()
+    user = crud_user.create(
+        db,
+        obj_in=UserCreate(
+            email=username,
+            password=password,
+            role="user",
+            organization_id=_ensure_org(db),
+            full_name=random_lower_string(),
+        ),
+    )
+    headers = user_authentication_headers(client=client, email=username, password=password)
+
+    user_selects = _user_selects(db)
+    r = client.get(f"{settings.API_V1_STR}/risks/", headers=headers)
+    assert r.status_code == 200
+    assert user_selects == []
+
+    r = client.delete(f"{settings.API_V1_STR}/users/{user.id}", headers=admin_headers)
+    assert r.status_code == 200
+    r = client.get(f"{settings.API_V1_STR}/risks/", headers=headers)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Inactive user"
+
+
+def test_login_rehashes_outdated_password(client: TestClient, db: Session) -> None:
+    username = random_email()
+    password = random_lower_string()
+    user = crud_user.create(
+        db,
+        obj_in=UserCreate(
+            email=username,
+            password=password,
+            role="user",
+            organization_id=_ensure_org(db),
+            full_name=random_lower_string(),
+        ),
+    )
+    user.password_hash = _context(4).hash(password)
+    db.commit()
+
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": username, "password": password},
+    )
+    assert r.status_code == 200
+    db.refresh(user)
+    assert user.password_hash.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+
+
+def test_login_returns_429_when_hashing_saturated(
+    client: TestClient, db: Session, monkeypatch
+) -> None:
+    def busy(*args):
+        raise PasswordHashingBusy()
+
+    monkeypatch.setattr(password_hasher, "verify_and_update", busy)
+    email = random_email()
+    crud_user.create(
+        db,
+        obj_in=UserCreate(
+            email=email,
+            password="x",
+            role="user",
+            organization_id=_ensure_org(db),
+            full_name=random_lower_string(),
+        ),
+    )
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token", data={"username": email, "password": "x"}
+    )
+    assert r.status_code == 429
+    assert r.headers["Retry-After"] == "1"
+
+
+def _login(client: TestClient, db: Session) -> dict:
+    username = random_email()
+    password = random_lower_string()
+    user = crud_user.create(
+        db,
+        obj_in=UserCreate(
+            email=username,
+            password=password,
+            role="user",
+            organization_id=_ensure_org(db),
+            full_name=random_lower_string(),
+        ),
+    )
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": username, "password": password},
+    )
+    assert r.status_code == 200
+    return {"user": user, **r.json()}
+
+
+def test_refresh_token_rotation(client: TestClient, db: Session) -> None:
+    tokens = _login(client, db)
+    url = f"{settings.API_V1_STR}/login/refresh-token"
+
+    r = client.post(url, json={"refresh_token": tokens["refresh_token"]})
+    assert r.status_code == 200
+    rotated = r.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    headers = {"Authorization": f"Bearer {rotated['access_token']}"}
+    assert client.get(f"{settings.API_V1_STR}/users/me", headers=headers).status_code == 200
+
+    # Refresh tokens are not accepted as access tokens
+    headers = {"Authorization": f"Bearer {rotated['refresh_token']}"}
+    assert client.get(f"{settings.API_V1_STR}/users/me", headers=headers).status_code == 403
+    # ...nor access tokens as refresh tokens
+    r = client.post(url, json={"refresh_token": rotated["access_token"]})
+    assert r.status_code == 401
+
+    # Reusing a rotated token revokes the whole session
+    r = client.post(url, json={"refresh_token": tokens["refresh_token"]})
+    assert r.status_code == 401
+    r = client.post(url, json={"refresh_token": rotated["refresh_token"]})
+    assert r.status_code == 401
+    assert r.json()["detail"] == "Refresh token revoked"
+
+
+def test_logout_and_inactive_user(client: TestClient, db: Session) -> None:
+    url = f"{settings.API_V1_STR}/login/refresh-token"
+    tokens = _login(client, db)
+    r = client.post(
+        f"{settings.API_V1_STR}/login/logout", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert r.status_code == 204
+    assert client.post(url, json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+    tokens = _login(client, db)
+    crud_user.remove(db, id=tokens["user"].id)
+    assert client.post(url, json={"refresh_token": tokens["refresh_token"]}).status_code == 401
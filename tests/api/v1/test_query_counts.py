@@ -0,0 +1,102 @@
+"""
+Statement budgets for list endpoints.
+
+Each endpoint must issue the same, fixed number of SQL statements whatever
+the page size: a relationship serialized per row without a loader profile
+(see `app.crud.loaders`) shows up as a count that grows with `limit`.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.area import Area
+from app.db.models.control import Control
+from app.db.models.form import Answer, Form, FormSubmission, Option, Question, QuestionType
+from app.db.models.risk import Risk
+from app.db.models.user import User
+from tests.utils.organization import create_org_admin_headers
+from tests.utils.queries import count_queries
+from tests.utils.utils import random_email, random_lower_string
+
+ROWS = 12
+# Endpoint -> maximum number of statements per request
+BUDGETS = {
+    "/risks/": 2,  # risks, controls
+    "/controls/": 2,  # controls, risks
+    "/forms/": 3,  # forms, questions, options
+    "/forms/{form_id}/submissions": 3,  # form, submissions, answers
+    "/users/": 1,
+}
+
+
+def _seed(db: Session, organization_id: int, owner_id: int) -> int:
+    area = Area(name=random_lower_string(), organization_id=organization_id)
+    controls = [
+        Control(
+            organization_id=organization_id,
+            description=random_lower_string(),
+            type="preventive",
+        )
+        for _ in range(ROWS)
+    ]
+    for i in range(ROWS):
+        db.add(
+            Risk(
+                organization_id=organization_id,
+                area=area,
+                process_name=random_lower_string(),
+                risk_description=random_lower_string(),
+                inherent_probability=2,
+                inherent_impact=2,
+                controls=[controls[(i + k) % ROWS] for k in range(3)],
+            )
+        )
+    for _ in range(ROWS):
+        db.add(
+            User(
+                organization_id=organization_id,
+                email=random_email(),
+                password_hash="x",
+                full_name=random_lower_string(),
+            )
+        )
+    forms = []
+    for _ in range(ROWS):
+        form = Form(title=random_lower_string(), organization_id=organization_id, created_by=owner_id)
+        for _ in range(2):
+            question = Question(form=form, text="q", question_type=QuestionType.single_choice)
+            Option(question=question, text="a", is_correct=True)
+        forms.append(form)
+    db.add_all(forms)
+    question = forms[0].questions[0]
+    for _ in range(ROWS):
+        submission = FormSubmission(
+            form=forms[0],
+            respondent_email=random_email(),
+            respondent_name="r",
+            respondent_identifier=random_lower_string(),
+        )
+        Answer(submission=submission, question=question, selected_option=question.options[0])
+        db.add(submission)
+    db.flush()
+    return forms[0].id
+
+
+@pytest.mark.parametrize("path", sorted(BUDGETS))
+def test_list_endpoint_statement_budget(client: TestClient, db: Session, path: str) -> None:
+    headers = create_org_admin_headers(client=client, db=db)
+    me = client.get(f"{settings.API_V1_STR}/users/me", headers=headers).json()
+    form_id = _seed(db, me["organization_id"], me["id"])
+    db.expire_all()
+    url = settings.API_V1_STR + path.format(form_id=form_id)
+
+    counts = []
+    for limit in (1, ROWS):
+        with count_queries(db) as statements:
+            r = client.get(url, headers=headers, params={"limit": limit})
+        assert r.status_code == 200
+        assert len(r.json()) == limit
+        counts.append(len(statements))
+    assert counts[0] == counts[1], f"{path}: statements grow with page size: {counts}"
+    assert counts[1] <= BUDGETS[path], f"{path}: {counts[1]} statements:\n" + "\n".join(statements)
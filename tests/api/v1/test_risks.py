@@ -2,6 +2,8 @@ from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.crud import crud_control, crud_risk
+from tests.utils.organization import create_area, create_org_admin_headers
 from tests.utils.user import authentication_token_from_email
 from tests.utils.utils import random_lower_string, random_email
 
@@ -117,3 +119,477 @@ def test_update_risk(client: TestClient, db: Session) -> None:
     content = response.json()
     assert content["process_name"] == update_data["process_name"]
 
+
+def test_score_risks_batch(client: TestClient, db: Session) -> None:
+    headers = create_org_admin_headers(client=client, db=db)
+    control_data = {
+        "description": random_lower_string(),
+        "type": "Manual",
+        "eff_prob_question_1": 1.0,
+        "eff_prob_question_2": 1.0,
+        "eff_prob_question_3": 1.0,
+        "eff_imp_question_1": 1.0,
+        "eff_imp_question_2": 1.0,
+        "eff_imp_question_3": 1.0
+    }
+    control_id = client.post(
+        f"{settings.API_V1_STR}/controls/", headers=headers, json=control_data
+    ).json()["id"]
+
+    answers = {f"{kind}_question_{i}": 3 for kind in ("prob", "imp") for i in (1, 2, 3)}
+    batch = {"items": [answers, {**answers, "control_ids": [control_id]}]}
+    response = client.post(
+        f"{settings.API_V1_STR}/risks/score:batch", headers=headers, json=batch
+    )
+    assert response.status_code == 200
+    first, second = response.json()["items"]
+    assert first["inherent_probability"] == 3
+    assert first["residual_probability"] == 3
+    assert second["residual_probability"] == 2
+    assert second["residual_impact"] == 2
+
+def _import_csv(area_id: int, control_id: int) -> bytes:
+    header = "process_name,risk_description,area_id,prob_question_1,prob_question_2,prob_question_3,imp_question_1,imp_question_2,imp_question_3,control_ids"
+    rows = [
+        f"p1,d1,{area_id},4,4,4,2,2,2,{control_id}",
+        f"p2,d2,{area_id},5,4,4,2,2,2,",
+        f"p3,d3,999999,1,1,1,1,1,1,",
+        "",
+        f"p4,d4,{area_id},1,2,3,1,2,3,{control_id};424242",
+        f"p5,d5,{area_id},1,1,1,1,1,1,",
+    ]
+    return "\n".join([header] + rows).encode()
+
+def test_import_risks_csv(client: TestClient, db: Session) -> None:
+    headers = create_org_admin_headers(client=client, db=db)
+    area_id = create_area(client=client, headers=headers)
+    control_data = {
+        "description": random_lower_string(),
+        "type": "Manual",
+        "eff_prob_question_1": 1.0,
+        "eff_prob_question_2": 1.0,
+        "eff_prob_question_3": 1.0,
+        "eff_imp_question_1": 1.0,
+        "eff_imp_question_2": 1.0,
+        "eff_imp_question_3": 1.0
+    }
+    control_id = client.post(
+        f"{settings.API_V1_STR}/controls/", headers=headers, json=control_data
+    ).json()["id"]
+
+    response = client.post(
+        f"{settings.API_V1_STR}/risks/import",
+        headers=headers,
+        files={"file": ("register.csv", _import_csv(area_id, control_id), "text/csv")},
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["total_rows"] == 5
+    assert report["created"] == 2
+    assert report["failed"] == 3
+    assert [e["row"] for e in report["errors"]] == [3, 4, 6]
+
+    risks = client.get(
+        f"{settings.API_V1_STR}/risks/", headers=headers, params={"search": "d1"}
+    ).json()
+    imported = next(r for r in risks if r["process_name"] == "p1")
+    assert imported["inherent_probability"] == 4
+    assert imported["residual_probability"] == 3
+    assert [c["id"] for c in imported["controls"]] == [control_id]
+
+def test_import_risks_xlsx(client: TestClient, db: Session) -> None:
+    from io import BytesIO
+    from openpyxl import Workbook
+
+    headers = create_org_admin_headers(client=client, db=db)
+    area_id = create_area(client=client, headers=headers)
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["process_name", "risk_description", "area_id"] + [f"{k}_question_{i}" for k in ("prob", "imp") for i in (1, 2, 3)])
+    sheet.append(["x1", "y1", area_id, 2, 2, 2, 3, 3, 3])
+    sheet.append(["x2", "y2", area_id, 2, 2, 2, 3, 3, None])
+    buffer = BytesIO()
+    workbook.save(buffer)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/risks/import",
+        headers=headers,
+        files={"file": ("register.xlsx", buffer.getvalue(), "application/octet-stream")},
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["created"] == 1
+    assert report["errors"][0]["row"] == 3
+    assert report["errors"][0]["errors"][0].startswith("imp_question_3")
+
+def test_import_risks_rejects_unknown_format(client: TestClient, db: Session) -> None:
+    headers = create_org_admin_headers(client=client, db=db)
+    response = client.post(
+        f"{settings.API_V1_STR}/risks/import",
+        headers=headers,
+        files={"file": ("register.txt", b"nope", "text/plain")},
+    )
+    assert response.status_code == 415
+
+
+def test_read_risks_cursor_pagination(client: TestClient, db: Session) -> None:
+    headers = create_org_admin_headers(client=client, db=db)
+    area_id = create_area(client=client, headers=headers)
+    for name in ["b", "a", "c", "a", "d"]:
+        risk_data = {
+            "process_name": name,
+            "risk_description": random_lower_string(),
+            "area_id": area_id,
+            "prob_question_1": 2,
+            "prob_question_2": 2,
+            "prob_question_3": 2,
+            "imp_question_1": 2,
+            "imp_question_2": 2,
+            "imp_question_3": 2,
+        }
+        client.post(f"{settings.API_V1_STR}/risks/", headers=headers, json=risk_data)
+
+    url = f"{settings.API_V1_STR}/risks/"
+    params = {"limit": 2, "sort": "-process_name", "envelope": True}
+    seen = []
+    while True:
+        response = client.get(url, headers=headers, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend(page["items"])
+        if not page["next_cursor"]:
+            break
+        params = {"limit": 2, "sort": "-process_name", "cursor": page["next_cursor"]}
+
+    assert [r["process_name"] for r in seen] == ["d", "c", "b", "a", "a"]
+    assert len({r["id"] for r in seen}) == 5
+
+    response = client.get(url, headers=headers, params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    # A cursor is bound to the sort it was issued for
+    response = client.get(
+        url, headers=headers, params={"sort": "process_name", "cursor": params["cursor"]}
+    )
+    assert response.status_code == 400
+
+
+def test_read_risks_with_total(client: TestClient, db: Session) -> None:
+    headers = create_org_admin_headers(client=client, db=db)
+    area_id = create_area(client=client, headers=headers)
+    for _ in range(3):
+        risk_data = {
+            "process_name": random_lower_string(),
+            "risk_description": random_lower_string(),
+            "area_id": area_id,
+            "prob_question_1": 2,
+            "prob_question_2": 2,
+            "prob_question_3": 2,
+            "imp_question_1": 2,
+            "imp_question_2": 2,
+            "imp_question_3": 2,
+        }
+        client.post(f"{settings.API_V1_STR}/risks/", headers=headers, json=risk_data)
+
+    url = f"{settings.API_V1_STR}/risks/"
+    response = client.get(url, headers=headers, params={"limit": 2, "count": "exact"})
+    assert response.status_code == 200
+    page = response.json()
+    assert len(page["items"]) == 2
+    assert page["total"] == 3
+    assert page["total_estimated"] is False
+    assert page["has_more"] is True
+
+    # SQLite has no planner estimate, so "estimated" falls back to an exact count
+    response = client.get(url, headers=headers, params={"limit": 5, "count": "estimated"})
+    page = response.json()
+    assert page["total"] == 3
+    assert page["has_more"] is False
+
+    response = client.get(url, headers=headers, params={"count": "bogus"})
+    assert response.status_code == 422
+
+
+def test_read_risks_sparse_fields(client: TestClient, db: Session) -> None:
+    headers = create_org_admin_headers(client=client, db=db)
+    area_id = create_area(client=client, headers=headers)
+    control_data = {
+        "description": random_lower_string(),
+        "type": "Manual",
+        "eff_prob_question_1": 1.0,
+        "eff_prob_question_2": 1.0,
+        "eff_prob_question_3": 1.0,
+        "eff_imp_question_1": 1.0,
+        "eff_imp_question_2": 1.0,
+        "eff_imp_question_3": 1.0,
+    }
+    r = client.post(f"{settings.API_V1_STR}/controls/", headers=headers, json=control_data)
+    control_id = r.json()["id"]
+    risk_data = {
+        "process_name": random_lower_string(),
+        "risk_description": random_lower_string(),
+        "area_id": area_id,
+        "prob_question_1": 2,
+        "prob_question_2": 2,
+        "prob_question_3": 2,
+        "imp_question_1": 2,
+        "imp_question_2": 2,
+        "imp_question_3": 2,
+        "control_ids": [control_id],
+    }
+    r = client.post(f"{settings.API_V1_STR}/risks/", headers=headers, json=risk_data)
+    risk_id = r.json()["id"]
+
+    url = f"{settings.API_V1_STR}/risks/"
+    response = client.get(
+        url,
+        headers=headers,
+        params={"fields": "id,process_name,controls.id", "search": risk_data["process_name"]},
+    )
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": risk_id, "process_name": risk_data["process_name"], "controls": [{"id": control_id}]}
+    ]
+
+    response = client.get(
+        url,
+        headers=headers,
+        params={"fields": "id", "search": risk_data["process_name"], "envelope": True},
+    )
+    assert response.json()["items"] == [{"id": risk_id}]
+
+    for fields in ["id,organization", "controls.password", "id,owner_id"]:
+        response = client.get(url, headers=headers, params={"fields": fields})
+        assert response.status_code == 400
+
+
+def test_read_sparse_fields_relations_only(client: TestClient, db: Session) -> None:
+    headers = create_org_admin_headers(client=client, db=db)
+    area_id = create_area(client=client, headers=headers)
+    control_data = {
+        "description": random_lower_string(),
+        "type": "Manual",
+        "eff_prob_question_1": 1.0,
+        "eff_prob_question_2": 1.0,
+        "eff_prob_question_3": 1.0,
+        "eff_imp_question_1": 1.0,
+        "eff_imp_question_2": 1.0,
+        "eff_imp_question_3": 1.0,
+    }
+    r = client.post(f"{settings.API_V1_STR}/controls/", headers=headers, json=control_data)
+    control_id = r.json()["id"]
+    risk_data = {
+        "process_name": random_lower_string(),
+        "risk_description": random_lower_string(),
+        "area_id": area_id,
+        "prob_question_1": 2,
+        "prob_question_2": 2,
+        "prob_question_3": 2,
+        "imp_question_1": 2,
+        "imp_question_2": 2,
+        "imp_question_3": 2,
+        "control_ids": [control_id],
+    }
+    r = client.post(f"{settings.API_V1_STR}/risks/", headers=headers, json=risk_data)
+    risk_id = r.json()["id"]
+
+    url = f"{settings.API_V1_STR}/risks/"
+    response = client.get(url, headers=headers, params={"fields": "controls.id"})
+    assert response.status_code == 200
+    assert response.json() == [{"controls": [{"id": control_id}]}]
+
+    response = client.get(url, headers=headers, params={"fields": "controls"})
+    assert response.status_code == 200
+    (row,) = response.json()
+    assert set(row) == {"controls"}
+    assert row["controls"][0]["id"] == control_id
+    assert row["controls"][0]["description"] == control_data["description"]
+
+    url = f"{settings.API_V1_STR}/controls/"
+    response = client.get(url, headers=headers, params={"fields": "risks.id"})
+    assert response.status_code == 200
+    assert response.json() == [{"risks": [{"id": risk_id}]}]
+
+    response = client.get(url, headers=headers, params={"fields": "risks"})
+    assert response.status_code == 200
+    (row,) = response.json()
+    assert set(row) == {"risks"}
+    assert row["risks"][0]["process_name"] == risk_data["process_name"]
+
+
+def test_link_controls_bulk(client: TestClient, db: Session) -> None:
+    headers = create_org_admin_headers(client=client, db=db)
+    other_headers = create_org_admin_headers(client=client, db=db)
+    area_id = create_area(client=client, headers=headers)
+    control_data = {
+        "description": random_lower_string(),
+        "type": "Manual",
+        "eff_prob_question_1": 1.0,
+        "eff_prob_question_2": 1.0,
+        "eff_prob_question_3": 1.0,
+        "eff_imp_question_1": 1.0,
+        "eff_imp_question_2": 1.0,
+        "eff_imp_question_3": 1.0,
+    }
+    control_ids = [
+        client.post(f"{settings.API_V1_STR}/controls/", headers=headers, json=control_data).json()["id"]
+        for _ in range(2)
+    ]
+    foreign_control_id = client.post(
+        f"{settings.API_V1_STR}/controls/", headers=other_headers, json=control_data
+    ).json()["id"]
+    risk_data = {
+        "process_name": random_lower_string(),
+        "risk_description": random_lower_string(),
+        "area_id": area_id,
+        **{f"{kind}_question_{i}": 3 for kind in ("prob", "imp") for i in (1, 2, 3)},
+    }
+    risk_ids = [
+        client.post(f"{settings.API_V1_STR}/risks/", headers=headers, json=risk_data).json()["id"]
+        for _ in range(2)
+    ]
+
+    pairs = [{"risk_id": r, "control_id": c} for r in risk_ids for c in control_ids]
+    foreign = {"risk_id": risk_ids[0], "control_id": foreign_control_id}
+    url = f"{settings.API_V1_STR}/risks/controls:link"
+    response = client.post(url, headers=headers, json={"items": pairs + [pairs[0], foreign]})
+    assert response.status_code == 200
+    assert response.json() == {"changed": 4, "skipped": [foreign]}
+    # Linking again is a no-op
+    response = client.post(url, headers=headers, json={"items": pairs})
+    assert response.json() == {"changed": 0, "skipped": []}
+
+    risk = crud_risk.risk.get(db, id=risk_ids[0])
+    assert sorted(c.id for c in risk.controls) == sorted(control_ids)
+    assert (risk.residual_probability, risk.residual_impact) == (1, 1)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/risks/controls:unlink",
+        headers=headers,
+        json={"items": [{"risk_id": risk_ids[0], "control_id": control_ids[0]}]},
+    )
+    assert response.json() == {"changed": 1, "skipped": []}
+    db.expire_all()
+    risk = crud_risk.risk.get(db, id=risk_ids[0])
+    assert [c.id for c in risk.controls] == [control_ids[1]]
+    assert risk.residual_probability == 2
+
+
+def test_read_risk_heatmap(client: TestClient, db: Session) -> None:
+    headers = create_org_admin_headers(client=client, db=db)
+    area_ids = [create_area(client=client, headers=headers) for _ in range(2)]
+    url = f"{settings.API_V1_STR}/risks/heatmap"
+    assert client.get(url, headers=headers).json() == {
+        "total": 0, "inherent": [], "residual": [], "areas": []
+    }
+
+    def risk_data(area_id: int, level: int) -> dict:
+        return {
+            "process_name": random_lower_string(),
+            "risk_description": random_lower_string(),
+            "area_id": area_id,
+            **{f"{kind}_question_{i}": level for kind in ("prob", "imp") for i in (1, 2, 3)},
+        }
+
+    risk_ids = [
+        client.post(f"{settings.API_V1_STR}/risks/", headers=headers, json=risk_data(area_id, level)).json()["id"]
+        for area_id, level in [(area_ids[0], 3), (area_ids[0], 3), (area_ids[1], 2)]
+    ]
+    heatmap = client.get(url, headers=headers).json()
+    assert heatmap["total"] == 3
+    assert heatmap["inherent"] == [
+        {"probability": 2, "impact": 2, "count": 1},
+        {"probability": 3, "impact": 3, "count": 2},
+    ]
+    assert heatmap["residual"] == heatmap["inherent"]
+    assert [a["area_id"] for a in heatmap["areas"]] == sorted(area_ids)
+
+    # Linking a control lowers the residual cell of both risks in area 0
+    control_data = {
+        "description": random_lower_string(),
+        "type": "Manual",
+        **{f"eff_{kind}_question_{i}": 1.0 for kind in ("prob", "imp") for i in (1, 2, 3)},
+    }
+    control_id = client.post(
+        f"{settings.API_V1_STR}/controls/", headers=headers, json=control_data
+    ).json()["id"]
+    client.post(
+        f"{settings.API_V1_STR}/risks/controls:link",
+        headers=headers,
+        json={"items": [{"risk_id": r, "control_id": control_id} for r in risk_ids[:2]]},
+    )
+    # ...and moving a risk updates both areas
+    client.put(
+        f"{settings.API_V1_STR}/risks/{risk_ids[2]}", headers=headers, json={"area_id": area_ids[0]}
+    )
+
+    response = client.get(url, headers=headers, params={"area_id": area_ids[0]})
+    assert response.status_code == 200
+    heatmap = response.json()
+    assert heatmap["total"] == 3
+    (area,) = heatmap["areas"]
+    assert area["residual"] == [{"probability": 2, "impact": 2, "count": 3}]
+    assert area["inherent"] == [
+        {"probability": 2, "impact": 2, "count": 1},
+        {"probability": 3, "impact": 3, "count": 2},
+    ]
+    assert client.get(url, headers=headers, params={"area_id": area_ids[1]}).json()["total"] == 0
+
+
+def test_export_risks(client: TestClient, db: Session) -> None:
+    import csv
+    import io
+    import json
+    from openpyxl import load_workbook
+
+    headers = create_org_admin_headers(client=client, db=db)
+    area_id = create_area(client=client, headers=headers)
+    control_codes = []
+    control_ids = []
+    for _ in range(2):
+        control_data = {
+            "description": random_lower_string(),
+            "type": "Manual",
+            **{f"eff_{kind}_question_{i}": 1.0 for kind in ("prob", "imp") for i in (1, 2, 3)},
+        }
+        r = client.post(f"{settings.API_V1_STR}/controls/", headers=headers, json=control_data)
+        # Control codes are not part of the create schema
+        control = crud_control.control.get(db, id=r.json()["id"])
+        control.control_code = random_lower_string()[:10]
+        db.commit()
+        control_ids.append(control.id)
+        control_codes.append(control.control_code)
+    risk_ids = []
+    for linked in (control_ids, []):
+        risk_data = {
+            "process_name": random_lower_string(),
+            "risk_description": random_lower_string(),
+            "area_id": area_id,
+            **{f"{kind}_question_{i}": 3 for kind in ("prob", "imp") for i in (1, 2, 3)},
+            "control_ids": linked,
+        }
+        r = client.post(f"{settings.API_V1_STR}/risks/", headers=headers, json=risk_data)
+        risk_ids.append(r.json()["id"])
+
+    url = f"{settings.API_V1_STR}/risks/export"
+    response = client.get(url, headers=headers, params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(row["id"]) for row in rows] == risk_ids
+    assert sorted(rows[0]["control_codes"].split(";")) == sorted(control_codes)
+    assert rows[1]["control_codes"] == ""
+
+    response = client.get(url, headers=headers, params={"format": "ndjson"})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == risk_ids
+    assert lines[0]["inherent_probability"] == 3
+    assert lines[1]["control_codes"] is None
+
+    response = client.get(url, headers=headers, params={"format": "xlsx"})
+    assert response.status_code == 200
+    sheet = load_workbook(io.BytesIO(response.content), read_only=True).worksheets[0]
+    header, *values = list(sheet.iter_rows(values_only=True))
+    assert header[0] == "id" and header[-1] == "control_codes"
+    assert [row[0] for row in values] == risk_ids
+
+    assert client.get(url, headers=headers, params={"format": "pdf"}).status_code == 422
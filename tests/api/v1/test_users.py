@@ -1,7 +1,9 @@
 from fastapi.testclient import TestClient
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.db.models.user import User
 from tests.utils.user import authentication_token_from_email
 from tests.utils.utils import random_lower_string, random_email
 
@@ -167,3 +169,13 @@ def test_delete_user(client: TestClient, db: Session) -> None:
     content = response.json()
     assert content["is_active"] is False
 
+
+def test_read_user_me_deleted_user(client: TestClient, db: Session) -> None:
+    headers = authentication_token_from_email(client=client, email=random_email(), db=db)
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+
+    # Deleted elsewhere: the cached principal still authenticates the token
+    db.execute(delete(User).where(User.id == r.json()["id"]))
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 404
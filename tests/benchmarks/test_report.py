@@ -0,0 +1,29 @@
+from benchmarks.report import EndpointResult, compare, percentile
+
+
+def test_percentile_nearest_rank() -> None:
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([0.2], 99) == 0.2
+    assert percentile([], 50) == 0.0
+
+
+def test_compare_flags_statements_latency_and_errors() -> None:
+    result = EndpointResult("read_risks", seconds=1.0, latencies=[0.01] * 10, statements=[3] * 10)
+    summary = result.summary()
+    assert summary["throughput_rps"] == 10
+    assert summary["p95_ms"] == 10
+    baseline = {"endpoints": {"read_risks": {**summary, "statements_max": 2, "p95_ms": 5}}}
+
+    regressions = compare({"read_risks": summary}, baseline, tolerance=0.25)
+    assert len(regressions) == 2
+    assert "SQL statements" in regressions[0]
+    assert "p95" in regressions[1]
+
+    assert compare({"read_risks": summary}, {"endpoints": {"read_risks": summary}}, tolerance=0) == []
+    failed = {**summary, "errors": 1}
+    assert compare({"read_risks": failed}, {"endpoints": {}}, tolerance=0) == [
+        "read_risks: 1 failed requests"
+    ]
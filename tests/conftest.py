@@ -6,6 +6,10 @@ from sqlalchemy.orm import sessionmaker, Session
 
 from app.main import app
 from app.api.deps import get_db
+from app.core.auth import principal_cache
+from app.core.tokens import token_cache
+from app.services.grading import answer_key_cache
+from app.services.public_forms import public_form_cache
 from app.db.base import Base
 from app.core.config import settings
 
@@ -28,6 +32,9 @@ def db(db_engine) -> Generator:
     connection = db_engine.connect()
     transaction = connection.begin()
     session = TestingSessionLocal(bind=connection)
+    # Form ids are reused once each test's transaction is rolled back
+    answer_key_cache.clear()
+    public_form_cache.clear()
     yield session
     session.close()
     transaction.rollback()
@@ -39,6 +46,10 @@ def client(db: Session) -> Generator:
         yield db
     
     app.dependency_overrides[get_db] = override_get_db
+    # User ids are reused once each test's transaction is rolled back
+    principal_cache.clear()
+    token_cache.clear()
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
+    principal_cache.clear()
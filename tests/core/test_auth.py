@@ -0,0 +1,41 @@
+import time
+
+from app.core.auth import Principal, PrincipalCache
+
+
+def _principal(user_id: int, role: str = "user") -> Principal:
+    return Principal(id=user_id, organization_id=1, role=role, is_active=True)
+
+
+def test_principal_cache_ttl_and_lru() -> None:
+    now = [0.0]
+    cache = PrincipalCache(ttl_seconds=10, max_entries=2, clock=lambda: now[0])
+    cache.set(_principal(1))
+    cache.set(_principal(2))
+    assert cache.get(1) == _principal(1)  # 1 is now most recently used
+    cache.set(_principal(3))
+    assert cache.get(2) is None
+    assert cache.get(1) is not None and cache.get(3) is not None
+
+    now[0] = 10.0
+    assert cache.get(1) is None
+
+
+def test_principal_cache_invalidation_rejects_older_claims() -> None:
+    cache = PrincipalCache(ttl_seconds=10, max_entries=10)
+    cache.set(_principal(1))
+    issued_before = time.time() - 1
+    assert cache.claims_valid(1, issued_before)
+    assert not cache.claims_valid(1, None)
+
+    cache.invalidate(1)
+    assert cache.get(1) is None
+    assert not cache.claims_valid(1, issued_before)
+    assert cache.claims_valid(1, time.time() + 1)
+    assert cache.claims_valid(2, issued_before)
+
+
+def test_principal_claims_round_trip() -> None:
+    principal = Principal(id=7, organization_id=3, role="admin", is_active=True)
+    assert Principal.from_claims(7, principal.claims()) == principal
+    assert Principal.from_claims(7, {"sub": "7"}) is None
@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from app.core.password_hashing import PasswordHasher, PasswordHashingBusy
+
+
+def _hasher(**kwargs) -> PasswordHasher:
+    options = {"rounds": 4, "workers": 0, "max_pending": 4, "queue_timeout": 0}
+    options.update(kwargs)
+    return PasswordHasher(**options)
+
+
+def test_hash_and_rehash_on_cost_change() -> None:
+    old = _hasher()
+    hashed = old.hash("secret")
+    assert old.verify_and_update("secret", hashed) == (True, None)
+    assert old.verify_and_update("wrong", hashed) == (False, None)
+
+    valid, new_hash = _hasher(rounds=5).verify_and_update("secret", hashed)
+    assert valid and new_hash.startswith("$2b$05$")
+    assert old.latency.count == 3
+
+
+def test_saturated_pool_raises_busy() -> None:
+    hasher = _hasher(max_pending=1)
+    started, release = threading.Event(), threading.Event()
+
+    def hold_slot():
+        started.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=hasher._run, args=(hold_slot,))
+    worker.start()
+    started.wait(5)
+    try:
+        assert hasher.pending == 1
+        with pytest.raises(PasswordHashingBusy):
+            hasher.hash("secret")
+        assert hasher.rejected.value == 1
+    finally:
+        release.set()
+        worker.join()
+    assert hasher.pending == 0
+    assert hasher.hash("secret")
+
+
+def test_process_pool() -> None:
+    hasher = _hasher(workers=1)
+    try:
+        hashed = hasher.hash("secret")
+        assert hasher.verify_and_update("secret", hashed) == (True, None)
+    finally:
+        hasher.shutdown()
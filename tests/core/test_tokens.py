@@ -0,0 +1,50 @@
+import time
+from datetime import timedelta
+
+import pytest
+from jose import JWTError
+
+from app.core.security import create_access_token
+from app.core.tokens import (
+    InMemoryRevocationStore,
+    RevocationStore,
+    TokenCache,
+    decode_token,
+    token_cache,
+)
+
+
+def test_revocation_store_claim_is_single_use() -> None:
+    store = InMemoryRevocationStore()
+    expires_at = time.time() + 60
+    assert store.claim("jti:1", expires_at)
+    assert not store.claim("jti:1", expires_at)
+    assert store.is_revoked("jti:1")
+
+    store.revoke("family:1", time.time() - 1)  # already expired
+    assert not store.is_revoked("family:1")
+
+
+def test_incomplete_revocation_store_cannot_be_created() -> None:
+    class ClaimOnly(RevocationStore):
+        def claim(self, key: str, expires_at: float) -> bool:
+            return True
+
+    with pytest.raises(TypeError):
+        ClaimOnly()
+
+
+def test_decode_token_is_cached_until_expiry() -> None:
+    token = create_access_token(1)
+    payload = decode_token(token)
+    assert token_cache.get(token) is payload
+    assert decode_token(token) is payload
+
+    cache = TokenCache(max_entries=1)
+    cache.set("a", {"exp": time.time() - 1})
+    with pytest.raises(JWTError):
+        cache.get("a")
+    assert cache.get("a") is None
+
+    with pytest.raises(JWTError):
+        decode_token(create_access_token(1, expires_delta=timedelta(seconds=-1)))
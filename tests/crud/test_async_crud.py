@@ -0,0 +1,168 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.crud.crud_control import async_control
+from app.crud.crud_form import async_form, async_submission
+from app.crud.crud_risk import async_risk
+from app.db.base import Base
+from app.db.models.area import Area
+from app.db.models.organization import Organization
+from app.db.models.user import User
+from app.schemas.control import ControlCreate, ControlUpdate
+from app.schemas.form import FormCreate
+from app.schemas.risk import RiskCreate, RiskUpdate
+from app.schemas.submission import SubmissionCreate
+from tests.utils.utils import random_email, random_lower_string
+
+
+def _run(coro_fn) -> None:
+    async def runner():
+        engine = create_async_engine(
+            "sqlite+aiosqlite://", poolclass=StaticPool
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(
+            bind=engine, autoflush=False, expire_on_commit=False
+        )
+        try:
+            async with session_factory() as db:
+                org = Organization(name=random_lower_string())
+                db.add(org)
+                await db.flush()
+                owner = User(
+                    organization_id=org.id,
+                    email=random_email(),
+                    password_hash="x",
+                    full_name=random_lower_string(),
+                )
+                area = Area(name=random_lower_string(), organization_id=org.id)
+                db.add_all([owner, area])
+                await db.commit()
+                await coro_fn(db, org, owner, area)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(runner())
+
+
+def _risk_in(area_id: int, answer: int = 4, **kwargs) -> RiskCreate:
+    return RiskCreate(
+        process_name=random_lower_string(),
+        risk_description=random_lower_string(),
+        area_id=area_id,
+        prob_question_1=answer,
+        prob_question_2=answer,
+        prob_question_3=answer,
+        imp_question_1=answer,
+        imp_question_2=answer,
+        imp_question_3=answer,
+        **kwargs,
+    )
+
+
+def test_async_risk_and_control_residuals() -> None:
+    async def scenario(db, org, owner, area):
+        risk = await async_risk.create_with_organization_and_owner(
+            db, obj_in=_risk_in(area.id), organization_id=org.id, owner_id=owner.id
+        )
+        assert risk.inherent_probability == 4
+        assert risk.residual_probability == 4
+        assert risk.controls == []
+
+        control = await async_control.create_with_organization_and_risks(
+            db,
+            obj_in=ControlCreate(
+                description=random_lower_string(),
+                type="Manual",
+                eff_prob_question_1=1.0,
+                eff_prob_question_2=1.0,
+                eff_prob_question_3=1.0,
+                eff_imp_question_1=1.5,
+                eff_imp_question_2=1.5,
+                eff_imp_question_3=1.5,
+                risk_ids=[risk.id],
+            ),
+            organization_id=org.id,
+            owner_id=owner.id,
+        )
+        assert [r.id for r in control.risks] == [risk.id]
+
+        risk = await async_risk.get(db, id=risk.id)
+        assert risk.residual_probability == 3
+        assert risk.residual_impact == 2
+
+        control = await async_control.update(
+            db,
+            db_obj=control,
+            obj_in=ControlUpdate(
+                eff_prob_question_1=0.0,
+                eff_prob_question_2=0.3,
+                eff_prob_question_3=0.0,
+            ),
+        )
+        risk = await async_risk.get(db, id=risk.id)
+        assert risk.residual_probability == 3
+
+        risk = await async_risk.update(
+            db, db_obj=risk, obj_in=RiskUpdate(process_name="renamed")
+        )
+        assert risk.process_name == "renamed"
+        assert [c.id for c in risk.controls] == [control.id]
+
+        risks = await async_risk.get_multi(db, search="renamed")
+        assert [r.id for r in risks] == [risk.id]
+
+    _run(scenario)
+
+
+def test_async_form_submission_grading() -> None:
+    async def scenario(db, org, owner, area):
+        form = await async_form.create_with_questions(
+            db,
+            obj_in=FormCreate(
+                title=random_lower_string(),
+                is_graded=True,
+                questions=[
+                    {
+                        "text": "q1",
+                        "question_type": "single_choice",
+                        "points": 1,
+                        "options": [
+                            {"text": "yes", "is_correct": True},
+                            {"text": "no", "is_correct": False},
+                        ],
+                    }
+                ],
+            ),
+            created_by=owner.id,
+            organization_id=org.id,
+        )
+        question = form.questions[0]
+        correct = next(o for o in question.options if o.is_correct)
+
+        submission = await async_submission.create_submission(
+            db,
+            obj_in=SubmissionCreate(
+                form_id=form.id,
+                respondent_email=random_email(),
+                respondent_name=random_lower_string(),
+                respondent_identifier="123",
+                answers=[
+                    {"question_id": question.id, "selected_option_id": correct.id}
+                ],
+            ),
+            form=form,
+        )
+        assert submission.score == 100.0
+        assert submission.passed is True
+        assert len(submission.answers) == 1
+
+        previous = await async_submission.get_by_respondent(
+            db, form_id=form.id, identifier="123"
+        )
+        assert len(previous) == 1
+
+    _run(scenario)
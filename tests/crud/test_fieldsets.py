@@ -0,0 +1,120 @@
+from typing import List
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session
+
+from app.crud.crud_control import CONTROL_FIELDS, control as crud_control
+from app.crud.crud_risk import RISK_FIELDS, risk as crud_risk
+from app.db.models.area import Area
+from app.db.models.control import Control
+from app.db.models.organization import Organization
+from app.db.models.risk import Risk
+from tests.utils.utils import random_lower_string
+
+
+def _seed(db: Session) -> int:
+    org = Organization(name=random_lower_string())
+    db.add(org)
+    db.flush()
+    area = Area(name=random_lower_string(), organization_id=org.id)
+    control = Control(organization_id=org.id, description=random_lower_string())
+    db.add_all([area, control])
+    db.flush()
+    for _ in range(3):
+        risk = Risk(
+            organization_id=org.id,
+            area_id=area.id,
+            process_name=random_lower_string(),
+            risk_description=random_lower_string(),
+            inherent_probability=1,
+            inherent_impact=1,
+        )
+        risk.controls.append(control)
+        db.add(risk)
+    db.flush()
+    organization_id = org.id
+    db.expire_all()
+    return organization_id
+
+
+def _capture(db: Session) -> List[str]:
+    statements: List[str] = []
+
+    @event.listens_for(db.connection(), "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    return statements
+
+
+def test_fields_compile_to_column_only_select(db: Session) -> None:
+    organization_id = _seed(db)
+    fieldset = RISK_FIELDS.parse("process_name,controls.description")
+    statements = _capture(db)
+    page = crud_risk.get_page(
+        db, filters={"organization_id": organization_id}, fields=fieldset, sort="-process_name"
+    )
+
+    assert len(statements) == 2  # risks + one IN query for the controls
+    risks_select = statements[0].split("FROM")[0]
+    assert "risks.process_name" in risks_select
+    assert "risks.risk_description" not in risks_select
+    assert "controls.effectiveness_impact" not in statements[1]
+
+    rows = [fieldset.dump(risk) for risk in page.items]
+    assert len(statements) == 2
+    assert all(set(row) == {"process_name", "controls"} for row in rows)
+    # Anything not requested raises instead of lazy-loading per row
+    with pytest.raises(InvalidRequestError):
+        page.items[0].risk_description
+
+
+def test_fields_skip_default_relationship_load(db: Session) -> None:
+    organization_id = _seed(db)
+    statements = _capture(db)
+    page = crud_control.get_page(
+        db, filters={"organization_id": organization_id}, fields=CONTROL_FIELDS.parse("id")
+    )
+    assert len(page.items) == 1
+    assert len(statements) == 1
+    assert "risk_controls" not in statements[0]
+
+
+def test_fields_relations_only(db: Session) -> None:
+    organization_id = _seed(db)
+    for fields, child_columns in [("controls.id", {"id"}), ("controls", None)]:
+        fieldset = RISK_FIELDS.parse(fields)
+        assert fieldset.columns == ()
+        assert list(fieldset.relations) == ["controls"]
+        # Compiles to loader options (an empty load_only used to raise IndexError)
+        assert RISK_FIELDS.load_options(fieldset)
+
+        db.expire_all()
+        statements = _capture(db)
+        page = crud_risk.get_page(
+            db, filters={"organization_id": organization_id}, fields=fieldset
+        )
+        rows = [fieldset.dump(risk) for risk in page.items]
+
+        assert len(statements) == 2
+        # Only the primary key of the parent is selected
+        assert statements[0].split("FROM")[0].split("SELECT")[1].strip() == "risks.id AS risks_id"
+        controls_select = statements[1].split("FROM")[0]
+        assert "controls.id" in controls_select
+        if child_columns is not None:
+            assert "controls.description" not in controls_select
+        else:
+            assert "controls.description" in controls_select
+        assert len(rows) == 3
+        assert all(set(row) == {"controls"} for row in rows)
+
+
+def test_fields_allow_list() -> None:
+    assert RISK_FIELDS.parse("controls").relations["controls"]
+    for fields in ["", ",", "password_hash", "organization.name", "controls.risks"]:
+        with pytest.raises(HTTPException) as exc:
+            RISK_FIELDS.parse(fields)
+        assert exc.value.status_code == 400
@@ -0,0 +1,14 @@
+import subprocess
+import sys
+from pathlib import Path
+
+
+def test_crud_module_imports_on_its_own() -> None:
+    # A fresh interpreter: the test session has long registered every model
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.crud.crud_form"],
+        cwd=Path(__file__).resolve().parents[2],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,15 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.crud.pagination import explain_statement
+from app.db.models.risk import Risk
+
+
+def test_explain_statement_expands_in_lists(db: Session) -> None:
+    query = db.query(Risk).filter(Risk.id.in_([1, 2, 3])).order_by(Risk.id)
+    statement, parameters = explain_statement(query, postgresql.dialect())
+    assert statement.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "POSTCOMPILE" not in statement
+    assert "ORDER BY" not in statement
+    assert "risks.id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s)" in statement
+    assert [parameters[f"id_1_{i}"] for i in (1, 2, 3)] == [1, 2, 3]
@@ -0,0 +1,121 @@
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.crud.crud_control import CONTROL_SEARCH_COLUMNS, control as crud_control
+from app.crud.crud_risk import RISK_SEARCH_COLUMNS, risk as crud_risk
+from app.db.models.area import Area
+from app.db.models.control import Control
+from app.db.models.organization import Organization
+from app.db.models.risk import Risk
+from app.db.search import search_clauses
+from tests.utils.utils import random_lower_string
+
+
+def _setup(db: Session):
+    org = Organization(name=random_lower_string())
+    db.add(org)
+    db.flush()
+    area = Area(name=random_lower_string(), organization_id=org.id)
+    db.add(area)
+    db.flush()
+    return org, area
+
+
+def _risk(org, area, process_name: str, description: str) -> Risk:
+    return Risk(
+        organization_id=org.id,
+        area_id=area.id,
+        process_name=process_name,
+        risk_description=description,
+        inherent_probability=1,
+        inherent_impact=1,
+    )
+
+
+def test_search_risks_ranked_and_in_sync(db: Session) -> None:
+    org, area = _setup(db)
+    in_description = _risk(org, area, "Treasury", "late payroll approval")
+    in_name = _risk(org, area, "Payroll close", "manual steps")
+    unrelated = _risk(org, area, "Inventory", "stock counts")
+    db.add_all([in_description, in_name, unrelated])
+    db.flush()
+    filters = {"organization_id": org.id}
+
+    page = crud_risk.get_page(db, search="PAYROLL", filters=filters)
+    assert [r.id for r in page.items] == [in_name.id, in_description.id]
+
+    # Keyset pagination over relevance order
+    first = crud_risk.get_page(db, search="payroll", filters=filters, limit=1)
+    assert first.has_more and first.next_cursor
+    second = crud_risk.get_page(
+        db, search="payroll", filters=filters, limit=1, cursor=first.next_cursor
+    )
+    assert [r.id for r in first.items + second.items] == [in_name.id, in_description.id]
+    assert not second.has_more
+
+    # Triggers keep the index in sync with updates and deletes
+    unrelated.process_name = "Payroll audit"
+    db.delete(in_description)
+    db.flush()
+    found = crud_risk.get_multi(db, search="payroll", filters=filters)
+    assert {r.id for r in found} == {in_name.id, unrelated.id}
+
+    # Short terms fall back to ILIKE, with LIKE wildcards escaped
+    assert {r.id for r in crud_risk.get_multi(db, search="ay", filters=filters)} == {
+        in_name.id,
+        unrelated.id,
+    }
+    assert crud_risk.get_multi(db, search="%", filters=filters) == []
+
+
+def test_search_controls_by_code(db: Session) -> None:
+    org, _ = _setup(db)
+    match = Control(organization_id=org.id, control_code="CTL-042", description="backup")
+    other = Control(organization_id=org.id, control_code="CTL-100", description="review")
+    db.add_all([match, other])
+    db.flush()
+
+    found = crud_control.get_multi(db, search="ctl-04", filters={"organization_id": org.id})
+    assert [c.id for c in found] == [match.id]
+
+
+def test_search_controls_without_code(db: Session) -> None:
+    org, _ = _setup(db)
+    controls = [
+        Control(organization_id=org.id, control_code=None, description="offsite backup"),
+        Control(organization_id=org.id, control_code="CTL-7", description="backup restore"),
+    ]
+    db.add_all(controls)
+    db.flush()
+    filters = {"organization_id": org.id}
+
+    first = crud_control.get_page(db, search="backup", filters=filters, limit=1)
+    second = crud_control.get_page(
+        db, search="backup", filters=filters, limit=1, cursor=first.next_cursor
+    )
+    assert {c.id for c in first.items + second.items} == {c.id for c in controls}
+    assert not second.has_more
+
+
+def test_sqlite_fts_update_trigger_limited_to_indexed_columns(db: Session) -> None:
+    trigger = db.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'risks_fts_au'")
+    ).scalar_one()
+    assert "AFTER UPDATE OF process_name, risk_description ON risks" in trigger
+
+
+def test_postgresql_search_uses_indexed_operators() -> None:
+    condition, rank = search_clauses("postgresql", Risk, RISK_SEARCH_COLUMNS, "payroll")
+    sql = str(condition.compile(dialect=postgresql.dialect()))
+    assert "risks.search_vector @@ websearch_to_tsquery" in sql
+    assert "risks.process_name ILIKE" in sql
+    assert "ts_rank" in str(rank.compile(dialect=postgresql.dialect()))
+
+
+def test_postgresql_control_rank_ignores_null_code() -> None:
+    _, rank = search_clauses("postgresql", Control, CONTROL_SEARCH_COLUMNS, "backup")
+    sql = str(rank.compile(dialect=postgresql.dialect()))
+    assert "coalesce(ts_rank(controls.search_vector" in sql
+    assert "coalesce(word_similarity(%(word_similarity_1)s, controls.description)" in sql
+    assert "control_code" not in sql
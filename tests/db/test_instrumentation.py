@@ -0,0 +1,61 @@
+import json
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import instrumentation
+from app.db.models.user import User
+from app.middlewares.custom_middlewares import SQLInstrumentationMiddleware
+from tests.utils.organization import create_org_admin_headers
+
+
+def test_track_records_statements_and_loads(db: Session) -> None:
+    instrumentation.install()
+    db.execute(text("SELECT 1"))  # outside track: not recorded
+    with instrumentation.track() as stats:
+        db.execute(text("SELECT 2"))
+        users = db.query(User).all()
+    assert stats.statements == 2
+    assert stats.objects_loaded == len(users)
+    assert stats.db_seconds >= stats.slowest_seconds > 0
+    assert stats.slowest_statement.startswith("SELECT")
+    assert instrumentation.current_stats() is None
+
+
+def test_server_timing_header(client: TestClient, db: Session) -> None:
+    headers = create_org_admin_headers(client=client, db=db)
+    r = client.get(f"{settings.API_V1_STR}/users/", headers=headers)
+    assert r.status_code == 200
+    timing = r.headers["Server-Timing"]
+    assert 'db;dur=' in timing and "statements" in timing
+    assert "app;dur=" in timing
+
+
+def test_slow_request_logged(db: Session, caplog) -> None:
+    app = FastAPI()
+
+    @app.get("/")
+    def endpoint():
+        db.execute(text("SELECT 1"))
+        db.execute(text("SELECT 2"))
+        return {}
+
+    app.add_middleware(
+        SQLInstrumentationMiddleware,
+        max_statements=1,
+        max_db_seconds=60,
+        slow_statement_seconds=60,
+    )
+    with caplog.at_level(logging.WARNING, logger="app.requests"):
+        r = TestClient(app).get("/")
+    assert r.status_code == 200
+    assert 'db;dur=' in r.headers["Server-Timing"]
+    (record,) = caplog.records
+    logged = json.loads(record.getMessage())
+    assert logged["db_statements"] == 2
+    assert logged["slow"] == ["statements"]
+    assert logged["path"] == "/"
@@ -0,0 +1,154 @@
+"""
+Query plan regression tests.
+
+Each test runs a CRUD operation against a seeded database, captures every
+SELECT it issues and checks `EXPLAIN QUERY PLAN` for full table scans. A new
+query pattern that is not covered by an index (see the model `__table_args__`
+and the tenant index migration) fails here instead of in production.
+"""
+import re
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.crud.crud_control import control as crud_control
+from app.crud.crud_form import form as crud_form, submission as crud_submission
+from app.crud.crud_risk import risk as crud_risk
+from app.crud.crud_user import user as crud_user
+from app.db.base import Base
+from app.db.models.area import Area
+from app.db.models.control import Control
+from app.db.models.form import Answer, Form, FormSubmission, Option, Question, QuestionType
+from app.db.models.organization import Organization
+from app.db.models.risk import Risk
+from app.db.models.user import User
+from app.services.residual_risk import recompute_residual_risk
+from tests.utils.utils import random_email, random_lower_string
+
+SCAN = re.compile(r"^SCAN (\w+)$")
+TABLES = set(Base.metadata.tables)
+
+
+@contextmanager
+def captured_selects(db: Session) -> Iterator[List[Tuple[str, tuple]]]:
+    statements: List[Tuple[str, tuple]] = []
+    connection = db.connection()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+
+def full_scans(db: Session, statements: List[Tuple[str, tuple]]) -> List[str]:
+    connection = db.connection()
+    scans = []
+    for statement, parameters in statements:
+        plan = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        for row in plan:
+            match = SCAN.match(row.detail)
+            if match and match.group(1) in TABLES:
+                scans.append(f"{row.detail}: {statement}")
+    return scans
+
+
+def assert_indexed(db: Session, statements: List[Tuple[str, tuple]]) -> None:
+    assert statements, "no queries captured"
+    scans = full_scans(db, statements)
+    assert not scans, "full table scans:\n" + "\n".join(scans)
+
+
+def _seed(db: Session):
+    orgs = []
+    for _ in range(2):
+        org = Organization(name=random_lower_string())
+        db.add(org)
+        db.flush()
+        owner = User(
+            organization_id=org.id,
+            email=random_email(),
+            password_hash="x",
+            full_name=random_lower_string(),
+        )
+        area = Area(name=random_lower_string(), organization_id=org.id)
+        db.add_all([owner, area])
+        db.flush()
+        controls = [
+            Control(
+                organization_id=org.id,
+                description=random_lower_string(),
+                effectiveness_probability=1,
+                effectiveness_impact=1,
+            )
+            for _ in range(3)
+        ]
+        for i in range(5):
+            risk = Risk(
+                organization_id=org.id,
+                area_id=area.id,
+                owner_id=owner.id,
+                process_name=random_lower_string(),
+                risk_description=random_lower_string(),
+                inherent_probability=3,
+                inherent_impact=3,
+            )
+            risk.controls.extend(controls[: i % 3 + 1])
+            db.add(risk)
+        form = Form(title=random_lower_string(), organization_id=org.id, created_by=owner.id)
+        question = Question(form=form, text="q", question_type=QuestionType.single_choice)
+        option = Option(question=question, text="a", is_correct=True)
+        submission = FormSubmission(
+            form=form,
+            respondent_email=random_email(),
+            respondent_name="r",
+            respondent_identifier="123",
+        )
+        db.add_all(
+            [form, question, option, submission]
+            + [Answer(submission=submission, question=question, selected_option=option)]
+        )
+        db.flush()
+        orgs.append((org, controls, form))
+    db.expire_all()
+    return orgs
+
+
+def test_risk_list_queries_use_indexes(db: Session) -> None:
+    (org, _, _), _ = _seed(db)
+    filters = {"organization_id": org.id}
+    with captured_selects(db) as statements:
+        page = crud_risk.get_page(db, filters=filters, limit=2, count="exact")
+        crud_risk.get_page(db, filters=filters, limit=2, cursor=page.next_cursor)
+        crud_risk.get_page(db, filters=filters, search=random_lower_string())
+        crud_risk.get(db, page.items[0].id)
+    assert_indexed(db, statements)
+
+
+def test_control_queries_use_indexes(db: Session) -> None:
+    (org, controls, _), _ = _seed(db)
+    with captured_selects(db) as statements:
+        crud_control.get_page(db, filters={"organization_id": org.id}, limit=2)
+        crud_control.get_effectiveness_by_id(
+            db, ids=[c.id for c in controls], organization_id=org.id
+        )
+        recompute_residual_risk(db, control_ids=[controls[0].id])
+    assert_indexed(db, statements)
+
+
+def test_tenant_list_queries_use_indexes(db: Session) -> None:
+    (org, _, form), _ = _seed(db)
+    with captured_selects(db) as statements:
+        crud_user.get_page_by_organization(db, organization_id=org.id, count="exact")
+        crud_form.get_page_by_organization(db, organization_id=org.id)
+        crud_submission.get_by_respondent(db, form_id=form.id, identifier="123")
+        loaded = crud_form.get(db, form.id)
+        [q.options for q in loaded.questions]
+        [s.answers for s in loaded.submissions]
+    assert_indexed(db, statements)
@@ -0,0 +1,164 @@
+from sqlalchemy.orm import Session
+
+from app.crud.crud_form import form as crud_form, submission as crud_submission
+from app.db.models.organization import Organization
+from app.db.models.user import User
+from app.schemas.form import FormCreate
+from app.schemas.submission import SubmissionCreate
+from app.db.models.form import FormSubmission
+from app.services import grading
+from app.services.grading import GradingQueue, answer_key_cache, get_answer_key
+from tests.utils.utils import random_email, random_lower_string
+
+
+def _create_form(db: Session):
+    org = Organization(name=random_lower_string())
+    db.add(org)
+    db.flush()
+    owner = User(
+        organization_id=org.id,
+        email=random_email(),
+        password_hash="x",
+        full_name=random_lower_string(),
+    )
+    db.add(owner)
+    db.flush()
+    return crud_form.create_with_questions(
+        db,
+        obj_in=FormCreate(
+            title=random_lower_string(),
+            is_graded=True,
+            questions=[
+                {
+                    "text": "single",
+                    "question_type": "single_choice",
+                    "points": 1,
+                    "options": [
+                        {"text": "yes", "is_correct": True},
+                        {"text": "no", "is_correct": False},
+                    ],
+                },
+                {
+                    "text": "multiple",
+                    "question_type": "multiple_choice",
+                    "points": 3,
+                    "options": [
+                        {"text": "a", "is_correct": True},
+                        {"text": "b", "is_correct": True},
+                        {"text": "c", "is_correct": False},
+                    ],
+                },
+                {"text": "free", "question_type": "text", "points": 0},
+            ],
+        ),
+        created_by=owner.id,
+        organization_id=org.id,
+    )
+
+
+def _submit(db: Session, form, answers, background: bool = False):
+    return crud_submission.create_submission(
+        db,
+        obj_in=SubmissionCreate(
+            form_id=form.id,
+            respondent_email=random_email(),
+            respondent_name=random_lower_string(),
+            respondent_identifier=random_lower_string(),
+            answers=answers,
+        ),
+        form=form,
+        background=background,
+    )
+
+
+def test_answer_key_grades_option_sets(db: Session) -> None:
+    form = _create_form(db)
+    single, multiple, free = sorted(form.questions, key=lambda q: q.id)
+    yes, no = sorted(single.options, key=lambda o: o.id)
+    a, b, c = sorted(multiple.options, key=lambda o: o.id)
+
+    key = get_answer_key(db, form)
+    assert key.total_points == 4
+    assert key.questions[multiple.id].correct == frozenset({a.id, b.id})
+    assert key.is_valid_option(single.id, yes.id)
+    assert not key.is_valid_option(single.id, a.id)
+
+    assert key.grade({single.id: frozenset({yes.id}), multiple.id: frozenset({a.id, b.id})}) == (100.0, True)
+    # A subset or superset of the correct options earns nothing
+    assert key.grade({single.id: frozenset({yes.id}), multiple.id: frozenset({a.id})}) == (25.0, False)
+    assert key.grade({multiple.id: frozenset({a.id, b.id, c.id})}) == (0.0, False)
+    assert key.grade({single.id: frozenset({yes.id, no.id}), multiple.id: frozenset({a.id, b.id})}) == (75.0, True)
+
+    submission = _submit(
+        db,
+        form,
+        [
+            {"question_id": single.id, "selected_option_id": yes.id},
+            {"question_id": multiple.id, "selected_option_id": a.id},
+            {"question_id": multiple.id, "selected_option_id": b.id},
+            {"question_id": free.id, "text_value": "free text"},
+            {"question_id": -1, "text_value": "dropped"},
+        ],
+    )
+    assert submission["score"] == 100.0
+    assert submission["passed"] is True
+    assert len(submission["answers"]) == 4
+    assert all(answer["id"] for answer in submission["answers"])
+
+
+def test_answer_key_is_cached_per_form_version(db: Session) -> None:
+    form = _create_form(db)
+    key = get_answer_key(db, form)
+    assert answer_key_cache.get(form.id, form.version) is key
+    assert get_answer_key(db, form) is key
+
+    update = {"is_graded": False, "questions": []}
+    form = crud_form.update_with_questions(db, db_obj=form, obj_in=update)
+    # The caller's dict is left as passed
+    assert update == {"is_graded": False, "questions": []}
+    assert form.version == key.version + 1
+    submission = _submit(db, form, [])
+    assert (submission["score"], submission["passed"]) == (0.0, None)
+    assert answer_key_cache.get(form.id, form.version) is not key
+
+
+def test_background_grading(db: Session, monkeypatch) -> None:
+    form = _create_form(db)
+    single = min(form.questions, key=lambda q: q.id)
+    correct = next(o for o in single.options if o.is_correct)
+    # No worker threads: the test grades the queued batch itself, sharing
+    # the test transaction
+    queue = GradingQueue(workers=1, batch_size=10, session_factory=lambda: Session(bind=db.connection()))
+    monkeypatch.setattr(queue, "_start", lambda: None)
+    monkeypatch.setattr(grading, "grading_queue", queue)
+
+    submission = _submit(
+        db, form, [{"question_id": single.id, "selected_option_id": correct.id}], background=True
+    )
+    # Stored ungraded, then graded by the queue after the commit
+    assert submission["grading_status"] == "pending"
+    assert queue.pending == 1
+    queue._grade([queue._queue.get_nowait()])
+    graded = db.get(FormSubmission, submission["id"])
+    db.refresh(graded)
+    assert graded.grading_status == "graded"
+    assert graded.score == 25.0
+    assert graded.passed is False
+    assert queue.snapshot()["graded"] == 1
+
+
+def test_background_grading_without_workers(db: Session, monkeypatch) -> None:
+    form = _create_form(db)
+    single = min(form.questions, key=lambda q: q.id)
+    correct = next(o for o in single.options if o.is_correct)
+    queue = GradingQueue(workers=0, batch_size=10)
+    monkeypatch.setattr(grading, "grading_queue", queue)
+
+    submission = _submit(
+        db, form, [{"question_id": single.id, "selected_option_id": correct.id}], background=True
+    )
+    # Graded in the request, so the response reports the real result
+    assert submission["grading_status"] == "graded"
+    assert submission["score"] == 25.0
+    assert db.get(FormSubmission, submission["id"]).grading_status == "graded"
+    assert queue.pending == 0
@@ -0,0 +1,81 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.db.models.area import Area
+from app.db.models.control import Control
+from app.db.models.organization import Organization
+from app.db.models.risk import Risk
+from app.services.residual_risk import (
+    _affected_condition,
+    recompute_residual_risk,
+    residual_update_statement,
+)
+from tests.utils.utils import random_lower_string
+
+
+def _setup(db: Session):
+    org = Organization(name=random_lower_string())
+    db.add(org)
+    db.flush()
+    area = Area(name=random_lower_string(), organization_id=org.id)
+    db.add(area)
+    db.flush()
+    return org, area
+
+
+def _risk(org, area, inherent: int) -> Risk:
+    return Risk(
+        organization_id=org.id,
+        area_id=area.id,
+        process_name=random_lower_string(),
+        risk_description=random_lower_string(),
+        inherent_probability=inherent,
+        inherent_impact=inherent,
+        residual_probability=inherent,
+        residual_impact=inherent,
+    )
+
+
+def test_recompute_residual_risk_for_control(db: Session) -> None:
+    org, area = _setup(db)
+    shared = Control(
+        organization_id=org.id,
+        description=random_lower_string(),
+        effectiveness_probability=1,
+        effectiveness_impact=2,
+    )
+    other = Control(
+        organization_id=org.id,
+        description=random_lower_string(),
+        effectiveness_probability=1,
+        effectiveness_impact=1,
+    )
+    r1, r2, untouched = _risk(org, area, 4), _risk(org, area, 2), _risk(org, area, 3)
+    r1.controls.extend([shared, other])
+    r2.controls.append(shared)
+    db.add_all([r1, r2, untouched])
+    db.flush()
+
+    recompute_residual_risk(db, control_ids=[shared.id])
+
+    assert (r1.residual_probability, r1.residual_impact) == (2, 1)
+    # Floors at 1
+    assert (r2.residual_probability, r2.residual_impact) == (1, 1)
+    assert (untouched.residual_probability, untouched.residual_impact) == (3, 3)
+
+    # Unlinking every control restores the inherent level
+    r1.controls.clear()
+    recompute_residual_risk(db, risk_ids=[r1.id])
+    assert (r1.residual_probability, r1.residual_impact) == (4, 4)
+
+
+def test_residual_update_statement_is_single_postgres_update() -> None:
+    sql = str(
+        residual_update_statement(_affected_condition({1, 2}, {3})).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+    assert sql.startswith("UPDATE risks SET")
+    assert "FROM (SELECT" in sql
+    assert "greatest(" in sql
+    assert "GROUP BY" in sql
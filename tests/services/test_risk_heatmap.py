@@ -0,0 +1,80 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.crud.crud_risk import risk as crud_risk
+from app.db.models.area import Area
+from app.db.models.organization import Organization
+from app.db.models.risk import Risk
+from app.db.models.user import User
+from app.schemas.risk import RiskCreate, RiskUpdate
+from app.services.risk_heatmap import INHERENT, apply_deltas, cell_counts, cells_table
+from tests.utils.utils import random_email, random_lower_string
+
+
+def _setup(db: Session):
+    org = Organization(name=random_lower_string())
+    db.add(org)
+    db.flush()
+    areas = [Area(name=random_lower_string(), organization_id=org.id) for _ in range(2)]
+    owner = User(
+        organization_id=org.id,
+        email=random_email(),
+        password_hash=random_lower_string(),
+        full_name=random_lower_string(),
+    )
+    db.add_all([*areas, owner])
+    db.flush()
+    return org, areas, owner
+
+
+def _cells(db: Session, org_id: int) -> dict:
+    rows = db.execute(select(cells_table).where(cells_table.c.organization_id == org_id))
+    return {tuple(row[:5]): row[5] for row in rows}
+
+
+def _questions(level: int) -> dict:
+    return {f"{kind}_question_{i}": level for kind in ("prob", "imp") for i in (1, 2, 3)}
+
+
+def test_cells_follow_risk_writes(db: Session) -> None:
+    org, (area, other_area), owner = _setup(db)
+
+    def recount() -> dict:
+        return dict(cell_counts(db, Risk.organization_id == org.id))
+
+    risks = [
+        crud_risk.create_with_organization_and_owner(
+            db,
+            obj_in=RiskCreate(
+                process_name=random_lower_string(),
+                risk_description=random_lower_string(),
+                area_id=area.id,
+                **_questions(level),
+            ),
+            organization_id=org.id,
+            owner_id=owner.id,
+        )
+        for level in (3, 3, 2)
+    ]
+    assert _cells(db, org.id) == recount()
+    assert _cells(db, org.id)[(org.id, area.id, INHERENT, 3, 3)] == 2
+
+    crud_risk.update(db, db_obj=risks[0], obj_in=RiskUpdate(area_id=other_area.id))
+    crud_risk.update(db, db_obj=risks[1], obj_in=RiskUpdate(**_questions(4)))
+    assert _cells(db, org.id) == recount()
+    assert (org.id, area.id, INHERENT, 3, 3) not in _cells(db, org.id)
+
+    for risk in risks:
+        crud_risk.remove(db, id=risk.id)
+    assert _cells(db, org.id) == {}
+
+
+def test_apply_deltas_adds_to_existing_cells(db: Session) -> None:
+    org, (area, _), _ = _setup(db)
+    cell = (org.id, area.id, INHERENT, 2, 2)
+
+    apply_deltas(db, {cell: 1})
+    apply_deltas(db, {cell: 2})
+    assert _cells(db, org.id) == {cell: 3}
+    apply_deltas(db, {cell: -3})
+    assert _cells(db, org.id) == {}
@@ -0,0 +1,115 @@
+from typing import Generator
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.db.models.area import Area
+from app.db.models.organization import Organization
+from app.db.models.user import User
+from app.services import risk_import
+from tests.utils.utils import random_email, random_lower_string
+
+QUESTIONS = {
+    "prob_question_1": "2",
+    "prob_question_2": "2",
+    "prob_question_3": "2",
+    "imp_question_1": "2",
+    "imp_question_2": "2",
+    "imp_question_3": "2",
+}
+
+
+@pytest.fixture
+def savepoint_db(db_engine) -> Generator:
+    # The importer rolls back failed chunks; with a savepoint-joined session
+    # that only undoes the chunk, not the test's transaction
+    connection = db_engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    yield session
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+
+def _setup(db: Session):
+    org = Organization(name=random_lower_string())
+    db.add(org)
+    db.flush()
+    area = Area(name=random_lower_string(), organization_id=org.id)
+    owner = User(
+        organization_id=org.id,
+        email=random_email(),
+        password_hash=random_lower_string(),
+        full_name=random_lower_string(),
+    )
+    db.add_all([area, owner])
+    db.flush()
+    return org, area, owner
+
+
+def _row(area_id, **overrides):
+    return {
+        "process_name": random_lower_string(),
+        "risk_description": random_lower_string(),
+        "area_id": str(area_id),
+        **QUESTIONS,
+        **overrides,
+    }
+
+
+def test_import_errors_reported_in_row_order(savepoint_db: Session, monkeypatch) -> None:
+    db = savepoint_db
+    org, area, owner = _setup(db)
+
+    # The second chunk's INSERT fails
+    real_insert = risk_import.insert
+    calls = []
+
+    def insert(table):
+        calls.append(table)
+        if len(calls) == 2:
+            raise OperationalError("INSERT", {}, Exception("disk I/O error"))
+        return real_insert(table)
+
+    monkeypatch.setattr(risk_import, "insert", insert)
+    rows = [
+        # chunk 1: unknown area, validation error, created
+        (2, _row(999999)),
+        (3, _row(area.id, prob_question_1="9")),
+        (4, _row(area.id)),
+        # chunk 2: insert error, validation error, insert error
+        (5, _row(area.id)),
+        (6, _row(area.id, process_name="")),
+        (7, _row(area.id)),
+        # chunk 3: created
+        (8, _row(area.id)),
+    ]
+    report = risk_import.import_risks(
+        db, rows, organization_id=org.id, owner_id=owner.id, chunk_size=3
+    )
+
+    assert report["created"] == 2
+    assert report["failed"] == 5
+    assert [error["row"] for error in report["errors"]] == [2, 3, 5, 6, 7]
+    assert report["errors"][2]["errors"] == ["database error: OperationalError"]
+    assert not report["errors_truncated"]
+
+
+def test_import_truncated_errors_keep_lowest_rows(db: Session) -> None:
+    org, area, owner = _setup(db)
+    # Validation errors are found before unknown areas, so row 2 fails last
+    rows = [
+        (2, _row(999999)),
+        (3, _row(area.id, prob_question_1="9")),
+        (4, _row(area.id, process_name="")),
+        (5, _row(999999)),
+    ]
+    report = risk_import.import_risks(
+        db, rows, organization_id=org.id, owner_id=owner.id, max_reported_errors=2
+    )
+
+    assert report["failed"] == 4
+    assert [error["row"] for error in report["errors"]] == [2, 3]
+    assert report["errors_truncated"]
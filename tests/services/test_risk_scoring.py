@@ -0,0 +1,53 @@
+import itertools
+import math
+
+import numpy as np
+
+from app.services.risk_scoring import (
+    answer_level,
+    score_batch,
+    score_questionnaires,
+    score_risk,
+)
+
+
+def test_answer_level_is_ceiling_of_mean() -> None:
+    assert answer_level([2, 2, 2]) == 2
+    assert answer_level([1, 1, 2]) == 2
+    assert answer_level([1.0, 0.3, 0.0]) == 1
+
+
+def test_score_risk_floors_residual_at_one() -> None:
+    score = score_risk([4, 4, 4], [2, 2, 2], 1, 5)
+    assert score.inherent_probability == 4
+    assert score.residual_probability == 3
+    assert score.inherent_impact == 2
+    assert score.residual_impact == 1
+
+
+def test_score_batch_matches_scalar_formula() -> None:
+    answers = list(itertools.product(range(1, 5), repeat=3))
+    eff = np.arange(len(answers)) % 4
+    scores = score_batch(answers, answers[::-1], eff, eff[::-1])
+    for i, (prob, imp) in enumerate(zip(answers, answers[::-1])):
+        expected = score_risk(prob, imp, eff[i], eff[::-1][i])
+        assert scores["inherent_probability"][i] == expected.inherent_probability
+        assert scores["inherent_impact"][i] == expected.inherent_impact
+        assert scores["residual_probability"][i] == expected.residual_probability
+        assert scores["residual_impact"][i] == expected.residual_impact
+        assert expected.inherent_probability == math.ceil(sum(prob) / 3)
+
+
+def test_score_questionnaires_sums_known_controls() -> None:
+    class Item:
+        prob_question_1 = prob_question_2 = prob_question_3 = 4
+        imp_question_1 = imp_question_2 = imp_question_3 = 3
+        control_ids = [1, 2, 99]
+
+    [result] = score_questionnaires([Item()], {1: (1, 1), 2: (1, 0)})
+    assert result == {
+        "inherent_probability": 4,
+        "inherent_impact": 3,
+        "residual_probability": 2,
+        "residual_impact": 2,
+    }
@@ -0,0 +1,35 @@
+from typing import Dict
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from tests.utils.user import authentication_token_from_email
+from tests.utils.utils import random_email, random_lower_string
+
+
+def create_org_admin_headers(*, client: TestClient, db: Session) -> Dict[str, str]:
+    """
+    Create a fresh organization through the API and return auth headers for
+    its initial admin.
+    """
+    headers = authentication_token_from_email(client=client, email=random_email(), db=db)
+    org_admin_email = random_email()
+    org_data = {
+        "name": random_lower_string(),
+        "admin_email": org_admin_email,
+        "admin_full_name": random_lower_string(),
+    }
+    response = client.post(f"{settings.API_V1_STR}/organizations/", headers=headers, json=org_data)
+    org_admin_password = response.json()["temporary_password"]
+
+    login_data = {"username": org_admin_email, "password": org_admin_password}
+    r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def create_area(*, client: TestClient, headers: Dict[str, str]) -> int:
+    r = client.post(
+        f"{settings.API_V1_STR}/areas/", headers=headers, json={"name": random_lower_string()}
+    )
+    return r.json()["id"]
@@ -0,0 +1,21 @@
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+@contextmanager
+def count_queries(db: Session) -> Iterator[List[str]]:
+    """Collect every SQL statement executed on `db`'s connection inside the block."""
+    statements: List[str] = []
+    connection = db.connection()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", before_cursor_execute)